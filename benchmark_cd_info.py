@@ -0,0 +1,182 @@
+"""
+benchmark for parsing cd-info's output into CDDB and CD-TEXT tags.
+
+Times cd_rip_conv_tag's parser on cd-info-sample-output and on a 
+synthetic 99 track report, next to a baseline parser. The baseline is 
+main.py as of BASELINE_REVISION, the last commit before parseCDInfo() 
+replaced its parser, read with git. Another revision, or a main.py on 
+disk, can be given instead:
+
+    python benchmark_cd_info.py [--revision REV] [baseline main.py]
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import timeit
+
+import cd_rip_conv_tag.core
+
+### constants   ========================================================
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_OUTPUT = os.path.join(HERE, 'cd-info-sample-output')
+SYNTHETIC_TRACKS = 99
+REPEAT = 5
+RESULT = '{:<10s} {:<24s} {:>10.1f} us/parse'
+BASELINE_FILE = 'main.py'
+BASELINE_REVISION = '93a5b9d36b27e42e3833c5e7517a5edf0cb254c9'
+NO_BASELINE = 'no baseline: cannot read {:s} from git ({:s})'
+
+########################################################################
+### functions ##########################################################
+########################################################################
+
+# function that reads main.py as of a revision of the git checkout this
+# benchmark is in
+# @param revision   - the git revision to read main.py from
+# @returns the source of main.py, or None if git cannot give it
+def readBaseline(revision=BASELINE_REVISION):
+    baseline = revision+':'+BASELINE_FILE
+    try:
+        return subprocess.run(
+            ['git', 'show', baseline], 
+            cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as error:
+        print(NO_BASELINE.format(baseline, str(error).strip()))
+        return None
+
+# function that loads the functions, classes and constants of an older 
+# main.py without running its program flow (which rips a disc when the 
+# file is imported)
+# @param source - the source of main.py
+# @param path   - path to main.py, for error messages
+# @returns dict of the names defined in main.py
+def loadParser(source, path=BASELINE_FILE):
+    tree = ast.parse(source)
+    tree.body = [
+        node for node in tree.body if isinstance(node, (
+            ast.Import,
+            ast.ImportFrom,
+            ast.FunctionDef,
+            ast.ClassDef,
+            ast.Assign
+        ))
+    ]
+    names = dict()
+    exec(compile(tree, path, 'exec'), names)
+    return names
+
+# function that builds a parse function for the given main.py, which
+# parses both CDDB and CD-TEXT from cd-info's full output
+# @param names  - dict of the names defined in main.py
+# @returns function that takes cd-info's output
+def getParse(names):
+    if 'parseCDInfo' in names:
+        def parse(text):
+            cd_info = names['parseCDInfo'](text)
+            return (names['parseCDDB'](cd_info), names['parseCDTEXT'](cd_info))
+    else:
+        # older parser, which works on the split up report text
+        def parse(text):
+            report = text.partition(names['STDOUT_CD_INFO_CDDB_START'])[2]
+            cddb_text, sep, cd_text = report.partition('\n\n')
+            return (names['parseCDDB'](cddb_text), names['parseCDTEXT'](cd_text))
+    return parse
+
+# function that builds a cd-info report with the given number of tracks
+# in the same layout as cd-info-sample-output
+# @param track_count    - number of tracks on the disc
+# @returns the report text
+def makeReport(track_count):
+    with open(SAMPLE_OUTPUT) as sample:
+        header = sample.read().partition('Disc mode is listed as')[0]
+
+    lines = [
+        header+'Disc mode is listed as: CD-DA',
+        'CD-ROM Track List (1 - {:d})'.format(track_count),
+        '  #: MSF       LSN    Type   Green? Copy? Channels Premphasis?'
+    ]
+    for track in range(1, track_count+1):
+        lines.append('{:3d}: 00:00:00  {:06d} audio  false  no    2        no'
+            .format(track, track*3000))
+    lines.append('170: 00:00:00  {:06d} leadout (1 MB raw, 1 MB formatted)'
+        .format((track_count+1)*3000))
+    lines.append('Media Catalog Number (MCN): 0000000000000')
+    for track in range(1, track_count+1):
+        lines.append('TRACK {:2d} ISRC: XXXXX{:07d}'.format(track, track))
+    lines += [
+        '__________________________________',
+        'CD Analysis Report',
+        'Audio CD, CDDB disc ID is 00000000',
+        'cd-info: Found 1 matches in CDDB',
+        'Disc ID: 00000000',
+        "Artist: 'Synthetic Artist'",
+        "Title: 'Synthetic Album'",
+        'Number of tracks: {:d}'.format(track_count)
+    ]
+    for track in range(1, track_count+1):
+        lines += [
+            '  Track {:2d}'.format(track),
+            '    number: {:d}'.format(track),
+            '    frame offset: {:d}'.format(track*3000+150),
+            '    length: 40 seconds',
+            "    artist: 'Synthetic Artist'",
+            "    title: 'Synthetic Track {:d}'".format(track),
+            "    extended data: 'NULL'"
+        ]
+    lines += [
+        '',
+        "Language 0 'English':",
+        'CD-TEXT for Disc:',
+        '\tTITLE: SYNTHETIC ALBUM',
+        '\tPERFORMER: SYNTHETIC ARTIST'
+    ]
+    for track in range(1, track_count+1):
+        lines += [
+            'CD-TEXT for Track {:2d}:'.format(track),
+            '\tTITLE: SYNTHETIC TRACK {:d}'.format(track)
+        ]
+    return '\n'.join(lines)+'\n'
+
+# function that times the given parse function on a report
+# @param parse  - function that takes cd-info's output
+# @param text   - cd-info's output
+# @returns the best time of a single parse in microseconds
+def timeParse(parse, text):
+    timer = timeit.Timer(lambda: parse(text))
+    number = timer.autorange()[0]
+    return min(timer.repeat(REPEAT, number))/number*1000000
+
+### benchmark flow  ====================================================
+
+arg_parser = argparse.ArgumentParser(
+    description='benchmark the cd-info parser against a baseline')
+arg_parser.add_argument('baseline', nargs='?', 
+    help='path of the baseline main.py, instead of reading it from git')
+arg_parser.add_argument('--revision', default=BASELINE_REVISION, 
+    help='git revision to read the baseline main.py from')
+args = arg_parser.parse_args()
+
+parsers = [('current', getParse(vars(cd_rip_conv_tag.core)))]
+if args.baseline is not None:
+    with open(args.baseline) as main_file:
+        parsers.append(('baseline', 
+            getParse(loadParser(main_file.read(), args.baseline))))
+else:
+    baseline = readBaseline(args.revision)
+    if baseline is not None:
+        parsers.append(('baseline', getParse(loadParser(baseline))))
+
+with open(SAMPLE_OUTPUT) as sample:
+    reports = [
+        ('sample (11 tracks)', sample.read()),
+        ('synthetic ({:d} tracks)'.format(SYNTHETIC_TRACKS),
+            makeReport(SYNTHETIC_TRACKS))
+    ]
+
+for report_name, text in reports:
+    for parser_name, parse in parsers:
+        print(RESULT.format(parser_name, report_name, timeParse(parse, text)))
@@ -0,0 +1,38 @@
+"""
+checks for a cd in the drive, rips it, converts the files to flac and
+writes the tags (if possible).
+
+Importing this package does not run anything. The cd-info parsers can
+be used on their own:
+
+    from cd_rip_conv_tag import parseCDInfo, parseCDDB
+    tags = parseCDDB(parseCDInfo(cd_info_output))
+
+and main() runs the whole program, like the cd-rip-conv-tag command.
+"""
+
+from cd_rip_conv_tag.core import (
+    AlbumData,
+    CDInfoReport,
+    OutputProfile,
+    RipJournal,
+    RipProgress,
+    TableOfContents,
+    TOCTrack,
+    Track,
+    TrackChecksum,
+    addRipProgressCallback,
+    albumDataFromDict,
+    albumDataFromJSON,
+    generateTags,
+    getProgramInfo,
+    main,
+    parseCDDB,
+    parseCDInfo,
+    parseCDTEXT,
+    parseTOC,
+    readCDInfo,
+    removeRipProgressCallback,
+    ripDisc,
+    ripDrives
+)
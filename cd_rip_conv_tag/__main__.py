@@ -0,0 +1,4 @@
+# lets the package run with: python -m cd_rip_conv_tag
+from cd_rip_conv_tag.core import main
+
+main()
@@ -0,0 +1,4868 @@
+"""
+@author Andre Allan Ponce
+@email andreponce@null.net
+
+python script that checks for a cd in the drive, rips it, converts
+the files to flac, writes the tags (if possible), and then deletes 
+the temporary wav files.
+
+The tags written will be basic (album title, album artist, track title,
+track artist)
+
+Programs called:
+    cd-info
+    cdparanoia
+    ffmpeg
+
+This script will also check if those programs exist before executing 
+"""
+
+import array
+import concurrent.futures
+import contextlib
+import dbm
+import errno
+import functools
+import importlib
+import io
+import json
+import mmap
+import os
+import queue
+import selectors
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from enum import IntEnum
+from enum import Enum
+
+# optional modules, imported the first time they are needed (see 
+# importOptional()) so importing this module does not load them:
+#   soundfile   - in-process flac encoder. when this is missing, ffmpeg 
+#                 is used
+#   numpy       - works out the AccurateRip checksums much faster
+OPTIONAL_MODULES = dict() # name: module, or None if it is not installed
+
+### General constants   ================================================
+
+EXITING = 'Exiting...'
+EMAIL = 'andreponce@null.net'
+PARSE_OUTPUT_FAILED = '{0:s} did not produce the required output. \
+    \nPlease send an email to '+EMAIL+' with the version number of \
+    this program and the name and version number of {0:s}.'
+NEWLINE = '\n'
+TEST_DIR = 'wav'
+NUMBER_FORMAT = '{:02d}'
+
+# cd audio format (16-bit signed little endian stereo pcm)
+CD_SAMPLE_RATE = 44100
+CD_CHANNELS = 2
+CD_BYTES_PER_FRAME = 4
+CD_BYTES_PER_SECTOR = 2352
+CD_SECTORS_PER_SECOND = 75
+CD_LEAD_IN_SECTORS = 150 # LSN 0 is 2 seconds into the disc
+
+# sectors between the last audio track and a data track in a second
+# session (enhanced CDs), which belong to neither track
+CD_SESSION_GAP_SECTORS = 11400
+WAV_HEADER_SIZE = 44
+PAUSE_SCREEN = "<Press Enter to continue>"
+
+### Formatting Constants    ============================================
+
+# initalize user prompt formatting
+HEADER_BAR = '----------------------------'
+CLEAR_SCREEN = "\033[H\033[J"
+
+##  program flow control constants  ====================================
+
+SKIP_PROGRAM_TEST = False
+SKIP_CD_INFO = False
+SKIP_CD_PARA = False
+SKIP_FFMPEG = False
+SKIP_MOVE = False
+
+# when true, cdparanoia writes raw pcm to stdout which is piped straight
+# into the encoder, so no wav files are written at all. 
+# Takes priority over PIPELINE_RIP_CONVERT
+STREAM_RIP_CONVERT = False
+
+# when true (and soundfile is installed), wav files are converted to flac
+# inside this process instead of starting an ffmpeg process per track
+USE_NATIVE_FLAC = True
+
+# when true, each track's ISRC and the disc's media catalog number (read
+# from cd-info's output, so the disc is not queried again) are written 
+# as ISRC and BARCODE tags. soundfile can only write its fixed set of 
+# tags (title, artist, album, ...), so tracks that have these are 
+# encoded with ffmpeg even when USE_NATIVE_FLAC is on. Off by default so
+# it does not turn USE_NATIVE_FLAC off for most discs
+WRITE_DISC_CODE_TAGS = False
+
+# when true, each track is ripped on its own and handed to ffmpeg as soon
+# as cdparanoia finishes it, instead of ripping the whole disc first
+PIPELINE_RIP_CONVERT = True
+
+# when true, the tags chosen for a disc are saved in TAG_CACHE_DIR and 
+# used without showing the tag menu the next time the disc is ripped
+USE_TAG_CACHE = True
+
+# when true, the cached tags for this disc are thrown away and the tag
+# menu is shown again (the new choice is cached)
+REFRESH_TAG_CACHE = False
+
+# when true, nothing is asked of the user: tags are picked by policy 
+# (CDDB, then CD-TEXT, then placeholder tags), and after each disc is 
+# ripped it is ejected and the next disc put in is ripped, until Ctrl+C
+BATCH_MODE = False
+
+# device paths of the drives to rip from (like '/dev/sr0'). Every drive 
+# gets its own rip pipeline and working directory, and they share one 
+# pool of encoders. Empty means the default drive only
+DRIVES = []
+
+# the directory the album folders are made in
+OUTPUT_DIR = '.'
+
+# where to write the time, bytes and speed of every stage (program check,
+# cd-info, tag parsing, each track's rip and encode, move) as json lines.
+# '-' writes them to stdout, None turns them off
+METRICS_FILE = None
+########################################################################
+### CLASSES ############################################################
+########################################################################
+
+## struct style object to hold one track of an album. Slotted, since 
+## catalogues hold a lot of them
+class Track:
+    __slots__ = (
+        'number', 'title', 'artist', 'isrc', 'start_lsn', 'length')
+
+    # init
+    # @param number     - track number (position in the album, from 1)
+    # @param title      - track title
+    # @param artist     - track artist
+    # @param isrc       - the track's ISRC, or None if unknown
+    # @param start_lsn  - LSN of the track's first sector, or None
+    # @param length     - length of the track in sectors, or None
+    def __init__(self, number, title, artist, isrc=None, start_lsn=None,
+            length=None):
+        self.number = number
+        self.title = title
+        self.artist = artist
+        self.isrc = isrc
+        self.start_lsn = start_lsn
+        self.length = length
+
+    # converts this track to a dict that can be written as json
+    # @returns dict of this track's data
+    def toDict(self):
+        return {
+            'number': self.number,
+            'title': self.title,
+            'artist': self.artist,
+            'isrc': self.isrc,
+            'start_lsn': self.start_lsn,
+            'length': self.length
+        }
+
+## struct style object to hold album data. Slotted, since catalogues 
+## hold a lot of them
+class AlbumData:
+    __slots__ = (
+        'album_artist', 
+        'album_title', 
+        'mcn',
+        'tracks', 
+        'has_multiple_artists', 
+        'tag_source')
+
+    # init
+    def __init__(self, _tag_source):
+        self.album_artist = "Unknown"
+        self.album_title = "Untitled"
+
+        # media catalog number (the disc's UPC/EAN barcode), or None
+        self.mcn = None
+
+        # Track of every track, in order
+        self.tracks = list()
+
+        # boolean to say if this album has multiple artists or not
+        # (i.e: different tracks have different artists (various artists)
+        self.has_multiple_artists = False
+
+        # the source these tags were retrieved from 
+        self.tag_source = _tag_source
+
+    # number of tracks in this album
+    @property
+    def number_of_tracks(self):
+        return len(self.tracks)
+
+    # converts this album to a string variant
+    def __str__(self):
+        lines = [
+            "Album title: " + self.album_title,
+            "Album artist: " + self.album_artist,
+            "Number of tracks: " + str(len(self.tracks))
+        ]
+        lines.extend(
+            "Track " + str(track.number) + ": " + track.artist + " - " + 
+            track.title
+            for track in self.tracks
+        )
+        lines.append('')
+        return NEWLINE.join(lines)
+
+    # function to add a track to the end of this album
+    # @param title  - track title
+    # @param artist - track artist
+    # @returns the new Track
+    def addTrack(self, title, artist):
+        track = Track(len(self.tracks)+1, title, artist)
+        self.tracks.append(track)
+        return track
+
+    # function to check if the tracks of this album are not all by the 
+    # same artist
+    # @returns true if there is more than one track artist
+    def hasTrackArtists(self):
+        return len(self.tracks) > 0 and not isEveryElementTheSame(
+            [track.artist for track in self.tracks])
+
+    # converts this album to a dict that can be written as json
+    # @returns dict of this album's data
+    def toDict(self):
+        return {
+            'album_artist': self.album_artist,
+            'album_title': self.album_title,
+            'mcn': self.mcn,
+            'tracks': [track.toDict() for track in self.tracks],
+            'has_multiple_artists': self.has_multiple_artists,
+            'tag_source': self.tag_source
+        }
+
+    # converts this album to json, see albumDataFromJSON()
+    # @returns json string of this album's data
+    def toJSON(self):
+        return json.dumps(self.toDict())
+
+    # function to print the data stored in this class in a nice format
+    def printData(self):
+        # print album
+        print(str(self))
+
+
+    # function to clear data
+    def clear(self):
+        self.album_artist = "Unknown"
+        self.album_title = "Untitled"
+        self.mcn = None
+        self.tracks = list()
+        self.has_multiple_artists = False
+
+## struct style object to hold the sections of cd-info's output
+class CDInfoReport:
+
+    # init
+    def __init__(self):
+        # lines before the track list (cd-info version, drive, etc.)
+        self.header = list()
+
+        # track list
+        self.first_track = None
+        self.last_track = None
+        self.track_list = list() # tokens of each track line
+        self.leadout_lsn = None
+
+        # media catalog number and the ISRC of each track number
+        self.mcn = None
+        self.isrcs = dict()
+
+        # CD Analysis Report
+        self.has_analysis_report = False
+        self.cddb_matches = 0
+        self.cddb = dict() # album level keys
+        self.cddb_tracks = list() # dict of keys for each track
+
+        # CD-TEXT (only the first language is kept)
+        self.cd_text_disc = None # dict of keys for the disc
+        self.cd_text_tracks = list() # dict of keys for each track
+
+## struct style object to hold a single track from the table of contents
+class TOCTrack:
+
+    # init
+    # @param number         - track number
+    # @param start_lsn      - LSN of the first sector of the track
+    # @param track_type     - 'audio' or 'data'
+    # @param pre_emphasis   - true if the track has pre-emphasis
+    def __init__(self, number, start_lsn, track_type, pre_emphasis):
+        self.number = number
+        self.start_lsn = start_lsn
+        self.length = 0 # in sectors, set once the next track is known
+        self.track_type = track_type
+        self.pre_emphasis = pre_emphasis
+
+    # function to check if this track is an audio track
+    # @returns true if audio, false if data
+    def isAudio(self):
+        return self.track_type == TOC_TYPE_AUDIO
+
+    # function to get the size of this track once ripped to pcm
+    # @returns size in bytes
+    def getSize(self):
+        return self.length*CD_BYTES_PER_SECTOR
+
+## struct style object to hold the table of contents of a disc
+class TableOfContents:
+
+    # init
+    def __init__(self):
+        self.tracks = list() # TOCTrack of every track, in order
+        self.leadout_lsn = 0
+
+    # function to get only the audio tracks of this disc
+    # @returns list of TOCTrack
+    def getAudioTracks(self):
+        return [track for track in self.tracks if track.isAudio()]
+
+    # function to calculate the CDDB disc ID of this disc
+    # @returns the disc ID as 8 hex digits (like cd-info's 'Disc ID')
+    def getCDDBDiscId(self):
+        checksum = 0
+        for track in self.tracks:
+            seconds = (track.start_lsn+CD_LEAD_IN_SECTORS)//CD_SECTORS_PER_SECOND
+            while seconds > 0:
+                checksum += seconds % 10
+                seconds //= 10
+
+        length = (
+            (self.leadout_lsn+CD_LEAD_IN_SECTORS)//CD_SECTORS_PER_SECOND - 
+            (self.tracks[0].start_lsn+CD_LEAD_IN_SECTORS)//CD_SECTORS_PER_SECOND
+        )
+        return '{:08x}'.format(
+            (checksum % 0xff) << 24 | length << 8 | len(self.tracks))
+
+    # function to get the frame offset of every track, as freedb lists 
+    # them (counted from the start of the lead in)
+    # @returns list of frame offsets
+    def getFrameOffsets(self):
+        return [track.start_lsn+CD_LEAD_IN_SECTORS for track in self.tracks]
+
+    # function to calculate the AccurateRip ids of this disc, which are 
+    # made from the offsets of the audio tracks and the end of the last 
+    # one (so a data track after them is left out)
+    # @returns (number of audio tracks, id 1, id 2)
+    def getAccurateRipIds(self):
+        audio_tracks = self.getAudioTracks()
+        id_1 = 0
+        id_2 = 0
+        for track in audio_tracks:
+            id_1 += track.start_lsn
+            id_2 += max(track.start_lsn, 1)*track.number
+
+        end_lsn = audio_tracks[-1].start_lsn+audio_tracks[-1].length
+        id_1 += end_lsn
+        id_2 += max(end_lsn, 1)*(len(audio_tracks)+1)
+        return (
+            len(audio_tracks), 
+            id_1 & ACCURATERIP_MASK, 
+            id_2 & ACCURATERIP_MASK)
+
+    # function to get a track by its number
+    # @param number - the track number
+    # @returns the TOCTrack, or None if there is no such track
+    def getTrack(self, number):
+        for track in self.tracks:
+            if track.number == number:
+                return track
+        return None
+
+# class to hold what we know about an installed program
+class ProgramInfo:
+    # init
+    # @param path       - absolute path of the program
+    # @param mtime      - modification time of the program (ns)
+    # @param version    - first line of the program's version output
+    def __init__(self, path, mtime, version):
+        self.path = path
+        self.mtime = mtime
+        self.version = version
+
+        # what this build of the program can do, like 
+        # {'encoders': ['flac', 'libopus', ...]} for ffmpeg
+        self.capabilities = dict()
+
+    # converts this program info to a dict that can be written as json
+    # @returns dict of this program info
+    def toDict(self):
+        return {
+            'path': self.path,
+            'mtime': self.mtime,
+            'version': self.version,
+            'capabilities': dict(self.capabilities)
+        }
+
+## struct style object to hold how far a drive has got through a disc, 
+## from cdparanoia's progress messages
+class RipProgress:
+
+    # init
+    # @param device - the drive being ripped, or None for the default
+    # @param toc    - TableOfContents of the disc
+    def __init__(self, device, toc):
+        self.device = device
+
+        # whole disc, in sectors
+        self.disc_sectors = sum(
+            track.length for track in toc.getAudioTracks())
+        self.done_sectors = 0 # of the tracks already ripped
+
+        # the track being ripped
+        self.track = None
+        self.track_start_lsn = 0
+        self.track_sectors = 0
+        self.track_done_sectors = 0
+        self.start = None # time.monotonic() the track started
+        self.last_message = None # time.monotonic() of the last message
+        self.events = dict() # count of each problem (jitter, skip, ...)
+        self.stalled = False
+
+        # last track percentage printed by printRipProgress()
+        self.printed_percent = None
+
+        # tracks that stalled and need ripping again
+        self.stalled_tracks = list()
+
+        # TrackChecksum of each track number that was ripped
+        self.checksums = dict()
+
+    # function to start following a new track
+    # @param track  - TOCTrack of the track
+    def startTrack(self, track):
+        self.track = track.number
+        self.track_start_lsn = track.start_lsn
+        self.track_sectors = track.length
+        self.track_done_sectors = 0
+        self.start = time.monotonic()
+        self.last_message = self.start
+        self.events = dict()
+        self.stalled = False
+        self.printed_percent = None
+
+    # function to add a track that does not need ripping (it was ripped
+    # by an earlier run) to the ripped part of the disc
+    # @param track  - TOCTrack of the track
+    def skipTrack(self, track):
+        self.done_sectors += track.length
+
+    # function to add the current track to the ripped part of the disc
+    def finishTrack(self):
+        self.done_sectors += self.track_sectors
+        self.track_done_sectors = self.track_sectors
+
+    # function to get how much of the current track is ripped
+    # @returns fraction from 0 to 1
+    def getTrackFraction(self):
+        if self.track_sectors == 0:
+            return 0.0
+        return self.track_done_sectors/self.track_sectors
+
+    # function to get how much of the disc is ripped
+    # @returns fraction from 0 to 1
+    def getDiscFraction(self):
+        if self.disc_sectors == 0:
+            return 0.0
+        return min(
+            (self.done_sectors+self.track_done_sectors)/self.disc_sectors,
+            1.0)
+
+    # function to get the read speed of the current track
+    # @returns speed as a multiple of realtime (like a drive's 8x)
+    def getSpeed(self):
+        seconds = time.monotonic()-self.start
+        if seconds <= 0:
+            return 0.0
+        return self.track_done_sectors/CD_SECTORS_PER_SECOND/seconds
+
+    # function to guess how long the rest of the disc will take at the 
+    # current track's speed
+    # @returns seconds, or None if nothing has been read yet
+    def getETA(self):
+        speed = self.getSpeed()
+        if speed <= 0:
+            return None
+        remaining = (
+            self.disc_sectors-self.done_sectors-self.track_done_sectors)
+        return max(remaining, 0)/CD_SECTORS_PER_SECOND/speed
+
+    # function to get how long cdparanoia has been quiet
+    # @returns seconds since the last progress message
+    def getIdleSeconds(self):
+        return time.monotonic()-self.last_message
+
+## struct style object to describe a format tracks are encoded to
+class OutputProfile:
+
+    # init
+    # @param name           - name of the format, like 'opus'
+    # @param extension      - file extension of the tracks, like '.opus'
+    # @param codec_flags    - ffmpeg flags that pick the codec and its 
+    #   settings, like ['-c:a', 'libopus', '-b:a', '160k']
+    # @param ffmpeg_format  - ffmpeg output format (-f) of the tracks
+    # @param dir_name       - folder in the output directory the album 
+    #   folders of this format go in, or None for the output directory
+    def __init__(self, name, extension, codec_flags, ffmpeg_format, 
+            dir_name=None):
+        self.name = name
+        self.extension = extension
+        self.codec_flags = codec_flags
+        self.ffmpeg_format = ffmpeg_format
+        self.dir_name = dir_name
+
+## object to work out a track's checksums from its pcm a block at a time,
+## as it is ripped: a CRC32 of the whole track and its AccurateRip v1 
+## and v2 checksums
+class TrackChecksum:
+
+    # init
+    # @param track_number   - the track's number
+    # @param sample_count   - length of the track in samples (stereo 
+    #   frames), from the TOC
+    # @param is_first       - True if this is the first audio track
+    # @param is_last        - True if this is the last audio track
+    def __init__(self, track_number, sample_count, is_first, is_last):
+        self.track_number = track_number
+        self.crc32 = 0
+        self.accuraterip_v1 = 0
+        self.accuraterip_v2 = 0
+
+        # AccurateRip leaves out the first 5 sectors of the disc and the
+        # last 5, which not every drive can read. Samples are counted 
+        # from 1, and the first track starts at sample 5*588 (the 2939 
+        # samples before it are left out)
+        self.check_start = 1
+        if is_first:
+            self.check_start = ACCURATERIP_SKIP_SAMPLES
+        self.check_end = sample_count
+        if is_last:
+            self.check_end -= ACCURATERIP_SKIP_SAMPLES
+
+        self.samples = 0 # samples seen so far
+        self.partial = b'' # end of the last block that was not a sample
+
+    # function to add the next block of the track's pcm to the checksums
+    # @param block  - bytes of 16-bit little endian stereo pcm, of any 
+    #   length
+    def update(self, block):
+        self.crc32 = zlib.crc32(block, self.crc32)
+
+        block = self.partial+block
+        usable = len(block)-len(block) % CD_BYTES_PER_FRAME
+        self.partial = block[usable:]
+        first = self.samples+1
+        self.samples += usable//CD_BYTES_PER_FRAME
+
+        low = max(first, self.check_start)
+        high = min(self.samples, self.check_end)
+        if low > high:
+            return
+        low_sum, high_sum = sumAccurateRip(
+            block[(low-first)*CD_BYTES_PER_FRAME:
+                (high-first+1)*CD_BYTES_PER_FRAME], 
+            low)
+        self.accuraterip_v1 = (self.accuraterip_v1+low_sum) & \
+            ACCURATERIP_MASK
+        self.accuraterip_v2 = (self.accuraterip_v2+low_sum+high_sum) & \
+            ACCURATERIP_MASK
+
+    # converts these checksums to a dict that can be written as json
+    # @returns dict of the checksums as 8 hex digits
+    def toDict(self):
+        return {
+            'crc32': CHECKSUM_FORMAT.format(self.crc32),
+            'accuraterip_v1': CHECKSUM_FORMAT.format(self.accuraterip_v1),
+            'accuraterip_v2': CHECKSUM_FORMAT.format(self.accuraterip_v2)
+        }
+
+## object to keep track of how far a disc's rip got, so a run that 
+## fails part way can be picked up from where it stopped
+class RipJournal:
+
+    # init
+    # @param path       - path of the journal file
+    # @param disc_id    - AccurateRip ID of the disc
+    # @param wav_dir    - the directory the disc's wavs are kept in
+    def __init__(self, path, disc_id, wav_dir):
+        self.path = path
+        self.disc_id = disc_id
+        self.wav_dir = wav_dir
+
+        # dict of the stages each track number got through, and what
+        # they left behind (see JOB_STAGE_*)
+        self.tracks = dict()
+
+        # stage each track was found at when the rip was resumed
+        self.resumed = dict()
+
+        # encoders mark tracks from several threads
+        self.lock = threading.Lock()
+
+    # function to get what a stage of a track left behind
+    # @param track_number   - the track's number
+    # @param stage          - one of JOB_STAGE_*
+    # @returns what the stage recorded, or None if it did not finish
+    def getStage(self, track_number, stage):
+        return self.tracks.get(track_number, dict()).get(stage)
+
+    # function to record that a stage of a track finished, and save the 
+    # journal
+    # @param track_number   - the track's number
+    # @param stage          - one of JOB_STAGE_*
+    # @param value          - what the stage left behind, as json
+    def markStage(self, track_number, stage, value):
+        with self.lock:
+            self.tracks.setdefault(track_number, dict())[stage] = value
+            self.save()
+
+    # function to write the journal to its file, in one step so a crash
+    # never leaves half a journal. Must be called holding the lock
+    def save(self):
+        journal_dir = os.path.dirname(self.path)
+        os.makedirs(journal_dir, exist_ok=True)
+        journal_file = tempfile.NamedTemporaryFile(
+            'w', 
+            dir=journal_dir, 
+            suffix='.tmp', 
+            delete=False)
+        try:
+            with journal_file:
+                json.dump(self.toDict(), journal_file)
+            os.replace(journal_file.name, self.path)
+        finally:
+            # only left when the journal could not be written
+            if os.path.exists(journal_file.name):
+                os.remove(journal_file.name)
+
+    # converts this journal to a dict that can be written as json
+    # @returns dict of the journal
+    def toDict(self):
+        return {
+            'disc_id': self.disc_id,
+            'wav_dir': self.wav_dir,
+            'tracks': {
+                str(track_number): stages 
+                for track_number, stages in self.tracks.items()
+            }
+        }
+
+# enum for menu options
+class TagMainMenuOption(IntEnum):
+    USE = 1
+    SWITCH = 2
+    CUSTOM = 3
+    OPTION = 4
+    QUIT = 0
+    INVALID = -1
+
+# enum for Tag display state
+class TagDisplayState(Enum):
+    CDDB = 1
+    CDTEXT = 2
+    CUSTOM = 3
+
+########################################################################
+### stage metrics ######################################################
+########################################################################
+
+### metrics constants   ================================================
+
+METRICS_STDOUT = '-'
+METRICS_BYTES_PER_MB = 1000*1000
+CD_BYTES_PER_AUDIO_SECOND = CD_SAMPLE_RATE*CD_BYTES_PER_FRAME
+
+# stage names
+STAGE_PROGRAM_CHECK = 'program_check'
+STAGE_CD_INFO = 'cd_info'
+STAGE_TAG_PARSE = 'tag_parse'
+STAGE_RIP = 'rip'
+STAGE_ENCODE = 'encode'
+STAGE_RIP_ENCODE = 'rip_encode' # streamed rips do both at once
+STAGE_MOVE = 'move'
+STAGE_VERIFY = 'verify'
+
+# held while writing a metric, so lines from different threads do not mix
+METRICS_LOCK = threading.Lock()
+
+### metrics functions   ================================================
+
+# function to write a stage's metrics to METRICS_FILE as a json line, 
+# like:
+#   {"time": 1700000000.0, "stage": "rip", "seconds": 12.5, "ok": true,
+#    "device": "/dev/sr0", "track": 3, "bytes": 43218000, 
+#    "mb_per_s": 3.46, "audio_seconds": 245.0, "realtime": 19.6}
+# Does nothing when METRICS_FILE is None.
+# @param stage      - name of the stage (one of the STAGE_ constants)
+# @param start      - time.monotonic() when the stage started
+# @param byte_count - number of bytes the stage processed, or None
+# @param pcm        - True if byte_count is cd audio, so the speed can 
+#   also be given as a multiple of realtime
+# @param device     - the drive the stage used, or None
+# @param track      - the track the stage worked on, or None
+# @param ok         - False if the stage failed
+# @param details    - dict of more values to add to the line, or None
+def recordMetric(stage, start, byte_count=None, pcm=False, device=None, 
+        track=None, ok=True, details=None):
+    if METRICS_FILE is None:
+        return
+
+    seconds = time.monotonic()-start
+    metric = {
+        'time': round(time.time(), 3),
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'ok': ok
+    }
+    if device is not None:
+        metric['device'] = device
+    if track is not None:
+        metric['track'] = track
+    if byte_count is not None:
+        metric['bytes'] = byte_count
+        if seconds > 0:
+            metric['mb_per_s'] = round(
+                byte_count/METRICS_BYTES_PER_MB/seconds, 3)
+        if pcm:
+            metric['audio_seconds'] = round(
+                byte_count/CD_BYTES_PER_AUDIO_SECOND, 3)
+            if seconds > 0:
+                metric['realtime'] = round(
+                    metric['audio_seconds']/seconds, 3)
+    if details is not None:
+        metric.update(details)
+
+    line = json.dumps(metric)
+    with METRICS_LOCK:
+        if METRICS_FILE == METRICS_STDOUT:
+            print(line, flush=True)
+        else:
+            with open(METRICS_FILE, 'a') as metrics_file:
+                metrics_file.write(line+NEWLINE)
+
+########################################################################
+### rip checksums ######################################################
+########################################################################
+
+### checksum constants  ================================================
+
+# work out a CRC32 and the AccurateRip checksums of every track as it is
+# ripped, and write them to CHECKSUM_FILE in the album folder. Needs a 
+# TOC. The whole-disc rip used without one is not checked
+VERIFY_CHECKSUMS = True
+CHECKSUM_FILE = 'checksums.json'
+CHECKSUM_FORMAT = '{:08x}'
+CHECKSUM_PIPE_BLOCK_SIZE = 256*1024 # pcm copied to ffmpeg at a time
+
+# directory of AccurateRip dBAR-*.bin files to compare the checksums 
+# with, either all in one folder or laid out in a/b/c/ folders like 
+# accuraterip.com. None to not compare them
+ACCURATERIP_DB = None
+
+# AccurateRip only checks what every drive can read, so matches also 
+# need cdparanoia told the drive's read offset in samples (see 
+# DRIVE_READ_OFFSET)
+ACCURATERIP_SKIP_SAMPLES = 5*CD_BYTES_PER_SECTOR//CD_BYTES_PER_FRAME
+ACCURATERIP_MASK = 0xffffffff
+ACCURATERIP_WORD = 'I' # array type of one 32-bit sample
+ACCURATERIP_ID = '{:03d}-{:08x}-{:08x}-{:s}'
+ACCURATERIP_FILE = 'dBAR-{:s}.bin'
+
+# a dBAR file is a list of responses, each a header followed by an entry
+# for every track
+ACCURATERIP_HEADER_FORMAT = '<BIII' # tracks, id 1, id 2, cddb id
+ACCURATERIP_HEADER_SIZE = struct.calcsize(ACCURATERIP_HEADER_FORMAT)
+ACCURATERIP_ENTRY_FORMAT = '<BII' # confidence, checksum, frame 450 crc
+ACCURATERIP_ENTRY_SIZE = struct.calcsize(ACCURATERIP_ENTRY_FORMAT)
+
+ACCURATERIP_NOT_FOUND = 'AccurateRip: {:s} is not in the database'
+ACCURATERIP_MATCH = 'AccurateRip: track {:02d} matches (confidence {:d})'
+ACCURATERIP_NO_MATCH = 'AccurateRip: track {:02d} does NOT match'
+
+### checksum functions  ================================================
+
+# function to compare the checksums of a disc's tracks with the 
+# AccurateRip database in ACCURATERIP_DB
+# @param toc        - TableOfContents of the disc
+# @param checksums  - dict of TrackChecksum for each track number
+# @param db_dir     - the database directory, or None for ACCURATERIP_DB
+# @returns dict of the AccurateRip confidence of each checked track 
+#   number (0 if it did not match), empty if the disc is not in the 
+#   database
+def compareAccurateRip(toc, checksums, db_dir=None):
+    db_path = findAccurateRipFile(toc, db_dir)
+    if db_path is None:
+        print(ACCURATERIP_NOT_FOUND.format(getAccurateRipId(toc)))
+        return dict()
+    responses = readAccurateRipFile(db_path, toc)
+
+    # entries are in the order of the audio tracks
+    confidences = dict()
+    for position, track in enumerate(toc.getAudioTracks()):
+        checksum = checksums.get(track.number)
+        if checksum is None:
+            continue
+
+        confidence = 0
+        for entries in responses:
+            if position >= len(entries):
+                continue
+            entry_confidence, entry_checksum = entries[position]
+            if entry_checksum in (
+                    checksum.accuraterip_v1, checksum.accuraterip_v2):
+                confidence = max(confidence, entry_confidence)
+        confidences[track.number] = confidence
+
+        if confidence > 0:
+            print(ACCURATERIP_MATCH.format(track.number, confidence))
+        else:
+            print(ACCURATERIP_NO_MATCH.format(track.number))
+    return confidences
+
+# function to find a disc's dBAR file in the AccurateRip database
+# @param toc    - TableOfContents of the disc
+# @param db_dir - the database directory, or None for ACCURATERIP_DB
+# @returns path of the file, or None if the disc is not in the database
+#   (or there is no database)
+def findAccurateRipFile(toc, db_dir=None):
+    if db_dir is None:
+        db_dir = ACCURATERIP_DB
+    if db_dir is None:
+        return None
+    file_name = ACCURATERIP_FILE.format(getAccurateRipId(toc))
+    id_1 = toc.getAccurateRipIds()[1]
+    for db_path in (
+            os.path.join(db_dir, file_name),
+            os.path.join(
+                db_dir, 
+                '{:x}'.format(id_1 & 0xf), 
+                '{:x}'.format(id_1 >> 4 & 0xf),
+                '{:x}'.format(id_1 >> 8 & 0xf),
+                file_name)):
+        if os.path.isfile(db_path):
+            return db_path
+    return None
+
+# function to get the AccurateRip id of a disc, like 
+#   011-0015c6a9-00b2e5e1-8b0a6b0b
+# @param toc    - TableOfContents of the disc
+# @returns the id
+def getAccurateRipId(toc):
+    track_count, id_1, id_2 = toc.getAccurateRipIds()
+    return ACCURATERIP_ID.format(
+        track_count, id_1, id_2, toc.getCDDBDiscId())
+
+# function to get a track's checksums to add to its rip's metrics
+# @param checksum   - TrackChecksum of the track, or None
+# @param ok         - True if the track was ripped
+# @returns dict of the checksums, or None if there are none
+def getChecksumDetails(checksum, ok=True):
+    if checksum is None or not ok:
+        return None
+    return checksum.toDict()
+
+# function to keep the checksums of a track that was ripped for good, so
+# they can be written next to the flacs
+# @param progress   - RipProgress of the drive, or None
+# @param checksum   - TrackChecksum of the track, or None
+# @param ok         - True if the track was ripped and will not be ripped
+#   again
+def keepTrackChecksum(progress, checksum, ok):
+    if ok and progress is not None and checksum is not None:
+        progress.checksums[checksum.track_number] = checksum
+
+# function to make the TrackChecksum for ripping a track
+# @param track_number   - the track to rip
+# @param toc            - TableOfContents of the disc, or None
+# @returns TrackChecksum, or None if VERIFY_CHECKSUMS is off or the track
+#   is not in the TOC
+def makeTrackChecksum(track_number, toc=None):
+    if not VERIFY_CHECKSUMS or toc is None:
+        return None
+    track = toc.getTrack(track_number)
+    if track is None or not track.isAudio():
+        return None
+
+    audio_tracks = toc.getAudioTracks()
+    return TrackChecksum(
+        track_number,
+        track.length*CD_BYTES_PER_SECTOR//CD_BYTES_PER_FRAME,
+        track is audio_tracks[0],
+        track is audio_tracks[-1])
+
+# function to read the responses for a disc from a dBAR file. Responses
+# for other discs (with the same file name) are left out.
+# @param db_path    - path of the dBAR file
+# @param toc        - TableOfContents of the disc
+# @returns list of responses, each a list of (confidence, checksum) of 
+#   every track
+def readAccurateRipFile(db_path, toc):
+    track_count, id_1, id_2 = toc.getAccurateRipIds()
+    disc = (track_count, id_1, id_2, int(toc.getCDDBDiscId(), 16))
+    with open(db_path, 'rb') as db_file:
+        data = db_file.read()
+
+    responses = list()
+    offset = 0
+    while offset+ACCURATERIP_HEADER_SIZE <= len(data):
+        header = struct.unpack_from(ACCURATERIP_HEADER_FORMAT, data, offset)
+        offset += ACCURATERIP_HEADER_SIZE
+        end = offset+header[0]*ACCURATERIP_ENTRY_SIZE
+        if end > len(data):
+            break # cut short
+
+        entries = list()
+        while offset < end:
+            confidence, checksum, _ = struct.unpack_from(
+                ACCURATERIP_ENTRY_FORMAT, data, offset)
+            entries.append((confidence, checksum))
+            offset += ACCURATERIP_ENTRY_SIZE
+        if header == disc:
+            responses.append(entries)
+    return responses
+
+# function that copies a track's raw pcm from cdparanoia to the 
+# encoder, adding it to the track's checksums on the way. Stops early if
+# the encoder exits, its exit code tells why.
+# @param pcm_stream     - cdparanoia's stdout
+# @param encoder_stdin  - the encoder's stdin, closed once done
+# @param checksum       - TrackChecksum of the track
+def pipeTrackPCM(pcm_stream, encoder_stdin, checksum):
+    try:
+        while True:
+            block = pcm_stream.read(CHECKSUM_PIPE_BLOCK_SIZE)
+            if not block:
+                break
+            checksum.update(block)
+            encoder_stdin.write(block)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            encoder_stdin.close()
+        except BrokenPipeError:
+            pass
+
+# function to add up the products AccurateRip makes of each 32-bit 
+# sample and its position in the track. v1 is the sum of the products, 
+# v2 the sum of their low and high 32 bits, both cut to 32 bits
+# @param pcm        - bytes of whole 16-bit little endian stereo samples
+# @param multiplier - position of the first sample in the track, from 1
+# @returns (sum of the low 32 bits, sum of the high 32 bits)
+def sumAccurateRip(pcm, multiplier):
+    numpy = importOptional('numpy')
+    if numpy is not None:
+        words = numpy.frombuffer(pcm, dtype='<u4').astype(numpy.uint64)
+        products = words*numpy.arange(
+            multiplier, multiplier+len(words), dtype=numpy.uint64)
+        return (
+            int((products & numpy.uint64(ACCURATERIP_MASK)).sum()), 
+            int((products >> numpy.uint64(32)).sum()))
+
+    words = array.array(ACCURATERIP_WORD, pcm)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    low_sum = 0
+    high_sum = 0
+    for word in words:
+        product = word*multiplier
+        low_sum += product & ACCURATERIP_MASK
+        high_sum += product >> 32
+        multiplier += 1
+    return low_sum, high_sum
+
+# function to write the checksums of the tracks that made it into the 
+# album folder to CHECKSUM_FILE there, after comparing them with 
+# ACCURATERIP_DB if there is one. The file looks like:
+#   {"accuraterip_id": "011-0015c6a9-00b2e5e1-8b0a6b0b", "tracks": [
+#     {"track": 1, "file": "01_Artist - Title.flac", "crc32": "...",
+#      "accuraterip_v1": "...", "accuraterip_v2": "...", 
+#      "accuraterip_confidence": 12}, ...]}
+# @param album_dir  - the album folder
+# @param tags       - AlbumData class that holds the tags we wrote
+# @param toc        - TableOfContents of the disc
+# @param checksums  - dict of TrackChecksum for each track number
+# @param exit_codes - dict of the encoder's exit code for each track 
+#   number
+# @returns path of the checksum file, or None if there were no checksums
+def writeChecksums(album_dir, tags, toc, checksums, exit_codes):
+    checksums = {
+        track_number: checksum 
+        for track_number, checksum in checksums.items()
+        if exit_codes.get(track_number) == 0
+    }
+    if toc is None or not checksums:
+        return None
+
+    confidences = None
+    if ACCURATERIP_DB is not None:
+        start = time.monotonic()
+        confidences = compareAccurateRip(toc, checksums, ACCURATERIP_DB)
+        recordMetric(STAGE_VERIFY, start, details={
+            'tracks': len(checksums),
+            'accuraterip_matches': sum(
+                1 for confidence in confidences.values() if confidence > 0)
+        })
+
+    tracks = list()
+    for track_number, index in getTrackIndexes(tags, toc):
+        if track_number not in checksums:
+            continue
+        track = {
+            'track': track_number,
+            'file': getTrackFileName(tags, index)
+        }
+        track.update(checksums[track_number].toDict())
+        if confidences is not None:
+            track['accuraterip_confidence'] = confidences.get(track_number)
+        tracks.append(track)
+
+    checksum_path = os.path.join(album_dir, CHECKSUM_FILE)
+    with open(checksum_path, 'w') as checksum_file:
+        json.dump({
+            'accuraterip_id': getAccurateRipId(toc),
+            'tracks': tracks
+        }, checksum_file, indent=2)
+    return checksum_path
+
+########################################################################
+### archive index ######################################################
+########################################################################
+
+### archive index constants    =========================================
+
+# index of the tracks and discs already in the archive, kept as a dbm 
+# file so looking one up takes the same time however big the archive 
+# gets. Tracks are found by the checksums of their pcm (so VERIFY_CHECKSUMS
+# has to be on), discs by their AccurateRip ID. Off (None) by default, 
+# set it to a path like ~/.cache/cd-rip-conv-tag/archive to turn it on
+ARCHIVE_INDEX = None
+
+# when true (and ARCHIVE_INDEX is set), a disc whose every track is 
+# already in the archive, with the same tags and codec flags, is not 
+# ripped again and its album folder is used instead. Its tags are not 
+# asked for either, the ones it was archived with are used 
+# (REFRESH_TAG_CACHE asks for them again, and a disc given other tags 
+# is ripped, linking the tracks it can).
+SKIP_ARCHIVED_DISCS = False
+
+# the index is opened once and shared by every drive (dbm files cannot 
+# be opened twice for writing)
+ARCHIVE_INDEX_LOCK = threading.Lock()
+ARCHIVE_INDEX_HANDLES = dict() # index path: open dbm
+
+ARCHIVE_KEY_DISC = 'disc:{:s}' # AccurateRip ID
+ARCHIVE_KEY_TRACK = 'track:{:d}-{:08x}-{:08x}' # samples, crc32, v2
+ARCHIVE_KEY_ALBUM_DIR = 'album_dir'
+ARCHIVE_KEY_FILES = 'files'
+ARCHIVE_KEY_PATH = 'path'
+ARCHIVE_KEY_FLAGS = 'flags'
+ARCHIVE_KEY_TAGS = 'tags'
+ARCHIVE_LINK_TEMP = '.{:s}.link'
+ARCHIVE_DISC_SKIPPED = \
+    '\nSkipping disc {:s}, it is already archived in {:s}\n'
+ARCHIVE_INDEX_ERROR = 'WARNING: could not use the archive index ({:s})'
+
+### archive index functions    =========================================
+
+# function to find a disc whose every track is in the archive, for 
+# every one of OUTPUT_PROFILES, encoded with the same tags and codec 
+# flags it would be encoded with now (like linkArchivedTrack() checks 
+# for each track)
+# @param toc        - TableOfContents of the disc, or None
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns path of the disc's album folder, or None if it is not (all) 
+#   archived with these tags
+def findArchivedDisc(toc, tags, index_path=None):
+    entry = readArchivedDisc(toc, index_path)
+    if entry is None or tags is None \
+            or entry[ARCHIVE_KEY_TAGS]['album_artist'] != tags.album_artist:
+        return None
+
+    track_indexes = getTrackIndexes(tags, toc)
+    for profile in OUTPUT_PROFILES:
+        archived = entry[ARCHIVE_KEY_FILES].get(profile.name)
+        if not archived or len(archived) != len(track_indexes):
+            return None
+        for (track_number, index), track in zip(track_indexes, archived):
+            if track[ARCHIVE_KEY_FLAGS] != \
+                    getFFmpegOutputFlags(tags, index, profile) \
+                    or not os.path.exists(track[ARCHIVE_KEY_PATH]):
+                return None
+    return entry[ARCHIVE_KEY_ALBUM_DIR]
+
+# function to get the tags a disc was archived with, if it would be 
+# skipped with them (see findArchivedDisc()), so it is not prompted for
+# tags that will not be used
+# @param toc        - TableOfContents of the disc, or None
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns the archived AlbumData, or None if the disc would be ripped
+def getArchivedDiscTags(toc, index_path=None):
+    entry = readArchivedDisc(toc, index_path)
+    if entry is None:
+        return None
+    try:
+        tags = albumDataFromDict(entry[ARCHIVE_KEY_TAGS])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if findArchivedDisc(toc, tags, index_path) is None:
+        return None
+    return tags
+
+# function to get the key of a track in the archive index, which is made
+# from its pcm, so the same track is found whatever disc it came from
+# @param checksum   - TrackChecksum of the whole track
+# @returns the key
+def getArchiveTrackKey(checksum):
+    return ARCHIVE_KEY_TRACK.format(
+        checksum.samples, checksum.crc32, checksum.accuraterip_v2)
+
+# function to hard link a file under a new name. The link is made under 
+# a temporary name first, so an existing file at dest_path is replaced 
+# in one step
+# @param src_path   - the file to link to
+# @param dest_path  - path of the new link
+# @returns True if the link was made
+def linkFile(src_path, dest_path):
+    dest_temp = os.path.join(
+        os.path.dirname(dest_path), 
+        ARCHIVE_LINK_TEMP.format(os.path.basename(dest_path)))
+    try:
+        if os.path.lexists(dest_temp):
+            os.remove(dest_temp)
+        os.link(src_path, dest_temp)
+        os.replace(dest_temp, dest_path)
+    except OSError:
+        if os.path.lexists(dest_temp):
+            os.remove(dest_temp)
+        return False
+    return True
+
+# function to hard link the archived copies of a track into the encoder's
+# directory under their temporary names, instead of encoding it again. 
+# Only copies encoded with the same tags and codec flags are used.
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param checksum   - TrackChecksum of the ripped track, or None
+# @param flac_dir   - the directory the encoder writes to
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns True if every one of OUTPUT_PROFILES was linked
+def linkArchivedTrack(tags, index, checksum, flac_dir='.', 
+        index_path=None):
+    if checksum is None:
+        return False
+    entry = readArchiveEntry(getArchiveTrackKey(checksum), index_path)
+    if entry is None:
+        return False
+
+    linked = list()
+    for profile in OUTPUT_PROFILES:
+        archived = entry.get(profile.name)
+        track_temp = os.path.join(
+            flac_dir, getTrackTempName(tags, index, profile))
+        if archived is None \
+                or archived[ARCHIVE_KEY_FLAGS] != \
+                    getFFmpegOutputFlags(tags, index, profile) \
+                or not linkFile(archived[ARCHIVE_KEY_PATH], track_temp):
+            for track_temp in linked:
+                os.remove(track_temp)
+            return False
+        linked.append(track_temp)
+    return True
+
+# function to open the archive index, or get it if it is already open.
+# Must be called holding ARCHIVE_INDEX_LOCK
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns the open dbm, or None if it cannot be opened
+def openArchiveIndex(index_path=None):
+    if index_path is None:
+        index_path = ARCHIVE_INDEX
+    if index_path not in ARCHIVE_INDEX_HANDLES:
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            ARCHIVE_INDEX_HANDLES[index_path] = dbm.open(index_path, 'c')
+        except (OSError, *dbm.error) as error:
+            print(ARCHIVE_INDEX_ERROR.format(str(error)))
+            return None
+    return ARCHIVE_INDEX_HANDLES[index_path]
+
+# function to read the entry of a disc in the archive index. Entries 
+# written before the tags were stored in them are ignored
+# @param toc        - TableOfContents of the disc, or None
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns dict of the entry, or None if there is none
+def readArchivedDisc(toc, index_path=None):
+    if toc is None:
+        return None
+    entry = readArchiveEntry(
+        ARCHIVE_KEY_DISC.format(getAccurateRipId(toc)), index_path)
+    if entry is None or ARCHIVE_KEY_TAGS not in entry:
+        return None
+    return entry
+
+# function to read an entry of the archive index. A damaged entry is 
+# treated like a missing one
+# @param key        - the entry's key
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+# @returns dict of the entry, or None if there is none
+def readArchiveEntry(key, index_path=None):
+    if index_path is None:
+        index_path = ARCHIVE_INDEX
+    if index_path is None:
+        return None
+    with ARCHIVE_INDEX_LOCK:
+        archive = openArchiveIndex(index_path)
+        if archive is None:
+            return None
+        try:
+            return json.loads(archive[key.encode()])
+        except (KeyError, ValueError):
+            return None
+
+# function to add the tracks of an album moved to its album folders to 
+# the archive index. A track whose pcm, tags and codec flags match an 
+# archived copy that still exists is replaced with a hard link to it 
+# (this is where streamed rips, which encode before the checksums are 
+# known, save their space). When every track was ripped, the disc is 
+# added too.
+# @param tags       - AlbumData class that holds the tags we wrote
+# @param toc        - TableOfContents of the disc, or None
+# @param checksums  - dict of the TrackChecksum of each track number
+# @param exit_codes - dict of the encoder's exit code for each track 
+#   number
+# @param out_dir    - the directory the album folders are in, or None
+#   for OUTPUT_DIR
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+def recordArchivedAlbum(tags, toc, checksums, exit_codes, out_dir=None,
+        index_path=None):
+    if index_path is None:
+        index_path = ARCHIVE_INDEX
+    if index_path is None or toc is None:
+        return
+
+    files = {profile.name: list() for profile in OUTPUT_PROFILES}
+    complete = True
+    for track_number, index in getTrackIndexes(tags, toc):
+        checksum = checksums.get(track_number)
+        if exit_codes.get(track_number) != 0 or checksum is None:
+            complete = False
+            continue
+
+        key = getArchiveTrackKey(checksum)
+        entry = readArchiveEntry(key, index_path) or dict()
+        for profile in OUTPUT_PROFILES:
+            track_path = os.path.join(
+                getAlbumDir(tags, out_dir, profile), 
+                getTrackFileName(tags, index, profile))
+            flags = getFFmpegOutputFlags(tags, index, profile)
+            files[profile.name].append({
+                ARCHIVE_KEY_PATH: track_path, 
+                ARCHIVE_KEY_FLAGS: flags
+            })
+
+            archived = entry.get(profile.name)
+            if archived is not None \
+                    and archived[ARCHIVE_KEY_FLAGS] == flags \
+                    and os.path.exists(archived[ARCHIVE_KEY_PATH]):
+                if not os.path.samefile(
+                        archived[ARCHIVE_KEY_PATH], track_path):
+                    linkFile(archived[ARCHIVE_KEY_PATH], track_path)
+                continue
+            entry[profile.name] = {
+                ARCHIVE_KEY_PATH: track_path, 
+                ARCHIVE_KEY_FLAGS: flags
+            }
+        writeArchiveEntry(key, entry, index_path)
+
+    if complete:
+        writeArchiveEntry(
+            ARCHIVE_KEY_DISC.format(getAccurateRipId(toc)), 
+            {
+                ARCHIVE_KEY_ALBUM_DIR: getAlbumDir(
+                    tags, out_dir, OUTPUT_PROFILES[0]),
+                ARCHIVE_KEY_FILES: files,
+                ARCHIVE_KEY_TAGS: tags.toDict()
+            }, 
+            index_path)
+
+# function to write an entry of the archive index
+# @param key        - the entry's key
+# @param entry      - dict of the entry
+# @param index_path - path of the archive index, or None for ARCHIVE_INDEX
+#   (nothing is written when that is None too)
+def writeArchiveEntry(key, entry, index_path=None):
+    if index_path is None:
+        index_path = ARCHIVE_INDEX
+    if index_path is None:
+        return
+    with ARCHIVE_INDEX_LOCK:
+        archive = openArchiveIndex(index_path)
+        if archive is None:
+            return
+        archive[key.encode()] = json.dumps(entry).encode()
+        if hasattr(archive, 'sync'):
+            archive.sync()
+
+########################################################################
+### rip journal ########################################################
+########################################################################
+
+### rip journal constants  =============================================
+
+# when true, every stage each track of a disc gets through is written to
+# a journal in JOURNAL_DIR, and the disc's wavs are kept in a folder 
+# named after it until the whole disc is done. When a run fails part 
+# way (an encoder crash, Ctrl+C, a track count the user refused), the 
+# next run of the disc carries on from what the last one left behind. 
+# Needs a TOC for the disc ID. The wavs of a rip that fails (about 700MB
+# a disc) are moved out of SCRATCH_DIR_RAM to SCRATCH_DIR_DISK, or to 
+# JOURNAL_DIR when that is None, so they do not hold ram until the next
+# run. Only the JOURNAL_MAX_ENTRIES most recent discs are kept
+RESUME_RIPS = True
+JOURNAL_DIR = os.path.join(
+    os.path.expanduser('~'), '.cache', 'cd-rip-conv-tag', 'jobs')
+JOURNAL_MAX_ENTRIES = 10 # least recently ripped discs are removed
+JOURNAL_FILE = '{:s}.json' # AccurateRip ID
+JOB_WAV_DIR = '.cd-rip-conv-tag-{:s}' # made in the scratch directory
+
+# stages of a track, in order
+JOB_STAGE_RIPPED = 'ripped' # size of the wav
+JOB_STAGE_CHECKSUM = 'checksum' # the TrackChecksum
+JOB_STAGE_ENCODED = 'encoded' # ffmpeg outputs, see getFFmpegOutputs()
+JOB_STAGE_MOVED = 'moved' # same as encoded
+
+# journals of the discs being ripped, so a disc in two drives at once 
+# does not share one
+RIP_JOURNAL_LOCK = threading.Lock()
+RIP_JOURNALS_OPEN = set()
+
+JOURNAL_RESUMING = '\nResuming disc {:s}: {:d} of {:d} tracks already \
+ripped\n'
+JOURNAL_ERROR = 'WARNING: could not read the rip journal ({:s})'
+JOURNAL_KEEP_ERROR = 'WARNING: could not keep the ripped wavs for the \
+next run ({:s})'
+
+### rip journal functions  =============================================
+
+# function to make a TrackChecksum from what a journal recorded
+# @param track_number   - the track's number
+# @param entry          - dict the journal recorded, see 
+#   getJournalChecksum()
+# @returns TrackChecksum of the whole track
+def checksumFromJournal(track_number, entry):
+    checksum = TrackChecksum(track_number, 0, False, False)
+    checksum.samples = entry['samples']
+    checksum.crc32 = int(entry['crc32'], 16)
+    checksum.accuraterip_v1 = int(entry['accuraterip_v1'], 16)
+    checksum.accuraterip_v2 = int(entry['accuraterip_v2'], 16)
+    return checksum
+
+# function to record the end of a disc's rip in its journal. The journal
+# and the disc's wavs are removed once every track is in its album 
+# folder, otherwise they are kept for the next run
+# @param journal    - RipJournal of the disc, or None
+# @param tags       - AlbumData class that holds the tags we wrote
+# @param toc        - TableOfContents of the disc
+# @param exit_codes - dict of the encoder's exit code for each track 
+#   number
+# @param flac_dir   - the directory the tracks were encoded to
+def finishRipJournal(journal, tags, toc, exit_codes, flac_dir):
+    if journal is None:
+        return
+
+    complete = True
+    for track_number, index in getTrackIndexes(tags, toc):
+        if exit_codes.get(track_number) == 0:
+            journal.markStage(track_number, JOB_STAGE_MOVED, 
+                getFFmpegOutputs(tags, index, flac_dir))
+        else:
+            complete = False
+
+    if complete:
+        os.remove(journal.path)
+        shutil.rmtree(journal.wav_dir, ignore_errors=True)
+
+# function to remove the oldest journals, and the wavs they kept, until 
+# there are at most JOURNAL_MAX_ENTRIES. Journals are aged by their 
+# modification time, which is updated every time a stage is recorded. 
+# Journals of discs being ripped are never removed, and a wav folder is
+# only removed if it is one of ours (see isJobWavDir()). Must be called 
+# holding RIP_JOURNAL_LOCK
+# @param journal_dir    - the journal directory, or None for JOURNAL_DIR
+def evictRipJournals(journal_dir=None):
+    if journal_dir is None:
+        journal_dir = JOURNAL_DIR
+    try:
+        entries = [
+            os.path.join(journal_dir, entry) 
+            for entry in os.listdir(journal_dir)
+            if entry.endswith(JOURNAL_FILE.format(''))
+        ]
+    except FileNotFoundError:
+        return
+    if len(entries) <= JOURNAL_MAX_ENTRIES:
+        return
+
+    entries.sort(key=os.path.getmtime)
+    for entry in entries[:len(entries)-JOURNAL_MAX_ENTRIES]:
+        if entry in RIP_JOURNALS_OPEN:
+            continue
+        disc_id = os.path.basename(entry)[:-len(JOURNAL_FILE.format(''))]
+        try:
+            with open(entry) as journal_file:
+                wav_dir = json.load(journal_file)['wav_dir']
+            if isJobWavDir(wav_dir, disc_id):
+                shutil.rmtree(wav_dir, ignore_errors=True)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        os.remove(entry)
+
+# function to get the directory the wavs of a rip that failed are kept 
+# in until the next run
+# @returns SCRATCH_DIR_DISK, or JOURNAL_DIR when that is None
+def getJobKeepDir():
+    if SCRATCH_DIR_DISK is None:
+        return os.path.abspath(JOURNAL_DIR)
+    return os.path.abspath(SCRATCH_DIR_DISK)
+
+# function to get what a journal keeps of a TrackChecksum
+# @param checksum   - TrackChecksum of the whole track
+# @returns dict of the checksums and the number of samples
+def getJournalChecksum(checksum):
+    entry = checksum.toDict()
+    entry['samples'] = checksum.samples
+    return entry
+
+# function to get the stage a track was found at when its disc's rip was
+# resumed
+# @param journal        - RipJournal of the disc, or None
+# @param track_number   - the track's number
+# @returns one of JOB_STAGE_*, or None if the track has to be ripped
+def getResumedStage(journal, track_number):
+    if journal is None:
+        return None
+    return journal.resumed.get(track_number)
+
+# function to work out the last stage of a track whose results are all
+# still there, and match the tags and output profiles of this run
+# @param journal        - RipJournal of the disc
+# @param tags           - AlbumData class that holds the tags we will 
+#   write
+# @param index          - the index of the track in tags
+# @param track_number   - the track's number
+# @param flac_dir       - the directory the tracks are encoded to
+# @param out_dir        - the directory the album folders are in, or 
+#   None for OUTPUT_DIR
+# @returns one of JOB_STAGE_*, or None if the track has to be ripped
+def getTrackResumeStage(journal, tags, index, track_number, flac_dir, 
+        out_dir=None):
+    outputs = getFFmpegOutputs(tags, index, flac_dir)
+    temp_paths = [
+        os.path.join(flac_dir, getTrackTempName(tags, index, profile))
+        for profile in OUTPUT_PROFILES
+    ]
+    track_paths = [
+        os.path.join(
+            getAlbumDir(tags, out_dir, profile), 
+            getTrackFileName(tags, index, profile))
+        for profile in OUTPUT_PROFILES
+    ]
+
+    # the move can stop part way, so encoded tracks that are gone from 
+    # the encoder's directory are looked for in their album folders
+    if outputs in (
+                journal.getStage(track_number, JOB_STAGE_MOVED), 
+                journal.getStage(track_number, JOB_STAGE_ENCODED)) \
+            and all(os.path.exists(path) for path in track_paths) \
+            and not any(os.path.exists(path) for path in temp_paths):
+        return JOB_STAGE_MOVED
+    if journal.getStage(track_number, JOB_STAGE_ENCODED) == outputs \
+            and all(os.path.exists(path) for path in temp_paths):
+        return JOB_STAGE_ENCODED
+
+    wav_track = os.path.join(
+        journal.wav_dir, CDPARA_TRACK_WAV.format(track_number))
+    if journal.getStage(track_number, JOB_STAGE_RIPPED) is not None \
+            and os.path.exists(wav_track) \
+            and os.path.getsize(wav_track) == \
+                journal.getStage(track_number, JOB_STAGE_RIPPED):
+        return JOB_STAGE_RIPPED
+    return None
+
+# function to check that a path read from a journal is one of our wav 
+# folders, so a damaged or edited journal can never have another folder
+# ripped into or removed: it has to be named after the disc (see 
+# JOB_WAV_DIR) and sit right inside one of the scratch directories
+# @param wav_dir        - the path to check
+# @param disc_id        - AccurateRip ID of the journal's disc
+# @param scratch_dir    - the scratch directory of this rip, or None
+# @returns True if the folder is one of ours
+def isJobWavDir(wav_dir, disc_id, scratch_dir=None):
+    if not isinstance(wav_dir, str) \
+            or os.path.basename(wav_dir) != JOB_WAV_DIR.format(disc_id) \
+            or os.path.islink(wav_dir):
+        return False
+    scratch_dirs = [
+        os.path.abspath(scratch) 
+        for scratch in (scratch_dir, SCRATCH_DIR, SCRATCH_DIR_RAM, 
+            SCRATCH_DIR_DISK, OUTPUT_DIR, JOURNAL_DIR)
+        if scratch is not None
+    ]
+    return os.path.dirname(os.path.abspath(wav_dir)) in scratch_dirs
+
+# function to record that a track finished encoding in its disc's 
+# journal
+# @param journal        - RipJournal of the disc, or None
+# @param tags           - AlbumData class that holds the tags we wrote
+# @param index          - the index of the track in tags
+# @param track_number   - the track's number
+# @param flac_dir       - the directory the track was encoded to
+# @param exit_code      - the encoder's exit code
+def journalEncodedTrack(journal, tags, index, track_number, flac_dir, 
+        exit_code):
+    if journal is not None and exit_code == 0:
+        journal.markStage(track_number, JOB_STAGE_ENCODED, 
+            getFFmpegOutputs(tags, index, flac_dir))
+
+# function to record that a track finished encoding in its disc's 
+# journal, once the encoder pool's future for it is done
+# @param journal        - RipJournal of the disc, or None
+# @param tags           - AlbumData class that holds the tags we wrote
+# @param index          - the index of the track in tags
+# @param track_number   - the track's number
+# @param flac_dir       - the directory the track was encoded to
+# @param future         - the done future of convertTrack()
+def journalEncodedFuture(journal, tags, index, track_number, flac_dir, 
+        future):
+    if not future.cancelled() and future.exception() is None:
+        journalEncodedTrack(
+            journal, tags, index, track_number, flac_dir, future.result())
+
+# function to record that a track was ripped (and its checksums) in its
+# disc's journal
+# @param journal        - RipJournal of the disc, or None
+# @param track_number   - the track's number
+# @param wav_track      - path of the ripped wav, or None if there is no
+#   wav (streamed rips) or the rip failed
+# @param progress       - RipProgress of the drive, or None
+def journalRippedTrack(journal, track_number, wav_track, progress):
+    if journal is None:
+        return
+    if wav_track is not None:
+        journal.markStage(track_number, JOB_STAGE_RIPPED, 
+            os.path.getsize(wav_track))
+    if progress is not None and track_number in progress.checksums:
+        journal.markStage(track_number, JOB_STAGE_CHECKSUM, 
+            getJournalChecksum(progress.checksums[track_number]))
+
+# function to move the wavs of a rip that failed to getJobKeepDir(), so
+# ripping to SCRATCH_DIR_RAM does not hold ram until the next run. Does
+# nothing when the rip finished (its wavs are gone)
+# @param journal    - RipJournal of the disc
+def keepRipJobWavs(journal):
+    keep_dir = getJobKeepDir()
+    if not os.path.isdir(journal.wav_dir) \
+            or os.path.dirname(os.path.abspath(journal.wav_dir)) == keep_dir:
+        return
+
+    kept_wav_dir = os.path.join(keep_dir, os.path.basename(journal.wav_dir))
+    try:
+        os.makedirs(keep_dir, exist_ok=True)
+        shutil.rmtree(kept_wav_dir, ignore_errors=True)
+        shutil.move(journal.wav_dir, kept_wav_dir)
+    except OSError as error:
+        print(JOURNAL_KEEP_ERROR.format(str(error)))
+        return
+    with journal.lock:
+        journal.wav_dir = kept_wav_dir
+        journal.save()
+
+# function to load the journal of a disc, or start a new one. A damaged
+# journal is started over, a wav folder that is not one of ours (see 
+# isJobWavDir()) is not used, and the oldest journals are removed (see 
+# evictRipJournals())
+# @param toc            - TableOfContents of the disc, or None
+# @param scratch_dir    - the directory to keep the disc's wavs in, if 
+#   the journal does not name one
+# @returns RipJournal, or None if RESUME_RIPS is off, there is no TOC or
+#   the disc is being ripped in another drive
+def loadRipJournal(toc, scratch_dir):
+    if not RESUME_RIPS or toc is None:
+        return None
+    disc_id = getAccurateRipId(toc)
+    journal_path = os.path.join(JOURNAL_DIR, JOURNAL_FILE.format(disc_id))
+    with RIP_JOURNAL_LOCK:
+        if journal_path in RIP_JOURNALS_OPEN:
+            return None
+        RIP_JOURNALS_OPEN.add(journal_path)
+        evictRipJournals(JOURNAL_DIR)
+
+    journal = RipJournal(
+        journal_path, 
+        disc_id, 
+        os.path.join(scratch_dir, JOB_WAV_DIR.format(disc_id)))
+    try:
+        with open(journal_path) as journal_file:
+            entry = json.load(journal_file)
+        if isJobWavDir(entry['wav_dir'], disc_id, scratch_dir):
+            journal.wav_dir = entry['wav_dir']
+        journal.tracks = {
+            int(track_number): stages 
+            for track_number, stages in entry['tracks'].items()
+        }
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError, 
+            AttributeError) as error:
+        print(JOURNAL_ERROR.format(str(error)))
+    return journal
+
+# function to open the folder a disc's wavs are ripped to. With a 
+# journal, it is the folder the journal keeps them in, which is kept 
+# for the next run if the rip fails (see keepRipJobWavs()). Without 
+# one, it is a temporary folder that is always removed
+# @param toc            - TableOfContents of the disc, or None
+# @param scratch_dir    - the directory to make the folder in
+# @returns context manager of (RipJournal or None, wav folder path)
+@contextlib.contextmanager
+def openRipJob(toc, scratch_dir):
+    journal = loadRipJournal(toc, scratch_dir)
+    if journal is None:
+        with tempfile.TemporaryDirectory(dir=scratch_dir) as wav_dir:
+            yield None, wav_dir
+        return
+
+    try:
+        # saved before anything is ripped, so no wav folder is left 
+        # behind without a journal to remove it
+        os.makedirs(journal.wav_dir, exist_ok=True)
+        with journal.lock:
+            journal.save()
+        yield journal, journal.wav_dir
+    finally:
+        keepRipJobWavs(journal)
+        with RIP_JOURNAL_LOCK:
+            RIP_JOURNALS_OPEN.discard(journal.path)
+
+# function to find the tracks an earlier run of a disc got through. 
+# Their checksums are put back and they are counted as ripped in the
+# drive's progress
+# @param journal    - RipJournal of the disc, or None
+# @param tags       - AlbumData class that holds the tags we will write
+# @param toc        - TableOfContents of the disc
+# @param flac_dir   - the directory the tracks are encoded to
+# @param out_dir    - the directory the album folders are in, or None
+#   for OUTPUT_DIR
+# @param progress   - RipProgress of the drive, or None
+def resumeRipJournal(journal, tags, toc, flac_dir, out_dir=None,
+        progress=None):
+    if journal is None:
+        return
+
+    track_indexes = list(getTrackIndexes(tags, toc))
+    for track_number, index in track_indexes:
+        stage = getTrackResumeStage(
+            journal, tags, index, track_number, flac_dir, out_dir)
+        if stage is None:
+            continue
+        journal.resumed[track_number] = stage
+
+        checksum = journal.getStage(track_number, JOB_STAGE_CHECKSUM)
+        if checksum is not None:
+            keepTrackChecksum(
+                progress, checksumFromJournal(track_number, checksum), True)
+        if progress is not None and toc.getTrack(track_number) is not None:
+            progress.skipTrack(toc.getTrack(track_number))
+
+    if journal.resumed:
+        print(JOURNAL_RESUMING.format(
+            journal.disc_id, len(journal.resumed), len(track_indexes)))
+
+########################################################################
+### initial tests if program exists ####################################
+########################################################################
+
+### program names/commands  ============================================
+
+CMD_CD_INFO = 'cd-info'
+CMD_CDPARA = 'cdparanoia'
+CMD_FFMPEG = 'ffmpeg'
+
+CMD_VERSION = '--version'
+CMD_FFMPEG_VERSION = '-version'
+CMD_FFMPEG_ENCODERS = ['-hide_banner', '-encoders']
+
+CMDS = (CMD_CD_INFO, CMD_CDPARA, CMD_FFMPEG)
+
+CMD_ERROR = 'ERROR: {:s} not found'
+CMD_NO_ENCODER_ERROR = 'ERROR: {:s} has no {:s} encoder (for {:s} output)'
+
+# the version and capabilities of each program are kept here, keyed by 
+# the program's path, and only looked up again when the program changes
+PROGRAM_STATE_FILE = os.path.join(
+    os.path.expanduser('~'), '.cache', 'cd-rip-conv-tag', 'programs.json')
+
+# program capabilities
+CAPABILITY_ENCODERS = 'encoders' # names of ffmpeg's audio/video encoders
+
+# capabilities each program must have in PROGRAM_STATE_FILE, a program
+# cached without them is looked at again
+PROGRAM_CAPABILITIES = {CMD_FFMPEG: (CAPABILITY_ENCODERS,)}
+
+### program testing functions   ========================================
+# function to import an optional module, once. A missing module is 
+# remembered, so it is not searched for again
+# @param name   - name of the module, one of OPTIONAL_MODULES
+# @returns the module, or None if it is not installed
+def importOptional(name):
+    if name not in OPTIONAL_MODULES:
+        try:
+            OPTIONAL_MODULES[name] = importlib.import_module(name)
+        except ImportError:
+            OPTIONAL_MODULES[name] = None
+    return OPTIONAL_MODULES[name]
+
+# function that checks ffmpeg can encode every one of OUTPUT_PROFILES,
+# from the encoders checkProgram() found (and cached) for it. A flac 
+# only output can do without ffmpeg's flac encoder when soundfile is 
+# used instead
+# EXIT NOTE: this function will exit the program if a required program 
+#   is missing, or an output profile cannot be encoded
+def checkOutputProfiles():
+    encoders = getProgramInfo(CMD_FFMPEG).capabilities.get(
+        CAPABILITY_ENCODERS, list())
+    native_flac = (
+        USE_NATIVE_FLAC 
+        and importOptional('soundfile') is not None 
+        and OUTPUT_PROFILES == [PROFILE_FLAC])
+    for profile in OUTPUT_PROFILES:
+        encoder = getProfileEncoder(profile)
+        if encoder is None or encoder in encoders or \
+                (profile is PROFILE_FLAC and native_flac):
+            continue
+        print(CMD_NO_ENCODER_ERROR.format(CMD_FFMPEG, encoder, profile.name))
+        print(EXITING)
+        exit(1)
+
+#*** program test MAIN
+# function that checks if the required programs we need are installed
+# in this system, by looking them up in PATH. A program is only run (to
+# get its version and capabilities) when it is new or has changed since
+# it was last looked at, otherwise what PROGRAM_STATE_FILE has for it is
+# used. The programs are only checked the first time this is called, so
+# it is cheap to call before anything that needs them.
+# EXIT NOTE: this function will exit the program if a required program 
+#   is missing
+# @returns dict of ProgramInfo for each program name
+@functools.lru_cache(maxsize=None)
+def checkProgram():
+    start = time.monotonic()
+    program_state = loadProgramState()
+    programs = dict()
+    state_changed = False
+    for cmd in CMDS:
+        path = shutil.which(cmd)
+        if path is None:
+            print(CMD_ERROR.format(cmd))
+            print(EXITING)
+            exit(1)
+
+        path = os.path.realpath(path)
+        mtime = os.stat(path).st_mtime_ns
+        cached = program_state.get(path)
+        if cached is not None and cached.mtime == mtime and all(
+                capability in cached.capabilities 
+                for capability in PROGRAM_CAPABILITIES.get(cmd, ())):
+            programs[cmd] = cached
+        else:
+            programs[cmd] = probeProgram(cmd, path, mtime)
+            program_state[path] = programs[cmd]
+            state_changed = True
+
+    if state_changed:
+        storeProgramState(program_state)
+
+    recordMetric(STAGE_PROGRAM_CHECK, start)
+    return programs
+
+# function to get what we know about an installed program
+# EXIT NOTE: this function calls checkProgram(), which may exit
+# @param cmd    - the program name (like CMD_FFMPEG)
+# @returns the program's ProgramInfo
+def getProgramInfo(cmd):
+    return checkProgram()[cmd]
+
+# function to load PROGRAM_STATE_FILE. A missing or damaged file is the
+# same as an empty one.
+# @returns dict of ProgramInfo for each program path
+def loadProgramState():
+    try:
+        with open(PROGRAM_STATE_FILE) as state_file:
+            program_state = dict()
+            for path, data in json.load(state_file).items():
+                program = ProgramInfo(path, data['mtime'], data['version'])
+                program.capabilities = dict(data['capabilities'])
+                program_state[path] = program
+            return program_state
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return dict()
+
+# function that runs a program to get its version and capabilities
+# @param cmd    - the program name (like CMD_FFMPEG)
+# @param path   - absolute path of the program
+# @param mtime  - modification time of the program (ns)
+# @returns a ProgramInfo
+def probeProgram(cmd, path, mtime):
+    version_flag = CMD_VERSION
+    if cmd == CMD_FFMPEG:
+        version_flag = CMD_FFMPEG_VERSION
+
+    # cdparanoia prints its version to stderr
+    completed = subprocess.run(
+        [path, version_flag], 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.STDOUT,
+        universal_newlines=True
+    )
+    version = ''
+    for line in completed.stdout.splitlines():
+        if line.strip():
+            version = line.strip()
+            break
+    program = ProgramInfo(path, mtime, version)
+
+    if cmd == CMD_FFMPEG:
+        # encoder lines look like: ' A....D flac    FLAC (Free Lossless...)'
+        completed = subprocess.run(
+            [path] + CMD_FFMPEG_ENCODERS, 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True
+        )
+        program.capabilities[CAPABILITY_ENCODERS] = [
+            line.split()[1] for line in completed.stdout.splitlines()
+            if len(line.split()) > 1
+        ]
+
+    return program
+
+# function to write PROGRAM_STATE_FILE, through a temporary file so a
+# crash never leaves half a file behind
+# @param program_state  - dict of ProgramInfo for each program path
+def storeProgramState(program_state):
+    try:
+        os.makedirs(os.path.dirname(PROGRAM_STATE_FILE), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                'w', 
+                dir=os.path.dirname(PROGRAM_STATE_FILE), 
+                suffix='.tmp', 
+                delete=False) as state_file:
+            json.dump(
+                {
+                    path: program.toDict() 
+                    for path, program in program_state.items()
+                }, 
+                state_file
+            )
+        os.replace(state_file.name, PROGRAM_STATE_FILE)
+    except OSError:
+        # the programs are just looked at again next time
+        pass
+
+### begin program testing flow  ========================================
+
+# function that runs the program testing part of the program
+def runProgramTest():
+    if SKIP_PROGRAM_TEST:
+        print('Skipping required program check'+HEADER_BAR)
+    else:
+        print('Checking if required programs exist...'+HEADER_BAR)
+        checkOutputProfiles()
+    
+########################################################################
+### pull tags if possible using cd-info ################################
+########################################################################
+
+### cd-info constants   ================================================
+
+# cd-info specific flags
+CMD_CD_INFO_FLAG_NO_DEV_INFO = '--no-device-info'
+CMD_CD_INFO_FLAG_NO_DISC_MODE = '--no-disc-mode'
+CMD_CD_INFO_FLAG_DEVICE = '--cdrom-device='
+
+# cd-info keywords
+STDOUT_CD_INFO_CDDB_START = 'CD Analysis Report'
+STDOUT_CD_INFO_TRACK_LIST = 'CD-ROM Track List ('
+STDOUT_CD_INFO_LEADOUT = 'leadout'
+STDOUT_CD_INFO_MCN = 'Media Catalog Number (MCN):'
+STDOUT_CD_INFO_ISRC = 'ISRC:'
+STDOUT_CD_INFO_TRACK = 'TRACK'
+STDOUT_CD_INFO_CDDB_TRACK = '  Track'
+STDOUT_CD_INFO_CDDB_DISC_ID = 'Disc ID'
+STDOUT_CD_INFO_CD_TEXT_DISC = 'CD-TEXT for Disc:'
+STDOUT_CD_INFO_CD_TEXT_TRACK = 'CD-TEXT for Track'
+
+# tag cache constants
+TAG_CACHE_DIR = os.path.join(
+    os.path.expanduser('~'), '.cache', 'cd-rip-conv-tag', 'tags')
+TAG_CACHE_MAX_ENTRIES = 1000 # least recently used discs are removed
+TAG_CACHE_EXT = '.json'
+TAG_CACHE_KEY_DISC_ID = 'disc_id'
+TAG_CACHE_KEY_ALBUM = 'album'
+TAG_CACHE_ERROR = 'WARNING: could not save tags to cache ({:s})'
+
+# freedb constants
+# the local freedb dump is every xmcd record of a freedb release in one 
+# file, e.g. from: find freedb-complete -type f -exec cat {} + > freedb
+# None disables offline lookups
+FREEDB_DUMP = None
+FREEDB_INDEX_EXT = '.idx' # index is kept next to the dump
+FREEDB_INDEX_MAGIC = b'FDBIDX1\n'
+FREEDB_INDEX_ENTRY_SIZE = 12 # 4 byte disc ID, 8 byte record offset
+FREEDB_INDEX_OFFSET_BITS = 64
+FREEDB_DISC_ID_MAX = 0xffffffff # disc IDs are 4 bytes in the index
+FREEDB_RECORD_START = b'# xmcd'
+FREEDB_DISC_ID = 'DISCID'
+FREEDB_DISC_TITLE = 'DTITLE'
+FREEDB_TRACK_TITLE = 'TTITLE'
+FREEDB_FRAME_OFFSETS = '# Track frame offsets:'
+FREEDB_TITLE_SEP = ' / ' # 'artist / title'
+FREEDB_VARIOUS_ARTISTS = ('various', 'various artists')
+FREEDB_INDEXING = '\nIndexing freedb dump {:s}...'
+FREEDB_ERROR = 'WARNING: freedb lookup failed ({:s})'
+
+# cd-info menu text
+TAGS_FOUND = '\n{:s} tags found\n'
+TAGS_CACHED = '\nUsing cached tags for disc {:s}\n'
+TAGS_NOT_FOUND = '\nNo {:s} tags found\n'
+TAGS_REFUSE = "Okay, I won\'t use these tags"
+NAME_CDDB = 'CDDB'
+NAME_CD_TEXT = 'CD-TEXT'
+NAME_FREEDB = 'freedb'
+NAME_PLACEHOLDER = 'PLACEHOLDER'
+
+# batch mode constants
+CMD_EJECT = 'eject'
+BATCH_POLL_SECONDS = 5 # how often the drive is checked for a disc
+BATCH_LOG = 'batch.log' # tag decisions are appended here
+BATCH_LOG_LINE = '{:s}\t{:s}\n' # time, message
+BATCH_TAGS_SELECTED = 'disc {:s}: using {:s} tags ({:s} - {:s})'
+BATCH_DISC_ERROR = 'disc {:s}: failed ({:s})'
+BATCH_EJECT_ERROR = 'Could not eject the disc, please remove it'
+BATCH_WAITING = '\nWaiting for the next disc...'+HEADER_BAR
+PLACEHOLDER_ALBUM_TITLE = 'Unknown disc {:s}' # disc ID
+NAME_CUSTOM = "CUSTOM"
+
+# user tag menu
+USER_TAG_MENU = (
+    CLEAR_SCREEN + "\n" +
+    HEADER_BAR + "\n" +
+    "   {:s} Tags:\n" +
+    HEADER_BAR + "\n\n" +
+    "{:s}\n\n" + # album toString goes here
+    "Menu options:\n" +
+    "   1) - Use these tags\n" +
+    "   2) - View {:s} tags\n" +
+    "   3) - View/Edit custom tags\n" +
+    "   4) - Apply album artist to track artists (CANNOT BE UNDONE)\n" +
+    "\nQuit options:\n" +
+    "   0) - Quit program"
+)
+CHOOSE_MENU_OPTION = "Choose menu option above: "
+INVALID_MENU_OPTION = "'{:s}' is not a valid menu choice"
+NO_EMPTY_TAGS = "Can't select empty tags"
+CUSTOM_TAG_PROMPT = "<Press Enter to begin writing custom tags>"
+
+# table of contents constants
+TOC_TYPE_AUDIO = 'audio'
+TOC_TYPE_DATA = 'data'
+TOC_PRE_EMPHASIS = 'yes'
+
+# CDDB specific constants (keys in CDInfoReport.cddb/cddb_tracks)
+CDDB_ALBUM_ARTIST = 'Artist'
+CDDB_ALBUM_TITLE = 'Title'
+CDDB_TRACK_ARTIST = 'artist'
+CDDB_TRACK_TITLE = 'title'
+CDDB_TRACK_BEGIN = 'Number of tracks'
+
+# CD-TEXT specific constants (keys in CDInfoReport.cd_text_disc/tracks)
+CD_TEXT_TITLE = 'TITLE'
+CD_TEXT_ARTIST = 'PERFORMER'
+CD_TEXT_UNT = 'UNTITLED'
+CD_TEXT_UNK = 'UNKNOWN'
+CD_TEXT_TRK = 'TRACK {:02d}'
+
+### cd-info functions   ================================================
+
+
+# functon that applies the given artist to all the track artists in 
+# the given AlbumData object
+def applyArtistToAll(artist, album):
+    for track in album.tracks:
+        track.artist = artist
+
+
+# function to clean text so its approripate for ffmpeg
+# IN:
+#   @param text - text to clean
+#
+# OUT:
+#   @returns cleaned text
+def cleanText(text):
+    text = text.replace("/", "(slash)")
+    text = text.replace("\\", "(backslash)")
+    return text
+
+
+# function to check if every element in the given list is the same
+# ASSUMES the given list has at least 1 element
+# @param _list  - the list to check
+# @return True if every element is the same, False if not
+def isEveryElementTheSame(_list):
+    element = _list[0]
+    
+    for item in _list:
+        if element != item:
+            return False
+            
+    return True
+
+# function to prompt and ask them if they would like to use the 
+# displayed tags.
+# @returns:
+#   0 when the user enters 'Y' or 'y' or any char other than 'N', 'n',
+#       'q', 'Q'
+#   1 when the user enters 'Q' or 'q'
+#   -1 when the user enters 'N' or 'n'
+# TODO make this a menu instead
+def confirmUserTagSelection():
+    user_answer = input('Do you want to use these tags? (Y/n/q/o): ')
+    if user_answer.casefold() == 'n': # no
+        return -1
+    elif user_answer.casefold() == 'q': # quit
+        return 1
+    elif user_answer.casefold() == 'o': # special case for now
+        return 2
+    # else assume user accepts
+    return 0
+    
+# function to prompt and ask user if they would like to continue to use
+# program or quit 
+# this is meant to happen in case no tags were selected
+# @param allow_retry    - boolean, when true display and parse retry
+#   option, otherwise do not display or parse retry option
+# @returns:
+#   0 when the user enters 'Y' or 'y'
+#   1 when the user enters 'Q' or 'q' or any char other than 'Y', 'y',
+#       'R', 'r'
+#   -1 when the user enters 'R' or 'r'
+#   2 when the user enters 'W' or 'w'
+def confirmUserNoTagContinue(allow_retry):
+    prompt = 'No tags were selected. {0:s}\nWould you like to continue \
+        without applying tags{1:s},write your own tags, or quit? (y/{2:s}w/Q): '
+    
+    if allow_retry:
+        prompt = prompt.format('Tags were found from '+CMD_CD_INFO+'.',
+            ', retry selecting tags,','r/')
+    else:
+        prompt = prompt.format('','','')
+        
+    user_answer = input(prompt)
+    if user_answer.casefold() == 'y': # continue
+        return 0
+    elif user_answer.casefold() == 'r': # retry
+        return -1
+    elif user_answer.casefold() == 'w': # write in tags
+        return 2
+    # else assume user quits
+    return 1
+    
+# displays the premenu, notigyinf user what tags we found (if any)
+# @param cddb_data - AlbumData retrieved from CDDB
+# @param cd_text_data - AlbumData retrieved from CDTEXT
+# @returns the TagDisplayState we should start in
+def displayUserTagPreMenu(cddb_data, cd_text_data):
+    # by default, start in CDDB state
+    start_state = TagDisplayState.CDDB
+
+    if cddb_data is None:
+        print(TAGS_NOT_FOUND.format(NAME_CDDB))
+
+        # if no cddb_data, then default to CDTEXT state
+        start_state = TagDisplayState.CDTEXT
+    else:
+        print(TAGS_FOUND.format(NAME_CDDB))
+
+    if cd_text_data is None:
+        print(TAGS_NOT_FOUND.format(NAME_CD_TEXT))
+    else:
+        print(TAGS_FOUND.format(NAME_CD_TEXT))
+
+    if cddb_data is None and cd_text_data is None:
+        nothing = input(CUSTOM_TAG_PROMPT)
+
+        # if no cddb or cdtext, default to custom tags
+        start_state = TagDisplayState.CUSTOM
+    else:
+        nothing = input(PAUSE_SCREEN)
+
+    return start_state
+
+# displays user tag menu options and prompts user
+# @param curr_tag_name - name of the tags we want to display
+# @param curr_tags - Album of the current tags
+# @param switch_tag_name - name of the tags we want the switch option to
+#   display
+# @returns:
+#   a TagMainMenuOption enum
+# TODO change the menu options into a dict, so we can pick and choose which
+#   options to display
+def displayUserTagMenuOptions(
+        curr_tag_name,
+        curr_tags,
+        switch_tag_name):
+
+    done = False
+    while not done:
+        print(USER_TAG_MENU.format(curr_tag_name, str(curr_tags), switch_tag_name))
+
+        # get user input
+        user_selection = input(CHOOSE_MENU_OPTION).strip()
+        try:
+            # retrieve enum of user choice
+            user_choice = parseTagMainMenuOption(int(user_selection))
+
+            # if the user choice was invalid, better say something
+            if user_choice is TagMainMenuOption.INVALID:
+                print(INVALID_MENU_OPTION.format(user_selection))
+            else:
+                # otherwise we are done, so just return out of here
+                return user_choice
+
+        except:
+            print(INVALID_MENU_OPTION.format(user_selection))
+
+
+# function to build an AlbumData from a dict made by AlbumData.toDict().
+# Dicts from before albums had Track records (with parallel 
+# 'track_names' and 'track_artists' lists) are read too.
+# @param album_dict - dict of album data
+# @returns an AlbumData
+def albumDataFromDict(album_dict):
+    album = AlbumData(album_dict['tag_source'])
+    album.album_artist = album_dict['album_artist']
+    album.album_title = album_dict['album_title']
+    album.mcn = album_dict.get('mcn')
+    if 'tracks' in album_dict:
+        album.tracks = [
+            trackFromDict(track_dict) for track_dict in album_dict['tracks']
+        ]
+    else:
+        for title, artist in zip(
+                album_dict['track_names'], album_dict['track_artists']):
+            album.addTrack(title, artist)
+    album.has_multiple_artists = album_dict['has_multiple_artists']
+    return album
+
+# function to build an AlbumData from json made by AlbumData.toJSON()
+# @param album_json - json string of album data
+# @returns an AlbumData
+def albumDataFromJSON(album_json):
+    return albumDataFromDict(json.loads(album_json))
+
+# function to fill in what cd-info's output says about an album that its
+# tags do not: where each track is on the disc, each track's ISRC and 
+# the disc's media catalog number
+# @param album      - AlbumData to fill in, or None
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns the album
+def addDiscDetails(album, cd_info):
+    if album is None:
+        return album
+    album.mcn = getDiscCode(cd_info.mcn) or album.mcn
+
+    toc = parseTOC(cd_info)
+    if toc is None:
+        return album
+    for track_number, index in getTrackIndexes(album, toc):
+        toc_track = toc.getTrack(track_number)
+        track = album.tracks[index]
+        track.start_lsn = toc_track.start_lsn
+        track.length = toc_track.length
+        track.isrc = getDiscCode(cd_info.isrcs.get(track_number)) or \
+            track.isrc
+    return album
+
+# function to clean up an ISRC or media catalog number read from the 
+# disc. Drives report all zeros for a code the disc does not have
+# @param code   - the code, or None
+# @returns the code, or None if the disc does not have one
+def getDiscCode(code):
+    if code is None or not code.strip('0'):
+        return None
+    return code
+
+# function to build a Track from a dict made by Track.toDict()
+# @param track_dict - dict of track data
+# @returns a Track
+def trackFromDict(track_dict):
+    return Track(
+        track_dict['number'],
+        track_dict['title'],
+        track_dict['artist'],
+        track_dict.get('isrc'),
+        track_dict.get('start_lsn'),
+        track_dict.get('length'))
+
+# function to index a freedb dump for lookupFreedb(). The index is a
+# sorted array of big endian (disc ID, record offset) entries, so a disc
+# is found with a binary search instead of a scan. Records listing 
+# several disc IDs get an entry for each.
+# @param dump_path  - path to the freedb dump
+# @param index_path - path to write the index to
+def buildFreedbIndex(dump_path, index_path):
+    disc_id_prefix = FREEDB_DISC_ID.encode()+b'='
+    entries = list()
+    record_offset = 0
+    offset = 0
+    with open(dump_path, 'rb') as dump:
+        for line in dump:
+            if line.startswith(FREEDB_RECORD_START):
+                record_offset = offset
+            elif line.startswith(disc_id_prefix):
+                for disc_id in line[len(disc_id_prefix):].split(b','):
+                    # malformed IDs are skipped, like malformed lines
+                    try:
+                        disc_id = int(disc_id, 16)
+                    except ValueError:
+                        continue
+                    if 0 <= disc_id <= FREEDB_DISC_ID_MAX:
+                        entries.append(
+                            disc_id << FREEDB_INDEX_OFFSET_BITS | 
+                            record_offset)
+            offset += len(line)
+    entries.sort()
+
+    # written next to the index and renamed, so a half written index is
+    # never used
+    index_tmp = index_path+'.tmp'
+    with open(index_tmp, 'wb') as index:
+        index.write(FREEDB_INDEX_MAGIC)
+        for entry in entries:
+            index.write(entry.to_bytes(FREEDB_INDEX_ENTRY_SIZE, 'big'))
+    os.replace(index_tmp, index_path)
+
+# function to remove the oldest entries from the tag cache until it has
+# at most TAG_CACHE_MAX_ENTRIES. Entries are aged by their modification
+# time, which is updated every time an entry is used.
+# @param cache_dir  - the tag cache directory, or None for TAG_CACHE_DIR
+def evictCachedTags(cache_dir=None):
+    if cache_dir is None:
+        cache_dir = TAG_CACHE_DIR
+    entries = [
+        os.path.join(cache_dir, entry) for entry in os.listdir(cache_dir)
+        if entry.endswith(TAG_CACHE_EXT)
+    ]
+    if len(entries) <= TAG_CACHE_MAX_ENTRIES:
+        return
+
+    entries.sort(key=os.path.getmtime)
+    for entry in entries[:len(entries)-TAG_CACHE_MAX_ENTRIES]:
+        os.remove(entry)
+
+# function to eject the disc. Uses eject if it is installed, otherwise 
+# the user is asked to remove the disc
+# @param device - the drive to eject, or None for the default drive
+def ejectDisc(device=None):
+    try:
+        completed = subprocess.run(
+            [CMD_EJECT] + ([] if device is None else [device]),
+            stdout=subprocess.DEVNULL, 
+            stderr=subprocess.DEVNULL
+        )
+        if completed.returncode == 0:
+            return
+    except FileNotFoundError:
+        pass
+    print(BATCH_EJECT_ERROR)
+
+# function to get the disc ID the tag cache is keyed by. This is the CDDB
+# disc ID, calculated from the table of contents if we have one, 
+# otherwise the one CDDB reported
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns the disc ID (like 9c08e90b), or None if it is unknown
+def getDiscId(cd_info):
+    toc = parseTOC(cd_info)
+    if toc is not None:
+        return toc.getCDDBDiscId()
+    return cd_info.cddb.get(STDOUT_CD_INFO_CDDB_DISC_ID)
+
+# function to make placeholder tags for a disc nothing is known about.
+# The album title has the disc ID in it, so discs ripped with 
+# placeholder tags do not end up in the same folder.
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns an AlbumData
+def getPlaceholderTags(cd_info):
+    album = AlbumData(NAME_PLACEHOLDER)
+    album.album_title = PLACEHOLDER_ALBUM_TITLE.format(
+        str(getDiscId(cd_info)))
+
+    toc = parseTOC(cd_info)
+    track_count = 0
+    if toc is not None:
+        track_count = len(toc.getAudioTracks())
+    for track_number in range(1, track_count+1):
+        album.addTrack(CD_TEXT_TRK.format(track_number), album.album_artist)
+
+    return album
+
+# function to get the path of a disc's tag cache entry
+# @param disc_id    - the disc ID
+# @param cache_dir  - the tag cache directory, or None for TAG_CACHE_DIR
+# @returns path of the entry
+def getTagCachePath(disc_id, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = TAG_CACHE_DIR
+    return os.path.join(cache_dir, disc_id+TAG_CACHE_EXT)
+
+# function to check if cd-info's CDDB query matched, which means we 
+# have tags.
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns true if we have a cddb match, false otherwise
+def hasCDDB(cd_info):
+    return cd_info.cddb_matches != 0
+
+# function to check if cd-info's output had CD-TEXT, which means we have
+# tags.
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns true if we have CD-TEXT, false otherwise
+def hasCDTEXT(cd_info):
+    return cd_info.cd_text_disc is not None or len(cd_info.cd_text_tracks) > 0
+    
+#*** cd-info MAIN function 
+# function that calls cd-info and parses the output
+# EXIT NOTE: this function calls a function that may exit the program
+# EXIT NOTE: this function will exit the program if cd-info's output 
+#   produces unexpected results
+# EXIT NOTE: this function will exit the program if user wishes to abort
+#   program
+# @param cd_info    - CDInfoReport to use instead of calling subprocess.
+# @returns an AlbumData class that consists of the tags generated,
+#   or None if no tags were found or selected
+def generateTags(cd_info=None):
+    if cd_info is None:
+        # call cd-info and parse its output
+        cd_info = parseCDInfo(readCDInfo())
+
+    # exit program if CD Analysis report is missing from text
+    if not cd_info.has_analysis_report:
+        print(PARSE_OUTPUT_FAILED.format(CMD_CD_INFO))
+        exit(1)
+
+    # a disc that will be skipped keeps the tags it was archived with
+    if SKIP_ARCHIVED_DISCS and not REFRESH_TAG_CACHE:
+        archived_tags = getArchivedDiscTags(parseTOC(cd_info))
+        if archived_tags is not None:
+            return archived_tags
+
+    # use the tags chosen the last time this disc was ripped
+    disc_id = None
+    if USE_TAG_CACHE:
+        disc_id = getDiscId(cd_info)
+    if disc_id is not None:
+        if REFRESH_TAG_CACHE:
+            invalidateCachedTags(disc_id)
+        else:
+            cached_tags = loadCachedTags(disc_id)
+            if cached_tags is not None:
+                print(TAGS_CACHED.format(disc_id))
+                if BATCH_MODE:
+                    logBatchDecision(BATCH_TAGS_SELECTED.format(disc_id, 
+                        cached_tags.tag_source, cached_tags.album_artist, 
+                        cached_tags.album_title))
+                return addDiscDetails(cached_tags, cd_info)
+    
+    # initalize cddb and cdtext albumdata
+    start = time.monotonic()
+    cddb_tags = None
+    cd_text_tags = None
+    
+    # check for cddb and cdtext and parse if they are found
+    if hasCDDB(cd_info):
+        cddb_tags = parseCDDB(cd_info)
+    elif FREEDB_DUMP is not None and parseTOC(cd_info) is not None:
+        # no network CDDB match, so try the local freedb dump instead
+        toc = parseTOC(cd_info)
+        try:
+            cddb_tags = lookupFreedb(toc.getCDDBDiscId(), toc, FREEDB_DUMP)
+        except (OSError, ValueError) as error:
+            print(FREEDB_ERROR.format(str(error)))
+    if hasCDTEXT(cd_info):
+        cd_text_tags = parseCDTEXT(cd_info)
+    recordMetric(STAGE_TAG_PARSE, start)
+
+    # batch mode never shows the menu. Its picks are not cached, so the
+    # disc still gets the menu when it is ripped by hand
+    if BATCH_MODE:
+        selected_tags = selectTagsUnattended(cd_info, cddb_tags, cd_text_tags)
+        logBatchDecision(BATCH_TAGS_SELECTED.format(str(getDiscId(cd_info)),
+            selected_tags.tag_source, selected_tags.album_artist, 
+            selected_tags.album_title))
+        return addDiscDetails(selected_tags, cd_info)
+        
+    tags_confirmed = False
+    while not tags_confirmed:
+        # display menu to prompt usr for tag selection
+        selected_tags = runUserTagMenu(cddb_tags,cd_text_tags)
+        
+        # if no tags are selected and no tags were found, prompt user if
+        # they would like to continue program or quit.
+        # if no tags are selected and tags were found, prompt user if 
+        # they would like to retry selecting tags, continue program, or 
+        # quit
+        # user_answer = None
+        # if selected_tags is None:
+        #    if cddb_tags is None and cd_text_tags is None:
+        #        user_answer = confirmUserNoTagContinue(False)
+        #    else:
+        #        user_answer = confirmUserNoTagContinue(True)
+       # 
+       # if user_answer is not None and user_answer == 1: # user quits
+       #     print(EXITING)
+       #     exit(1)
+       # elif user_answer is not None and user_answer == 2: 
+       #     # user wants to manuall enter tags
+       #     entered_tags = getEnteredTags()
+       #     print("\nEntered Tags:")
+       #     entered_tags.printData()
+       #     use_tags = input("\nUse these tags (y/N): ")
+       #     if use_tags.casefold() == 'y':
+       #         return entered_tags
+       #     else:
+       #         entered_tags.clear()
+#
+#        elif user_answer is None or user_answer == 0: 
+            # user selected tags or wishes to continue
+        if disc_id is not None and selected_tags is not None:
+            storeCachedTags(disc_id, selected_tags)
+        return addDiscDetails(selected_tags, cd_info)
+
+
+# function that allows user to enter in tags
+# @returns AlbumData class
+# if user wishes to abort this, just ctrl+C
+def getEnteredTags():
+
+    #clear screen
+    print(CLEAR_SCREEN)
+
+    # an album
+    album = AlbumData(NAME_CUSTOM)
+
+    # first track count
+    track_count = getTrackCount()
+
+    # also album title
+    album.album_title = getInput("Enter album title: ")
+
+    # quickly ask user for album artist?
+    print("Do not enter album artist if you have various artists\n")
+    user_answer = getInput("Do we have an album artist (y/N): ")
+    if user_answer.casefold() == 'y':
+        album.has_multiple_artists = False
+        album.album_artist = getInput("Enter album artist: ")
+    else:
+        album.has_multiple_artists = True
+
+    for track in range(0,track_count):
+        title = getInput("Enter track {:d} title: ".format(track+1))
+        if album.has_multiple_artists:
+            album.addTrack(title, getInput("Enter track aritst: "))
+        else:
+            album.addTrack(title, album.album_artist)
+    return album
+
+# get track count
+# @returns number of tracks
+def getTrackCount():
+    while True:
+        track_count = getInput("How many tracks: ")
+        if track_count.isdigit() and int(track_count) > 0:
+            return int(track_count)
+        else:
+            print("'" + track_count + "' is not a valid track count")
+
+
+# function that gets an input string from the user
+# @param prompt - the prompt to display to tuser
+# @returns a string entered by user
+# (NO VALDIATIOn)
+def getInput(prompt):
+    return input(prompt).strip()
+
+# function to parse tags from CDDB
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns an AlbumData built from the CDDB output
+#
+# CDDB Rules:
+#   - if a track is missing its title, "TRACK #" will be used for the 
+#   track title.
+#   - if a track is missing its artist, the album artist will be used
+def parseCDDB(cd_info):
+    album = AlbumData(NAME_CDDB)
+    
+    album.album_artist = cleanText(
+        cd_info.cddb.get(CDDB_ALBUM_ARTIST, album.album_artist))
+    album.album_title = cleanText(
+        cd_info.cddb.get(CDDB_ALBUM_TITLE, album.album_title))
+
+    # only as many tracks as CDDB says there are
+    track_count = len(cd_info.cddb_tracks)
+    if cd_info.cddb.get(CDDB_TRACK_BEGIN, '').isdigit():
+        track_count = min(track_count, int(cd_info.cddb[CDDB_TRACK_BEGIN]))
+
+    for track_number in range(1, track_count+1):
+        track = cd_info.cddb_tracks[track_number-1]
+        # the placeholder title is only formatted when it is needed
+        title = track.get(CDDB_TRACK_TITLE)
+        if title is None:
+            title = CD_TEXT_TRK.format(track_number)
+        album.addTrack(
+            cleanText(title),
+            cleanText(track.get(CDDB_TRACK_ARTIST, album.album_artist)))
+
+    album.has_multiple_artists = album.hasTrackArtists()
+    
+    return album
+
+# function to parse tags from CD-TEXT
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns an AlbumData built from the CD-TEXT output
+#
+# CD-TEXT Rules:
+#   - if the CD-TEXT for a track is missing its TITLE, "TRACK #" will 
+#   be used for the track title.
+#   - if the CD-TEXT for a track is missing its PERFORMER, the PERFORMER
+#   text for Disc will be used for the track artist, or "UNKNOWN" if 
+#   Disc does not have the PERFORMER attribute.
+#   - if the CD-TEXT for Disc is missing TITLE, "UNTITLED" will be used
+#   for the album title.
+#   - if the CD-TEXT for Disc is missing PERFORMER, "UNKNOWN" will be
+#   used for the album artist.
+def parseCDTEXT(cd_info):
+    album = AlbumData(NAME_CD_TEXT)
+    
+    # parsing album data
+    disc = cd_info.cd_text_disc
+    if disc is None:
+        disc = dict()
+    album.album_title = cleanText(disc.get(CD_TEXT_TITLE, CD_TEXT_UNT))
+    album.album_artist = cleanText(disc.get(CD_TEXT_ARTIST, CD_TEXT_UNK))
+    
+    # parse track data
+    track_number = 1
+    for track in cd_info.cd_text_tracks:
+        title = track.get(CD_TEXT_TITLE)
+        if title is None:
+            title = CD_TEXT_TRK.format(track_number)
+        album.addTrack(
+            cleanText(title),
+            cleanText(track.get(CD_TEXT_ARTIST, album.album_artist)))
+        track_number += 1
+
+    album.has_multiple_artists = album.hasTrackArtists()
+   
+    # if dont have album artist, but have complete artists for every track,
+    # set album artist to that artist
+    if (album.album_artist == CD_TEXT_UNK and album.number_of_tracks > 0 
+            and not album.has_multiple_artists):
+        album.album_artist = album.tracks[0].artist
+
+    return album
+
+#*** cd-info parser MAIN function
+# function that parses cd-info's output into a CDInfoReport in a single
+# pass. The output is split once at its section boundaries (track list,
+# CD Analysis Report, CD-TEXT), and then the lines of each section are
+# tokenized once, so no part of the output is searched more than once.
+# @param cd_info_text   - cd-info's full output
+# @returns a CDInfoReport of the output
+def parseCDInfo(cd_info_text):
+    cd_info = CDInfoReport()
+    head, separator, report = cd_info_text.partition(
+        STDOUT_CD_INFO_CDDB_START)
+    cd_info.has_analysis_report = len(separator) > 0
+
+    # everything before the track list is kept as is
+    list_index = head.find(STDOUT_CD_INFO_TRACK_LIST)
+    if list_index < 0:
+        list_index = len(head)
+    cd_info.header = head[:list_index].splitlines()
+    parseCDInfoTrackList(cd_info, head[list_index:])
+
+    # the CDDB section ends at the first blank line, CD-TEXT follows it
+    cddb_text, separator, cd_text = report.partition('\n\n')
+    parseCDInfoCDDB(cd_info, cddb_text)
+    parseCDInfoCDTEXT(cd_info, cd_text)
+
+    return cd_info
+
+# function to parse the CDDB section of cd-info's output into the given
+# report. Only the first match is kept.
+# @param cd_info    - CDInfoReport to add the CDDB data to
+# @param cddb_text  - cd-info's CDDB section
+def parseCDInfoCDDB(cd_info, cddb_text):
+    keys = cd_info.cddb
+    for line in cddb_text.split(NEWLINE):
+        key, separator, value = line.partition(':')
+        if not separator:
+            # track line, every key after this belongs to the track
+            if line.startswith(STDOUT_CD_INFO_CDDB_TRACK):
+                keys = dict()
+                cd_info.cddb_tracks.append(keys)
+            continue
+
+        key = key.strip()
+        if key == CMD_CD_INFO:
+            tokens = value.split()
+            if len(tokens) > 1 and tokens[1].isdigit():
+                cd_info.cddb_matches = int(tokens[1])
+        elif key == STDOUT_CD_INFO_CDDB_DISC_ID and len(keys) > 0:
+            # a second match, which we dont use
+            return
+        else:
+            keys[key] = value.strip().strip("\'")
+
+# function to parse the CD-TEXT section of cd-info's output into the 
+# given report. Only the first language is kept.
+# @param cd_info    - CDInfoReport to add the CD-TEXT data to
+# @param cd_text    - cd-info's CD-TEXT section
+def parseCDInfoCDTEXT(cd_info, cd_text):
+    keys = None
+    for line in cd_text.split(NEWLINE):
+        if line.startswith(STDOUT_CD_INFO_CD_TEXT_TRACK):
+            keys = dict()
+            cd_info.cd_text_tracks.append(keys)
+        elif line.startswith(STDOUT_CD_INFO_CD_TEXT_DISC):
+            if cd_info.cd_text_disc is not None:
+                # a second language, which we dont use
+                return
+            keys = dict()
+            cd_info.cd_text_disc = keys
+        elif keys is not None:
+            key, separator, value = line.partition(':')
+            if separator:
+                keys[key.strip()] = value.strip().strip("\'")
+
+# function to parse cd-info's track list section into the given report.
+# The section looks like:
+#   CD-ROM Track List (1 - 11)
+#     #: MSF       LSN    Type   Green? Copy? Channels Premphasis?
+#     1: 00:02:00  000000 audio  false  no    2        no
+#   ...
+#   170: 38:03:24  171099 leadout (383 MB raw, 383 MB formatted)
+#   Media Catalog Number (MCN): 0093624980605
+#   TRACK  1 ISRC: USWB10901115
+#   ...
+# @param cd_info    - CDInfoReport to add the data to
+# @param list_text  - cd-info's track list section
+def parseCDInfoTrackList(cd_info, list_text):
+    for line in list_text.split(NEWLINE):
+        tokens = line.split()
+        if len(tokens) < 2:
+            continue
+        elif tokens[0][:-1].isdigit() and len(tokens) > 3:
+            # track (or leadout) line
+            if tokens[3] == STDOUT_CD_INFO_LEADOUT:
+                cd_info.leadout_lsn = int(tokens[2])
+            else:
+                cd_info.track_list.append(tokens)
+        elif tokens[0] == STDOUT_CD_INFO_TRACK and len(tokens) == 4 and \
+                tokens[2] == STDOUT_CD_INFO_ISRC:
+            cd_info.isrcs[int(tokens[1])] = tokens[3]
+        elif line.startswith(STDOUT_CD_INFO_MCN):
+            cd_info.mcn = line[len(STDOUT_CD_INFO_MCN):].strip()
+        elif line.startswith(STDOUT_CD_INFO_TRACK_LIST):
+            first, separator, last = \
+                line[len(STDOUT_CD_INFO_TRACK_LIST):].rstrip(')').partition('-')
+            if first.strip().isdigit() and last.strip().isdigit():
+                cd_info.first_track = int(first)
+                cd_info.last_track = int(last)
+
+# function to parse a freedb (xmcd) record, e.g:
+#   # Track frame offsets:
+#   #       150
+#   #       21052
+#   DISCID=9c08e90b
+#   DTITLE=Taking Back Sunday / New Again
+#   TTITLE0=New Again
+# A key may be repeated, in which case its values are joined. On various
+# artists discs, each track title is 'artist / title'.
+# @param record - the record text
+# @returns tuple of (list of track frame offsets, AlbumData)
+def parseFreedbRecord(record):
+    frame_offsets = list()
+    values = dict()
+    in_offsets = False
+    for line in record.splitlines():
+        if line.startswith('#'):
+            if line.startswith(FREEDB_FRAME_OFFSETS):
+                in_offsets = True
+            elif in_offsets:
+                offset = line.lstrip('#').strip()
+                if offset.isdigit():
+                    frame_offsets.append(int(offset))
+                else:
+                    in_offsets = False
+            continue
+
+        key, sep, value = line.partition('=')
+        if sep:
+            values[key] = values.get(key, '')+value.rstrip('\r')
+
+    album = AlbumData(NAME_FREEDB)
+    disc_title = values.get(FREEDB_DISC_TITLE, '')
+    if FREEDB_TITLE_SEP in disc_title:
+        artist, sep, title = disc_title.partition(FREEDB_TITLE_SEP)
+        album.album_artist = cleanText(artist.strip())
+        album.album_title = cleanText(title.strip())
+    elif disc_title:
+        album.album_artist = cleanText(disc_title.strip())
+        album.album_title = album.album_artist
+    various_artists = (
+        album.album_artist.casefold() in FREEDB_VARIOUS_ARTISTS)
+
+    for track_number in range(1, len(frame_offsets)+1):
+        title = values.get(FREEDB_TRACK_TITLE+str(track_number-1), '').strip()
+        artist = album.album_artist
+        if various_artists and FREEDB_TITLE_SEP in title:
+            artist, sep, title = title.partition(FREEDB_TITLE_SEP)
+            artist = cleanText(artist.strip())
+            title = title.strip()
+        if not title:
+            title = CD_TEXT_TRK.format(track_number)
+        album.addTrack(cleanText(title), artist)
+
+    album.has_multiple_artists = album.hasTrackArtists()
+
+    return frame_offsets, album
+
+# function to build the table of contents of the disc from cd-info's 
+# track list. Track lines look like (split into tokens):
+#     1: 00:02:00  000000 audio  false  no    2        no
+# where the columns are #, MSF, LSN, Type, Green?, Copy?, Channels and
+# Premphasis?. Data tracks may not have every column.
+# @param cd_info    - CDInfoReport of cd-info's output
+# @returns a TableOfContents, or None if cd-info had no track list
+def parseTOC(cd_info):
+    if len(cd_info.track_list) == 0 or cd_info.leadout_lsn is None:
+        return None
+
+    toc = TableOfContents()
+    toc.leadout_lsn = cd_info.leadout_lsn
+    for tokens in cd_info.track_list:
+        toc.tracks.append(TOCTrack(
+            int(tokens[0].rstrip(':')),
+            int(tokens[2]),
+            tokens[3],
+            len(tokens) > 7 and tokens[7] == TOC_PRE_EMPHASIS
+        ))
+
+    # each track runs until the next one starts (or the leadout)
+    next_lsn = toc.leadout_lsn
+    next_type = None
+    for track in reversed(toc.tracks):
+        track.length = next_lsn-track.start_lsn
+        if track.isAudio() and next_type == TOC_TYPE_DATA:
+            track.length -= CD_SESSION_GAP_SECTORS
+        next_lsn = track.start_lsn
+        next_type = track.track_type
+
+    return toc
+
+# parsese the given TagMainMenuoption into an appropriate enum
+# assumes the given option is an int
+# @param choice - the choice we are checking
+# @returns the TagMainMenuOption enum that is appropriate
+def parseTagMainMenuOption(choice):
+    try:
+        # if the value is an appropriate enum, this will be successful
+        return TagMainMenuOption(choice)
+    except:
+        # otherwise just return the invalid choice
+        return TagMainMenuOption.INVALID
+
+# function to remove cached tags, so the tag menu is shown the next time
+# the disc is ripped
+# @param disc_id    - the disc ID to remove, or None to remove every disc
+# @param cache_dir  - the tag cache directory, or None for TAG_CACHE_DIR
+def invalidateCachedTags(disc_id=None, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = TAG_CACHE_DIR
+    if disc_id is None:
+        if os.path.isdir(cache_dir):
+            for entry in os.listdir(cache_dir):
+                if entry.endswith(TAG_CACHE_EXT):
+                    os.remove(os.path.join(cache_dir, entry))
+    elif os.path.exists(getTagCachePath(disc_id, cache_dir)):
+        os.remove(getTagCachePath(disc_id, cache_dir))
+
+# function to write a batch mode decision to the screen and BATCH_LOG
+# @param message    - the decision
+def logBatchDecision(message):
+    print(message)
+    try:
+        with open(BATCH_LOG, 'a') as log:
+            log.write(BATCH_LOG_LINE.format(time.strftime('%c'), message))
+    except OSError:
+        pass
+
+# function to load a disc's tags from the tag cache. A damaged entry is
+# removed and treated like a missing one.
+# @param disc_id    - the disc ID
+# @param cache_dir  - the tag cache directory, or None for TAG_CACHE_DIR
+# @returns the cached AlbumData, or None if the disc is not cached
+def loadCachedTags(disc_id, cache_dir=None):
+    cache_path = getTagCachePath(disc_id, cache_dir)
+    try:
+        with open(cache_path) as cache_file:
+            entry = json.load(cache_file)
+        album = albumDataFromDict(entry[TAG_CACHE_KEY_ALBUM])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError):
+        invalidateCachedTags(disc_id, cache_dir)
+        return None
+
+    # mark as recently used
+    os.utime(cache_path)
+    return album
+
+# function to look a disc up in the local freedb dump, indexing the dump 
+# first if it has no index or changed since it was indexed. When several
+# records share the disc ID, the one whose track offsets are closest to
+# the disc's is used.
+# @param disc_id    - the CDDB disc ID (like 9c08e90b)
+# @param toc        - TableOfContents of the disc
+# @param dump_path  - path to the freedb dump, or None for FREEDB_DUMP
+# @returns an AlbumData, or None if the disc is not in the dump (or there
+#   is no dump)
+def lookupFreedb(disc_id, toc, dump_path=None):
+    if dump_path is None:
+        dump_path = FREEDB_DUMP
+    if dump_path is None:
+        return None
+    index_path = dump_path+FREEDB_INDEX_EXT
+    if (not os.path.exists(index_path) or 
+            os.path.getmtime(index_path) < os.path.getmtime(dump_path)):
+        print(FREEDB_INDEXING.format(dump_path))
+        buildFreedbIndex(dump_path, index_path)
+
+    key = int(disc_id, 16)
+    frame_offsets = toc.getFrameOffsets()
+    best_album = None
+    best_distance = None
+    with open(index_path, 'rb') as index, open(dump_path, 'rb') as dump:
+        if os.path.getsize(index_path) <= len(FREEDB_INDEX_MAGIC):
+            return None
+        with mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as entries:
+            # binary search for the first entry of this disc ID
+            low = 0
+            high = (len(entries)-len(FREEDB_INDEX_MAGIC))//FREEDB_INDEX_ENTRY_SIZE
+            while low < high:
+                middle = (low+high)//2
+                if readFreedbIndexEntry(entries, middle) >> \
+                        FREEDB_INDEX_OFFSET_BITS < key:
+                    low = middle+1
+                else:
+                    high = middle
+
+            count = (len(entries)-len(FREEDB_INDEX_MAGIC))//FREEDB_INDEX_ENTRY_SIZE
+            for position in range(low, count):
+                entry = readFreedbIndexEntry(entries, position)
+                if entry >> FREEDB_INDEX_OFFSET_BITS != key:
+                    break
+
+                dump.seek(entry & ((1 << FREEDB_INDEX_OFFSET_BITS)-1))
+                record_offsets, album = parseFreedbRecord(readFreedbRecord(dump))
+                if len(record_offsets) != len(frame_offsets):
+                    continue
+                distance = sum(
+                    abs(record_offset-frame_offset) for record_offset, 
+                    frame_offset in zip(record_offsets, frame_offsets))
+                if best_distance is None or distance < best_distance:
+                    best_album = album
+                    best_distance = distance
+
+    return best_album
+
+# function that waits until the disc is taken out and another disc is
+# put in, checking the drive every BATCH_POLL_SECONDS
+# @param device         - the drive to wait on, or None for the default
+# @param disc_present   - False to return as soon as there is a disc, 
+#   instead of waiting for the one in the drive to be taken out first
+# @returns CDInfoReport of the new disc's cd-info output
+def waitForNextDisc(device=None, disc_present=True):
+    while True:
+        cd_info = parseCDInfo(readCDInfo(device))
+        if parseTOC(cd_info) is None:
+            disc_present = False
+        elif not disc_present:
+            return cd_info
+        time.sleep(BATCH_POLL_SECONDS)
+
+# function that calls cd-info and returns its output
+# @param device - the drive to read, or None for the default drive
+# @returns cd-info's output as a string
+def readCDInfo(device=None):
+    start = time.monotonic()
+    device_flags = list()
+    if device is not None:
+        device_flags.append(CMD_CD_INFO_FLAG_DEVICE+device)
+    completed = subprocess.run(
+        [
+            CMD_CD_INFO,
+            CMD_CD_INFO_FLAG_NO_DEV_INFO,
+            CMD_CD_INFO_FLAG_NO_DISC_MODE
+        ] + device_flags,
+        stdout=subprocess.PIPE, 
+        universal_newlines=True
+    )
+    recordMetric(STAGE_CD_INFO, start, len(completed.stdout), 
+        device=device, ok=completed.returncode == 0)
+    return completed.stdout
+
+# function to read one record from a freedb dump
+# @param dump   - the dump, opened in binary mode at the start of a record
+# @returns the record text
+def readFreedbRecord(dump):
+    lines = [dump.readline()]
+    for line in dump:
+        if line.startswith(FREEDB_RECORD_START):
+            break
+        lines.append(line)
+    return b''.join(lines).decode('utf-8', errors='replace')
+
+# function to read an entry from a freedb index
+# @param entries    - the index's contents
+# @param position   - position of the entry
+# @returns the entry
+def readFreedbIndexEntry(entries, position):
+    start = len(FREEDB_INDEX_MAGIC)+position*FREEDB_INDEX_ENTRY_SIZE
+    return int.from_bytes(
+        entries[start:start+FREEDB_INDEX_ENTRY_SIZE], 'big')
+
+# function to pick tags without asking the user, for batch mode. CDDB 
+# tags are preferred, then CD-TEXT tags, then placeholder tags.
+# @param cd_info        - CDInfoReport of cd-info's output
+# @param cddb_data      - AlbumData retrieved from CDDB, or None
+# @param cd_text_data   - AlbumData retrieved from CDTEXT, or None
+# @returns the AlbumData to use
+def selectTagsUnattended(cd_info, cddb_data, cd_text_data):
+    if cddb_data is not None:
+        return cddb_data
+    if cd_text_data is not None:
+        return cd_text_data
+    return getPlaceholderTags(cd_info)
+
+# function to save a disc's tags to the tag cache, replacing what was
+# cached for it before. The entry is written to a temporary file and 
+# renamed, so a crash never leaves half an entry behind.
+# @param disc_id    - the disc ID
+# @param tags       - the AlbumData to cache
+# @param cache_dir  - the tag cache directory, or None for TAG_CACHE_DIR
+def storeCachedTags(disc_id, tags, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = TAG_CACHE_DIR
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = getTagCachePath(disc_id, cache_dir)
+        with tempfile.NamedTemporaryFile(
+                'w', 
+                dir=cache_dir, 
+                suffix='.tmp', 
+                delete=False) as cache_file:
+            json.dump(
+                {
+                    TAG_CACHE_KEY_DISC_ID: disc_id, 
+                    TAG_CACHE_KEY_ALBUM: tags.toDict()
+                }, 
+                cache_file
+            )
+        os.replace(cache_file.name, cache_path)
+        evictCachedTags(cache_dir)
+    except OSError as error:
+        print(TAG_CACHE_ERROR.format(str(error)))
+
+# function to display a tag selection/vewing menu to the user
+# EXIT NOTE: this function will exit the program if the user selects the
+#   quit option
+# @param cddb_data      - athe AlbumData class generated from parsing
+#   CDDB output
+# @param cd_text_data   - the AlbumData class generated from parsing
+#   CD-TEXT output
+# @returns the selected AlbumData class or None if none were selected
+def runUserTagMenu(cddb_data, cd_text_data):
+
+    done = False
+    selected_tags = None
+    prev_state = None
+    custom_tags = None
+
+    state = displayUserTagPreMenu(cddb_data, cd_text_data)
+
+    # assume we have at least one tag to display at this point
+    while not done:
+
+        # display tag menu differntly based on state
+        if state is TagDisplayState.CDDB:
+            selected_tags = cddb_data
+            user_choice = (
+                displayUserTagMenuOptions(NAME_CDDB, selected_tags, 
+                    NAME_CD_TEXT)
+            )
+        elif state is TagDisplayState.CDTEXT:
+            selected_tags = cd_text_data
+            user_choice = (
+                displayUserTagMenuOptions(NAME_CD_TEXT, selected_tags,
+                    NAME_CDDB)
+            )
+        elif state is TagDisplayState.CUSTOM:
+            # TODO custom menu gets more options 
+            custom_tags = getEnteredTags()
+
+            selected_tags = custom_tags
+
+            # special logic to handle custom tags
+            if prev_state is TagDisplayState.CDTEXT:
+                prev_name = NAME_CD_TEXT
+            else:
+                prev_name = NAME_CDDB
+                prev_state = TagDisplayState.CDDB
+            user_choice = (
+                displayUserTagMenuOptions(NAME_CUSTOM, selected_tags,
+                    prev_name)
+            )
+
+        # now handle user choices
+        if user_choice is TagMainMenuOption.USE:
+            if selected_tags is None:
+                print(NO_EMPTY_TAGS)
+                nothing = input(PAUSE_SCREEN)
+            else:
+                return selected_tags
+
+        elif user_choice is TagMainMenuOption.SWITCH:
+            cust_state = prev_state
+            prev_state = state
+            if state is TagDisplayState.CDDB:
+                state = TagDisplayState.CDTEXT
+            elif state is TagDisplayState.CDTEXT:
+                state = TagDisplayState.CDDB
+            else:
+                state = cust_state
+
+        elif user_choice is TagMainMenuOption.CUSTOM:
+            prev_state = state
+            state = TagDisplayState.CUSTOM
+        elif user_choice is TagMainMenuOption.OPTION:
+            if selected_tags is not None:
+                applyArtistToAll(selected_tags.album_artist, selected_tags)
+        elif user_choice is TagMainMenuOption.QUIT:
+            done = True
+            print(EXITING)
+            exit(0)
+
+
+
+### begin cd-info program flow  ========================================
+
+# The following code uses a test file instead of actual progarm use
+# this will be commented at some point
+#test_output = open('cd-info-sample-output','r')
+#test_output_text = test_output.read()
+
+# function that runs the cd-info part of the program
+# @returns tuple of (CDInfoReport, AlbumData), either can be None
+def runCDInfo():
+    tags = None
+    cd_info = None
+    if SKIP_CD_INFO:
+        print('Skipping retrieving tags from '+CMD_CD_INFO)
+    elif DRIVES:
+        print('Reading tags from each drive when it has a disc...')
+    else:
+        print('Reading tags from disc...')
+        cd_info = parseCDInfo(readCDInfo())
+        tags = generateTags(cd_info)
+    return cd_info, tags
+
+########################################################################
+### rip tracks using cdparanoia and convert/write tags using ffmpeg ####
+########################################################################
+# we are usinga  context manager to create and use a temporary directory
+# as a result, we need to combine cdparanoia and ffmpeg functions in the
+# same place so the cnotext manager can encompass both processes.
+
+### cdparanoia/ffmpeg constants ========================================
+
+# cdparanoia specific flags
+CMD_CDPARA_FLAG_BATCH = '-B'
+CMD_CDPARA_FLAG_SELECT_ALL = '--'
+CMD_CDPARA_FLAG_RAW = '-r'
+CMD_CDPARA_FLAG_DEVICE = '-d'
+CMD_CDPARA_FLAG_OFFSET = '-O'
+CMD_CDPARA_STDOUT = '-'
+
+# read offset of the drive in samples (see accuraterip.com's list of 
+# drive offsets), which rips need to match AccurateRip
+DRIVE_READ_OFFSET = 0
+
+# name cdparanoia gives a single track ripped in batch mode
+CDPARA_WAV_EXT = '.cdda.wav'
+CDPARA_TRACK_WAV = 'track'+NUMBER_FORMAT+CDPARA_WAV_EXT
+
+# cdparanoia errors
+CDPARA_TRACK_ERROR = 'ERROR: cdparanoia failed to rip track {:d}'
+CDPARA_STALL_ERROR = (
+    'ERROR: cdparanoia has not made progress on track {:d} for {:d} '
+    'seconds, will try it again later')
+
+# with this flag cdparanoia writes a line to stderr for everything it 
+# does, like:
+#   ##: -2 [wrote] @ 18835151
+# where the number is the position in 16-bit samples from the start of 
+# the disc, and -2 is the kind of message
+CMD_CDPARA_FLAG_PROGRESS = '-e'
+CDPARA_PROGRESS_PREFIX = '##:'
+CDPARA_PROGRESS_AT = '@'
+CDPARA_PROGRESS_BAR = '(== PROGRESS' # cdparanoia's own progress bar
+CDPARA_WORDS_PER_SECTOR = CD_BYTES_PER_SECTOR//2
+CDPARA_EVENT_WROTE = -2
+CDPARA_EVENT_FINISHED = -1
+CDPARA_EVENT_JITTER = 2 # this and everything above it is a problem
+CDPARA_PROGRESS_READ_SIZE = 4096
+
+# how often the progress is checked when cdparanoia is quiet, and how 
+# long it can be quiet before the rip is stopped and tried again once 
+# the rest of the disc is done (None to never stop it)
+PROGRESS_POLL_SECONDS = 1
+RIP_STALL_SECONDS = 120
+RIP_STALL_RETRIES = 1
+
+# adaptive ripping: each track is first ripped fast, at 
+# ADAPTIVE_FAST_SPEED with only cdparanoia's overlap checks, and ripped
+# again with full paranoia (at ADAPTIVE_FULL_SPEED) only if the fast rip
+# fails or looks suspect. A rip is suspect if cdparanoia reports any of 
+# ADAPTIVE_ERROR_EVENTS, or more than ADAPTIVE_MAX_JITTER_PER_MINUTE of
+# ADAPTIVE_JITTER_EVENTS per minute of audio. Needs a TOC, since the 
+# events are counted from cdparanoia's progress. The speeds are drive 
+# speeds (like 8 for 8x), None leaves the drive at its own speed
+ADAPTIVE_RIP = False
+ADAPTIVE_FAST_SPEED = 24
+ADAPTIVE_FULL_SPEED = None
+ADAPTIVE_ERROR_EVENTS = (
+    'skip', 'dropped', 'duped', 'scratch', 'transport error')
+ADAPTIVE_JITTER_EVENTS = ('jitter', 'drift', 'correction', 'scratch repair')
+ADAPTIVE_MAX_JITTER_PER_MINUTE = 5
+ADAPTIVE_RERIP = (
+    'Track {:02d} looks damaged ({:s}), ripping it again with full '
+    'paranoia')
+ADAPTIVE_FAILED = 'failed'
+ADAPTIVE_EVENT_COUNT = '{:d} {:s}'
+CMD_CDPARA_FLAG_SPEED = '-S'
+CMD_CDPARA_FLAG_OVERLAP_ONLY = '-Y' # skip the extra paranoia checks
+
+# print a line for each drive every time a track gets this much further
+# (in percent). 0 turns the printing off
+PROGRESS_PRINT_STEP = 25
+PROGRESS_LINE = 'Track {:02d}: {:3d}% (disc {:3d}%), {:.1f}x, ETA {:s}'
+PROGRESS_LINE_DEVICE = '{:s}: '
+PROGRESS_NO_ETA = '-:--'
+
+# functions called with the RipProgress every time it changes, see 
+# addRipProgressCallback()
+RIP_PROGRESS_CALLBACKS = list()
+
+# ripped tracks are written by us rather than cdparanoia: the wav file is
+# preallocated to its size from the TOC, so it is laid out in one piece,
+# then filled WAV_WRITE_BLOCK_SIZE at a time, at offsets that are a 
+# multiple of the block size
+PREALLOCATE_WAV = True
+WAV_WRITE_BLOCK_SIZE = 1024*1024
+WAV_HEADER_FORMAT = '<4sI4s4sIHHIIHH4sI'
+WAV_BITS_PER_SAMPLE = 16
+
+# where the temporary wav files are ripped to. When None, SCRATCH_DIR_RAM
+# is used if it has room for the whole disc, otherwise SCRATCH_DIR_DISK
+# (or the output directory when that is None too). The wavs of a rip 
+# that fails are moved to disk (see RESUME_RIPS)
+SCRATCH_DIR = None
+SCRATCH_DIR_RAM = '/dev/shm'
+SCRATCH_DIR_DISK = None
+
+# free space to leave in SCRATCH_DIR_RAM after the disc is ripped to it
+SCRATCH_DIR_RAM_MARGIN = 64*1024*1024
+
+# max number of ripped tracks waiting on ffmpeg in the pipelined mode.
+# cdparanoia blocks once this many are queued
+PIPELINE_QUEUE_SIZE = 4
+
+# multi-drive constants
+DRIVE_HEADER = '\nDrive {:s}'+HEADER_BAR
+
+# held while asking the user anything, so drives ripping at the same time
+# do not prompt over each other
+PROMPT_LOCK = threading.Lock()
+# ffmpeg specific flags
+CMD_FFMPEG_FLAG_INPUT = '-i'
+CMD_FFMPEG_FLAG_METADATA = '-metadata'
+CMD_FFMPEG_FLAG_TITLE = 'title='
+CMD_FFMPEG_FLAG_ARTIST = 'artist='
+CMD_FFMPEG_FLAG_ALBUM = 'album='
+CMD_FFMPEG_FLAG_TRACK = "track="
+CMD_FFMPEG_FLAG_ISRC = 'ISRC='
+CMD_FFMPEG_FLAG_BARCODE = 'BARCODE='
+CMD_FFMPEG_FLAG_AUDIO_STREAM = '-c:a'
+CMD_FFMPEG_FLAG_OVERWRITE = '-y'
+CMD_FFMPEG_FLAG_FLAC_AUDIO = 'flac'
+CMD_FFMPEG_FLAG_FORMAT = '-f'
+CMD_FFMPEG_FLAG_RATE = '-ar'
+CMD_FFMPEG_FLAG_CHANNELS = '-ac'
+CMD_FFMPEG_PCM_FORMAT = 's16le'
+CMD_FFMPEG_STDIN = 'pipe:0'
+CMD_FFMPEG_FLAC_FORMAT = 'flac' # temporary names dont end in .flac
+EXT_FLAC = '.flac'
+
+# formats every track is encoded to. They are all made by one ffmpeg 
+# from a single read of the track's pcm, with the same tags and names. 
+# Each format gets its own album folder: in the output directory for 
+# flac, under a folder named after the format for the others (like 
+# <output dir>/opus/<artist> - <album>). The first one is the album 
+# folder checksums are written to.
+PROFILE_FLAC = OutputProfile(
+    'flac', 
+    EXT_FLAC, 
+    [CMD_FFMPEG_FLAG_AUDIO_STREAM, CMD_FFMPEG_FLAG_FLAC_AUDIO], 
+    CMD_FFMPEG_FLAC_FORMAT)
+PROFILE_OPUS = OutputProfile(
+    'opus', 
+    '.opus', 
+    [CMD_FFMPEG_FLAG_AUDIO_STREAM, 'libopus', '-b:a', '160k'], 
+    'opus', 
+    'opus')
+PROFILE_MP3 = OutputProfile(
+    'mp3', 
+    '.mp3', 
+    [CMD_FFMPEG_FLAG_AUDIO_STREAM, 'libmp3lame', '-q:a', '2'], 
+    'mp3', 
+    'mp3')
+OUTPUT_PROFILES = [PROFILE_FLAC]
+
+# number of ffmpeg processes allowed to run at once
+FFMPEG_WORKERS = os.cpu_count() or 1
+
+# in-process flac encoder constants
+NATIVE_FLAC_FORMAT = 'FLAC'
+NATIVE_FLAC_SUBTYPE = 'PCM_16'
+NATIVE_FLAC_DTYPE = 'int16'
+NATIVE_FLAC_BLOCK_FRAMES = 65536 # frames read from the wav per write
+NATIVE_FLAC_ERROR = 'ERROR: could not convert {:s} in-process ({:s}), \
+falling back to '+CMD_FFMPEG
+NATIVE_FLAC_STREAM_ERROR = 'ERROR: could not convert {:s} in-process ({:s})'
+
+# ffmpeg errors
+FFMPEG_TRACK_COUNT_ERROR = 'ERROR: Number of tracks found on disc do \
+not match number of tracks ripped from disc'
+FFMPEG_TRACK_ERROR = 'ERROR: failed to convert track {:d} \
+(exit code {:d})'
+FFMPEG_TRACK_EXCEPTION = 'ERROR: failed to convert track {:d} ({:s})'
+FFMPEG_EXCEPTION_EXIT_CODE = 1 # recorded for a track whose convert raised
+
+# flacs are written under a temporary name in the album folder and 
+# renamed once every track is done, so a half written flac never has the
+# final name
+FLAC_TEMP_NAME = '.{:s}.part' # track file name
+ALBUM_FAILED = 'ERROR: no track of {:s} - {:s} converted, nothing was moved'
+
+FLAC_COPY_CHUNK_SIZE = 8*1024*1024 # when the rename crosses filesystems
+
+FFMPEG_PROMPT_TRACK_SKIP = 'Would you like to apply tags anyway? (The extra \
+tags will be ignored) (y/N)'
+
+### cdparanoia/ffmpeg functions ========================================
+
+# function to prompt user and ask them if they would like to apply tags even
+# if a track count error was found.
+# @returns:
+#   0 if the user enters 'y' or 'Y'
+#   1 if the user enters 'n' or 'N' (or any other character)
+def confirmUserTrackSkip():
+    user_answer = input(FFMPEG_PROMPT_TRACK_SKIP)
+    if user_answer.casefold() == 'y':   # yes
+        return 0
+    # else assume user does not accept
+    return 1
+
+# function to check that the number of tracks we have tags for matches 
+# the number of tracks found, and ask the user what to do if not
+# EXIT NOTE: this function will exit if the numbers do not match and the
+#   user does not want to continue
+# @param tags           - AlbumData class that holds the tags we will write
+# @param track_count    - number of (audio) tracks found
+# @param toc            - TableOfContents of the disc, or None. Tags that
+#   also cover the disc's data tracks are not a mismatch
+def confirmTrackCount(tags, track_count, toc=None):
+    if toc is not None and tags.number_of_tracks == len(toc.tracks):
+        return
+
+    # quit if numbers of tracks do not match up
+    if tags.number_of_tracks != track_count:
+        print(FFMPEG_TRACK_COUNT_ERROR)
+        user_answer = 0
+        if not BATCH_MODE:
+            with PROMPT_LOCK:
+                user_answer = confirmUserTrackSkip()
+        if user_answer != 0:
+            print(EXITING)
+            exit(1)
+        else:
+            print('Ignoring extra tags...')
+
+# function that converts a single wav file into a flac and writes its 
+# tags, in-process if possible, otherwise by calling ffmpeg. A track 
+# already in the archive is hard linked instead
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param wav_track  - path to the wav file to convert
+# @param flac_dir   - the directory to write the flac to (under its 
+#   temporary name)
+# @param checksum   - TrackChecksum of the wav, or None
+# @returns ffmpeg's exit code (0 if converted in-process or linked)
+def convertTrack(tags, index, wav_track, flac_dir='.', checksum=None):
+    start = time.monotonic()
+    if linkArchivedTrack(tags, index, checksum, flac_dir):
+        recordMetric(STAGE_ENCODE, start, 
+            os.path.getsize(wav_track)-WAV_HEADER_SIZE, True, 
+            track=index+1, details={'archived': True})
+        return 0
+
+    artist = tags.tracks[index].artist
+    title = tags.tracks[index].title
+    flac_track = os.path.join(flac_dir, getTrackTempName(tags, index))
+
+    exit_code = None
+    if useNativeFlac(tags, index):
+        try:
+            encodeFlacNative(
+                wav_track, 
+                flac_track, 
+                title, 
+                artist, 
+                tags.album_title, 
+                index+1
+            )
+            exit_code = 0
+        except RuntimeError as error:
+            # remove the partial flac so ffmpeg doesnt ask to overwrite it
+            print(NATIVE_FLAC_ERROR.format(wav_track, str(error)))
+            if os.path.exists(flac_track):
+                os.remove(flac_track)
+
+    # this command does an ffmpeg convert and tag write for every output 
+    # profile, it looks like:
+    # ffmpeg -i <input file> -metadata title="Title" -metadata 
+    #   artist="Artist" -metadata album="Album" 
+    #   -metadata track=## -c:a flac -f flac -y <output> [<next output>]
+    if exit_code is None:
+        exit_code = subprocess.run(
+            [
+                CMD_FFMPEG,
+                CMD_FFMPEG_FLAG_INPUT,
+                wav_track
+            ] + getFFmpegOutputs(tags, index, flac_dir)
+        ).returncode
+
+    recordMetric(STAGE_ENCODE, start, 
+        os.path.getsize(wav_track)-WAV_HEADER_SIZE, True, 
+        track=index+1, ok=exit_code == 0)
+    return exit_code
+
+# function that converts wav files as they are put into the given queue.
+# meant to run in its own thread while cdparanoia rips the next track
+# @param tags       - AlbumData class that holds the tags we will write
+# @param wav_queue  - queue of (track number, index in tags, wav file 
+#   path, TrackChecksum or None) tuples. a None entry means no more 
+#   tracks are coming
+# @param exit_codes - dict that will be filled with ffmpeg's exit code
+#   for each track number converted
+# @param workers    - max number of ffmpeg processes to run at once
+# @param flac_dir   - the directory to write the flacs to
+# @param pool       - encoder pool shared with other drives, or None to
+#   start one with the given number of workers
+# @param journal    - RipJournal of the disc, or None
+def convertTrackQueue(tags, wav_queue, exit_codes, workers=FFMPEG_WORKERS,
+        flac_dir='.', pool=None, journal=None):
+    futures = dict()
+    with openEncoderPool(workers, pool) as pool:
+        while True:
+            entry = wav_queue.get()
+            if entry is None:
+                break
+
+            track_number, index, wav_track, checksum = entry
+            futures[track_number] = pool.submit(
+                convertTrack, 
+                tags, 
+                index, 
+                wav_track,
+                flac_dir,
+                checksum
+            )
+            futures[track_number].add_done_callback(functools.partial(
+                journalEncodedFuture, 
+                journal, 
+                tags, 
+                index, 
+                track_number, 
+                flac_dir))
+
+    for track_number in sorted(futures):
+        exit_codes[track_number] = getConvertExitCode(
+            track_number, futures[track_number])
+
+#*** ffmpeg MAIN function
+# function that calls ffmpeg to convert wav files into flacs and write
+# their tags
+# EXIT NOTE: this function will exit if the tracks found in directory
+#   do not match the number of tracks read from disc
+# @param tags       - AlbumData class that holds the tags we will write
+# @param wav_dir    - the directory of wav files to convert
+# @param workers    - max number of ffmpeg processes to run at once
+# @param toc        - TableOfContents of the disc, or None
+# @param flac_dir   - the directory to write the flacs to
+# @param pool       - encoder pool shared with other drives, or None to
+#   start one with the given number of workers
+# @param checksums  - dict of the TrackChecksum of each track number 
+#   ripped, or None
+# @param journal    - RipJournal of the disc, or None. Tracks an earlier
+#   run already encoded are not encoded again
+# @returns dict of ffmpeg's exit code for each track number
+def convertTracks(tags, wav_dir=TEST_DIR, workers=FFMPEG_WORKERS, toc=None,
+        flac_dir='.', pool=None, checksums=None, journal=None):
+    
+    # we are assuming that for each track in AlbumData, there is a
+    # corresponding wav file. We also assume os.listdir() will show us
+    # tracks alphabetically
+    # also its easier to send ffmpeg to files in a folder than send
+    # its output to a different folder other than current working direct
+    exit_codes = dict()
+    for track_number, _ in getTrackIndexes(tags, toc):
+        if getResumedStage(journal, track_number) in (
+                JOB_STAGE_ENCODED, JOB_STAGE_MOVED):
+            exit_codes[track_number] = 0
+    wav_tracks = [
+        wav_track for wav_track in sorted(os.listdir(wav_dir))
+        if parseWavTrackNumber(wav_track) not in exit_codes
+    ]
+
+    # quit if numbers of tracks do not match up
+    confirmTrackCount(tags, len(wav_tracks)+len(exit_codes), toc)
+
+    # cdparanoia names the wav files after their track number, which 
+    # picks the tags to use (data tracks have no wav file)
+    track_indexes = dict(getTrackIndexes(tags, toc))
+    if checksums is None:
+        checksums = dict()
+    
+    # tracks are converted in parallel, but submitted (and reported) in
+    # track order
+    futures = dict()
+    with openEncoderPool(workers, pool) as pool:
+        position = 0
+        for wav_track in wav_tracks:
+            track_number = parseWavTrackNumber(wav_track)
+            if track_number is None:
+                track_number = position+1
+            position += 1
+
+            if track_number in track_indexes:
+                futures[track_number] = pool.submit(
+                    convertTrack, 
+                    tags, 
+                    track_indexes[track_number], 
+                    os.path.join(wav_dir, wav_track),
+                    flac_dir,
+                    checksums.get(track_number)
+                )
+                futures[track_number].add_done_callback(functools.partial(
+                    journalEncodedFuture, 
+                    journal, 
+                    tags, 
+                    track_indexes[track_number], 
+                    track_number, 
+                    flac_dir))
+
+    for track_number in sorted(futures):
+        exit_codes[track_number] = getConvertExitCode(
+            track_number, futures[track_number])
+
+    reportFailedTracks(exit_codes)
+    return exit_codes
+        
+# function to get the number of audio tracks on the disc
+# @param tags   - AlbumData class that holds the tags we will write
+# @param toc    - TableOfContents of the disc, or None to use the number
+#   of tracks in tags
+# @returns the number of audio tracks
+def getAudioTrackCount(tags, toc=None):
+    if toc is None:
+        return tags.number_of_tracks
+    return len(toc.getAudioTracks())
+
+# function to match the audio tracks on the disc with their tags. Data
+# tracks are skipped. Tags can list every track on the disc (CDDB counts
+# data tracks) or only the audio tracks.
+# @param tags   - AlbumData class that holds the tags we will write
+# @param toc    - TableOfContents of the disc, or None to assume every 
+#   tag is an audio track starting at track 1
+# @returns list of (track number, index in tags) tuples, in track order,
+#   for every audio track that has tags
+def getTrackIndexes(tags, toc=None):
+    if toc is None:
+        return [
+            (index+1, index) for index in range(0, tags.number_of_tracks)
+        ]
+
+    if tags.number_of_tracks == len(toc.tracks):
+        track_indexes = [
+            (toc.tracks[index].number, index) 
+            for index in range(0, len(toc.tracks)) 
+            if toc.tracks[index].isAudio()
+        ]
+    else:
+        audio_tracks = toc.getAudioTracks()
+        track_indexes = [
+            (audio_tracks[index].number, index) 
+            for index in range(0, len(audio_tracks))
+        ]
+
+    return [
+        track_index for track_index in track_indexes 
+        if track_index[1] < tags.number_of_tracks
+    ]
+
+# function to go through tracks in the order they should be ripped: 
+# every track once, then each track that stalled (see RIP_STALL_SECONDS)
+# again, up to RIP_STALL_RETRIES times. Stalled tracks are picked up as
+# they happen, so each track must be ripped before asking for the next.
+# @param track_indexes  - list of (track number, index in tags) tuples, 
+#   like getTrackIndexes() returns
+# @param progress       - RipProgress of the drive, or None to rip each
+#   track only once
+# @returns generator of (track number, index in tags) tuples
+def getRipSchedule(track_indexes, progress=None):
+    indexes = dict()
+    for track_number, index in track_indexes:
+        indexes[track_number] = index
+        yield track_number, index
+
+    retries = dict()
+    while progress is not None and progress.stalled_tracks:
+        track_number = progress.stalled_tracks.pop(0)
+        if retries.get(track_number, 0) < RIP_STALL_RETRIES:
+            retries[track_number] = retries.get(track_number, 0)+1
+            yield track_number, indexes[track_number]
+
+# function to calculate how much space the ripped wav files of a disc 
+# will take up, from the audio tracks in the table of contents
+# @param toc    - TableOfContents of the disc
+# @returns size of the ripped disc in bytes
+def getDiscSize(toc):
+    disc_size = 0
+    for track in toc.getAudioTracks():
+        disc_size += track.getSize()+WAV_HEADER_SIZE
+    return disc_size
+
+# function to pick the directory the temporary wav files are ripped to.
+# SCRATCH_DIR is always used when it is set. Otherwise the ram backed
+# SCRATCH_DIR_RAM is used when it exists and has room for the whole disc,
+# and SCRATCH_DIR_DISK when it doesnt (or the disc size is unknown)
+# @param disc_size  - size of the ripped disc in bytes, or None
+# @param out_dir    - the directory the album folders are made in (or 
+#   None for OUTPUT_DIR), used when SCRATCH_DIR_DISK is None
+# @returns path of the directory to create the temporary directory in
+def getScratchDir(disc_size, out_dir=None):
+    if out_dir is None:
+        out_dir = OUTPUT_DIR
+    if SCRATCH_DIR is not None:
+        return SCRATCH_DIR
+
+    if disc_size is not None and os.path.isdir(SCRATCH_DIR_RAM):
+        free_space = shutil.disk_usage(SCRATCH_DIR_RAM).free
+        if free_space >= disc_size+SCRATCH_DIR_RAM_MARGIN:
+            return SCRATCH_DIR_RAM
+
+    if SCRATCH_DIR_DISK is None:
+        return out_dir
+    return SCRATCH_DIR_DISK
+
+# function to move a file, by renaming it when it stays on the same 
+# filesystem, otherwise by copying it FLAC_COPY_CHUNK_SIZE at a time to
+# a temporary name next to dest_path, renaming that and removing the
+# original
+# @param src_path   - the file to move
+# @param dest_path  - where to move it to
+def moveFile(src_path, dest_path):
+    try:
+        os.replace(src_path, dest_path)
+        return
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+
+    dest_temp = os.path.join(
+        os.path.dirname(dest_path), 
+        FLAC_TEMP_NAME.format(os.path.basename(dest_path)))
+    try:
+        with open(src_path, 'rb') as src, open(dest_temp, 'wb') as dest:
+            shutil.copyfileobj(src, dest, FLAC_COPY_CHUNK_SIZE)
+        os.replace(dest_temp, dest_path)
+    except:
+        if os.path.exists(dest_temp):
+            os.remove(dest_temp)
+        raise
+    os.remove(src_path)
+
+# function to give the tracks that converted their final names in the 
+# album folder of each of OUTPUT_PROFILES, which has the format:
+# <artist> - <album>
+# Files left by tracks that failed are removed. When the tracks were 
+# written to the first profile's album folder (the default) this is 
+# just a rename per track for it, and for the others if they are on the
+# same filesystem. The album folders are only made when at least one 
+# track converted, otherwise the (empty) folder the encoders wrote to is
+# removed and the failure is reported.
+# @param tags       - the AlbumData that represents this album
+# @param exit_codes - dict of the encoder's exit code for each track 
+#   number
+# @param toc        - TableOfContents of the disc, or None
+# @param flac_dir   - the directory the tracks were written to, or None
+#   for the first profile's album folder
+# @param out_dir    - the directory the album folders are in, or None
+#   for OUTPUT_DIR
+# @returns path of the first profile's album folder, or None if no track
+#   converted
+def moveFlacsToFolder(tags, exit_codes, toc=None, flac_dir=None, 
+        out_dir=None):
+    start = time.monotonic()
+    moved_bytes = 0
+    album_dir = getAlbumDir(tags, out_dir, OUTPUT_PROFILES[0])
+    if flac_dir is None:
+        flac_dir = album_dir
+    converted = any(
+        exit_codes.get(track_number) == 0 
+        for track_number, _ in getTrackIndexes(tags, toc))
+
+    for profile in OUTPUT_PROFILES:
+        profile_dir = getAlbumDir(tags, out_dir, profile)
+        if converted:
+            os.makedirs(profile_dir, exist_ok=True)
+        for track_number, index in getTrackIndexes(tags, toc):
+            track_temp = os.path.join(
+                flac_dir, getTrackTempName(tags, index, profile))
+            if not os.path.exists(track_temp):
+                continue
+            if exit_codes.get(track_number) == 0:
+                moved_bytes += os.path.getsize(track_temp)
+                moveFile(
+                    track_temp, 
+                    os.path.join(
+                        profile_dir, 
+                        getTrackFileName(tags, index, profile)))
+            else:
+                os.remove(track_temp)
+
+    recordMetric(STAGE_MOVE, start, moved_bytes, ok=converted)
+    if not converted:
+        # ripDisc() made it for the encoders, an older rip of the album 
+        # in it is left alone
+        if os.path.isdir(album_dir) and not os.listdir(album_dir):
+            os.rmdir(album_dir)
+        print(ALBUM_FAILED.format(tags.album_artist, tags.album_title))
+        return None
+    return album_dir
+
+# function that converts a wav file into a flac inside this process using
+# soundfile. The pcm frames are streamed across in blocks of 
+# NATIVE_FLAC_BLOCK_FRAMES so the whole track is never held in memory,
+# and the tags are written as vorbis comments.
+# ASSUMES soundfile is installed
+# @param wav_track      - path to the wav file to convert
+# @param flac_track     - path of the flac file to write
+# @param title          - track title tag
+# @param artist         - track artist tag
+# @param album          - album title tag
+# @param track_number   - track number tag
+# raises RuntimeError if soundfile cannot read or write the files
+def encodeFlacNative(wav_track, flac_track, title, artist, album, 
+        track_number):
+    with importOptional('soundfile').SoundFile(wav_track) as wav:
+        with openFlacNative(flac_track, title, artist, album, track_number,
+                wav.samplerate, wav.channels, wav.subtype) as flac:
+            for block in wav.blocks(
+                    NATIVE_FLAC_BLOCK_FRAMES, 
+                    dtype=NATIVE_FLAC_DTYPE):
+                flac.write(block)
+
+# function that encodes raw cd pcm read from the given stream into a flac
+# inside this process using soundfile, NATIVE_FLAC_BLOCK_FRAMES at a time
+# ASSUMES soundfile is installed
+# @param pcm_stream     - binary file object of 16-bit little endian 
+#   stereo pcm (like cdparanoia's raw output)
+# @param flac_track     - path of the flac file to write
+# @param title          - track title tag
+# @param artist         - track artist tag
+# @param album          - album title tag
+# @param track_number   - track number tag
+# @param checksum       - TrackChecksum to add the pcm to, or None
+# raises RuntimeError if soundfile cannot write the file
+def encodeFlacNativeStream(pcm_stream, flac_track, title, artist, album,
+        track_number, checksum=None):
+    with openFlacNative(flac_track, title, artist, album, track_number) \
+            as flac:
+        while True:
+            block = pcm_stream.read(
+                NATIVE_FLAC_BLOCK_FRAMES*CD_BYTES_PER_FRAME)
+            if not block:
+                return
+            if checksum is not None:
+                checksum.update(block)
+            flac.buffer_write(block, dtype=NATIVE_FLAC_DTYPE)
+
+# function to get the folder an album's tracks end up in, which has the
+# format:
+# [<format>/]<artist> - <album>
+# @param tags       - the AlbumData that represents this album
+# @param out_dir    - the directory the album folder is in, or None for
+#   OUTPUT_DIR
+# @param profile    - OutputProfile of the tracks
+# @returns absolute path of the album folder
+def getAlbumDir(tags, out_dir=None, profile=PROFILE_FLAC):
+    if out_dir is None:
+        out_dir = OUTPUT_DIR
+    if profile.dir_name is not None:
+        out_dir = os.path.join(out_dir, profile.dir_name)
+    return os.path.abspath(os.path.join(
+        out_dir, 
+        tags.album_artist+' - '+tags.album_title))
+
+# function to register a function to be called every time a drive makes
+# progress. It is called from a background thread with the drive's 
+# RipProgress (which keeps changing after the call returns), so it 
+# should be quick and copy out anything it wants to keep.
+# @param callback   - function taking a RipProgress
+def addRipProgressCallback(callback):
+    RIP_PROGRESS_CALLBACKS.append(callback)
+
+# function to stop calling a function registered with 
+# addRipProgressCallback()
+# @param callback   - the function to remove
+def removeRipProgressCallback(callback):
+    RIP_PROGRESS_CALLBACKS.remove(callback)
+
+# function to tell PROGRESS_PRINT_STEP and the registered callbacks about
+# a drive's progress
+# @param progress   - RipProgress of the drive
+def notifyRipProgress(progress):
+    printRipProgress(progress)
+    for callback in list(RIP_PROGRESS_CALLBACKS):
+        callback(progress)
+
+# function to print a drive's progress each time its track passes
+# another PROGRESS_PRINT_STEP percent
+# @param progress   - RipProgress of the drive
+def printRipProgress(progress):
+    if PROGRESS_PRINT_STEP <= 0:
+        return
+
+    percent = int(progress.getTrackFraction()*100)
+    step = percent - percent % PROGRESS_PRINT_STEP
+    if step == progress.printed_percent:
+        return
+    progress.printed_percent = step
+
+    eta = progress.getETA()
+    if eta is None:
+        eta_text = PROGRESS_NO_ETA
+    else:
+        eta_text = '{:d}:{:02d}'.format(int(eta)//60, int(eta) % 60)
+    line = PROGRESS_LINE.format(
+        progress.track, 
+        step, 
+        int(progress.getDiscFraction()*100), 
+        progress.getSpeed(), 
+        eta_text)
+    if progress.device is not None:
+        line = PROGRESS_LINE_DEVICE.format(progress.device)+line
+    print(line, flush=True)
+
+# function to parse one line of cdparanoia's stderr progress (see 
+# CMD_CDPARA_FLAG_PROGRESS)
+# @param line   - the line, without its newline
+# @returns (event, event name, sector from the start of the disc), or 
+#   None if the line is not a progress line
+def parseCDParaProgress(line):
+    if not line.startswith(CDPARA_PROGRESS_PREFIX):
+        return None
+
+    # ##: -2 [wrote] @ 18835151
+    event, _, rest = line[len(CDPARA_PROGRESS_PREFIX):].strip().partition(' ')
+    name, _, position = rest.rpartition(CDPARA_PROGRESS_AT)
+    try:
+        return (
+            int(event), 
+            name.strip().strip('[]'), 
+            int(position)//CDPARA_WORDS_PER_SECTOR)
+    except ValueError:
+        return None
+
+# function to start following a cdparanoia started with 
+# CMD_CDPARA_FLAG_PROGRESS and stderr=subprocess.PIPE
+# @param ripper     - the cdparanoia Popen
+# @param progress   - RipProgress of the drive, startTrack() already 
+#   called
+# @returns the thread reading the progress, to join once cdparanoia exits
+def startRipProgress(ripper, progress):
+    watcher = threading.Thread(
+        target=watchRipProgress, args=(ripper, progress), daemon=True)
+    watcher.start()
+    return watcher
+
+# function that reads cdparanoia's progress from its stderr as it comes
+# in, without ever blocking on it, so that a cdparanoia that goes quiet
+# for RIP_STALL_SECONDS can be stopped. A stopped track is added to 
+# progress.stalled_tracks. Lines that are not progress (errors and such)
+# are passed on to our stderr. Runs until cdparanoia closes stderr.
+# @param ripper     - the cdparanoia Popen
+# @param progress   - RipProgress of the drive
+def watchRipProgress(ripper, progress):
+    stderr_fd = ripper.stderr.fileno()
+    os.set_blocking(stderr_fd, False)
+    selector = selectors.DefaultSelector()
+    selector.register(stderr_fd, selectors.EVENT_READ)
+
+    pending = b''
+    try:
+        while True:
+            if not selector.select(PROGRESS_POLL_SECONDS):
+                if (RIP_STALL_SECONDS is not None 
+                        and not progress.stalled
+                        and progress.getIdleSeconds() > RIP_STALL_SECONDS):
+                    progress.stalled = True
+                    progress.stalled_tracks.append(progress.track)
+                    print(CDPARA_STALL_ERROR.format(
+                        progress.track, RIP_STALL_SECONDS))
+                    notifyRipProgress(progress)
+                    ripper.kill()
+                continue
+
+            try:
+                chunk = os.read(stderr_fd, CDPARA_PROGRESS_READ_SIZE)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+
+            # cdparanoia redraws its progress bar with carriage returns,
+            # so only the text after the last one is a line of its own
+            lines = (pending+chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                line = line.decode(errors='replace').rpartition('\r')[2]
+                updateRipProgress(progress, line)
+    finally:
+        selector.close()
+        ripper.stderr.close()
+
+# function to update a drive's progress from a line cdparanoia wrote to
+# stderr
+# @param progress   - RipProgress of the drive
+# @param line       - the line, without its newline
+def updateRipProgress(progress, line):
+    message = parseCDParaProgress(line)
+    if message is None:
+        if line.strip() and CDPARA_PROGRESS_BAR not in line:
+            sys.stderr.write(line+NEWLINE)
+        return
+
+    event, name, sector = message
+    progress.last_message = time.monotonic()
+    if event >= CDPARA_EVENT_JITTER:
+        progress.events[name] = progress.events.get(name, 0)+1
+    elif event in (CDPARA_EVENT_WROTE, CDPARA_EVENT_FINISHED):
+        # the position is the last sample written
+        progress.track_done_sectors = min(
+            max(sector-progress.track_start_lsn+1, 0), 
+            progress.track_sectors)
+    notifyRipProgress(progress)
+
+# function to make the RipProgress for ripping a disc
+# @param device - the drive to rip from, or None for the default
+# @param toc    - TableOfContents of the disc, or None
+# @returns RipProgress, or None if there is no TOC to follow it with
+def makeRipProgress(device=None, toc=None):
+    if toc is None:
+        return None
+    return RipProgress(device, toc)
+
+# function to start cdparanoia ripping a single track as raw pcm to its
+# stdout, following its progress when there is a RipProgress for it
+# @param track_number   - the track to rip
+# @param device         - the drive to rip from, or None for the default
+# @param toc            - TableOfContents of the disc, or None
+# @param progress       - RipProgress of the drive, or None
+# @param fast           - True for the fast pass of ADAPTIVE_RIP, False
+#   for a full paranoia rip
+# @returns (cdparanoia Popen, progress thread or None)
+def startCDParaTrack(track_number, device=None, toc=None, progress=None,
+        fast=False):
+    track = None
+    if toc is not None:
+        track = toc.getTrack(track_number)
+    if track is None:
+        progress = None
+
+    progress_flags = list()
+    if progress is not None:
+        progress_flags.append(CMD_CDPARA_FLAG_PROGRESS)
+    ripper = subprocess.Popen(
+        [
+            CMD_CDPARA
+        ] + getCDParaDeviceFlags(device) + progress_flags + 
+        getCDParaParanoiaFlags(fast) + [
+            CMD_CDPARA_FLAG_BATCH,
+            CMD_CDPARA_FLAG_RAW,
+            CMD_CDPARA_FLAG_SELECT_ALL,
+            str(track_number),
+            CMD_CDPARA_STDOUT
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE if progress is not None else None
+    )
+
+    if progress is None:
+        return ripper, None
+    progress.startTrack(track)
+    return ripper, startRipProgress(ripper, progress)
+
+# function to wait for the progress of a track started with 
+# startCDParaTrack() to be read to the end, once cdparanoia has exited
+# @param watcher    - the progress thread, or None
+# @param progress   - RipProgress of the drive, or None
+# @param ok         - True if the track was ripped
+# @param fast       - True if this was the fast pass of ADAPTIVE_RIP
+# @returns True if the fast pass failed or looks suspect and the track 
+#   should be ripped again with full paranoia
+def finishCDParaTrack(watcher, progress, ok, fast=False):
+    if watcher is None:
+        return False
+    watcher.join()
+
+    # a stalled track is already scheduled to be ripped again
+    if fast and not progress.stalled and (not ok or isSuspectRip(progress)):
+        print(ADAPTIVE_RERIP.format(
+            progress.track, describeRipErrors(progress, ok)))
+        return True
+
+    if ok:
+        progress.finishTrack()
+        notifyRipProgress(progress)
+    return False
+
+# function to check if the fast pass of ADAPTIVE_RIP can be used for a 
+# track, which needs its progress followed to count the errors
+# @param track_number   - the track to rip
+# @param toc            - TableOfContents of the disc, or None
+# @param progress       - RipProgress of the drive, or None
+# @returns True if the track should be ripped fast first
+def canRipFast(track_number, toc=None, progress=None):
+    return (
+        ADAPTIVE_RIP 
+        and progress is not None 
+        and toc is not None 
+        and toc.getTrack(track_number) is not None)
+
+# function to describe what went wrong with a fast rip, for the user
+# @param progress   - RipProgress of the drive, after the track
+# @param ok         - True if cdparanoia finished the track
+# @returns string like '3 skip, 12 jitter'
+def describeRipErrors(progress, ok=True):
+    if not ok:
+        return ADAPTIVE_FAILED
+    return ', '.join(
+        ADAPTIVE_EVENT_COUNT.format(count, name) 
+        for name, count in sorted(progress.events.items()))
+
+# function to check if the track a drive just ripped has more errors 
+# than ADAPTIVE_ERROR_EVENTS and ADAPTIVE_MAX_JITTER_PER_MINUTE allow
+# @param progress   - RipProgress of the drive, after the track
+# @returns True if the track should be ripped again
+def isSuspectRip(progress):
+    errors = sum(
+        progress.events.get(name, 0) for name in ADAPTIVE_ERROR_EVENTS)
+    if errors > 0:
+        return True
+
+    jitter = sum(
+        progress.events.get(name, 0) for name in ADAPTIVE_JITTER_EVENTS)
+    minutes = progress.track_sectors/CD_SECTORS_PER_SECOND/60
+    return minutes > 0 and jitter/minutes > ADAPTIVE_MAX_JITTER_PER_MINUTE
+
+# function to get the cdparanoia flags for the speed and paranoia to rip
+# with when ADAPTIVE_RIP is on
+# @param fast   - True for the fast pass, False for full paranoia
+# @returns list of cdparanoia flags
+def getCDParaParanoiaFlags(fast=False):
+    if not ADAPTIVE_RIP:
+        return list()
+
+    flags = list()
+    speed = ADAPTIVE_FAST_SPEED if fast else ADAPTIVE_FULL_SPEED
+    if speed is not None:
+        flags += [CMD_CDPARA_FLAG_SPEED, str(speed)]
+    if fast:
+        flags.append(CMD_CDPARA_FLAG_OVERLAP_ONLY)
+    return flags
+
+# function to get the cdparanoia flags that pick the drive to rip from
+# @param device - the drive, or None for the default drive
+# @returns list of cdparanoia flags
+def getCDParaDeviceFlags(device=None):
+    flags = list()
+    if device is not None:
+        flags += [CMD_CDPARA_FLAG_DEVICE, device]
+    if DRIVE_READ_OFFSET != 0:
+        flags += [CMD_CDPARA_FLAG_OFFSET, str(DRIVE_READ_OFFSET)]
+    return flags
+
+# function that builds the file name for a track, which looks like:
+#   ##_<artist> - <title>.flac
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param profile    - OutputProfile of the file
+# @returns the file name
+def getTrackFileName(tags, index, profile=PROFILE_FLAC):
+    return (
+        NUMBER_FORMAT.format(index+1)+'_'+tags.tracks[index].artist+ \
+        " - "+tags.tracks[index].title+profile.extension
+    )
+
+# function that builds the temporary name a track is written to before
+# it is finished, which looks like:
+#   .##_<artist> - <title>.flac.part
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param profile    - OutputProfile of the file
+# @returns the temporary file name
+def getTrackTempName(tags, index, profile=PROFILE_FLAC):
+    return FLAC_TEMP_NAME.format(getTrackFileName(tags, index, profile))
+
+# function that builds ffmpeg's codec and tag flags for one output of a
+# track, which look like:
+#   -metadata title="Title" -metadata artist="Artist" 
+#   -metadata album="Album" -metadata track=## 
+#   [-metadata ISRC=... -metadata BARCODE=...] -c:a flac -f flac -y
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param profile    - OutputProfile of the output
+# @returns list of ffmpeg flags
+def getFFmpegOutputFlags(tags, index, profile=PROFILE_FLAC):
+    code_flags = list()
+    for code_tag, code in getDiscCodeTags(tags, index):
+        code_flags += [CMD_FFMPEG_FLAG_METADATA, code_tag+code]
+
+    return [
+        CMD_FFMPEG_FLAG_METADATA,
+        CMD_FFMPEG_FLAG_TITLE+tags.tracks[index].title,
+        CMD_FFMPEG_FLAG_METADATA,
+        CMD_FFMPEG_FLAG_ARTIST+tags.tracks[index].artist,
+        CMD_FFMPEG_FLAG_METADATA,
+        CMD_FFMPEG_FLAG_ALBUM+tags.album_title,
+        CMD_FFMPEG_FLAG_METADATA,
+        CMD_FFMPEG_FLAG_TRACK+str(index+1)
+    ] + code_flags + profile.codec_flags + [
+        CMD_FFMPEG_FLAG_FORMAT,
+        profile.ffmpeg_format,
+        CMD_FFMPEG_FLAG_OVERWRITE
+    ]
+
+# function to get the ffmpeg encoder an output profile uses
+# @param profile    - OutputProfile of the output
+# @returns the encoder's name (like 'libopus'), or None if the profile 
+#   leaves it to ffmpeg
+def getProfileEncoder(profile):
+    if CMD_FFMPEG_FLAG_AUDIO_STREAM not in profile.codec_flags[:-1]:
+        return None
+    return profile.codec_flags[
+        profile.codec_flags.index(CMD_FFMPEG_FLAG_AUDIO_STREAM)+1]
+
+# function that builds the outputs of ffmpeg for a track, one for each
+# of OUTPUT_PROFILES, written under their temporary names. ffmpeg's 
+# flags only apply to the output after them, so each gets its own.
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param flac_dir   - the directory to write the tracks to
+# @returns list of ffmpeg flags and output paths
+def getFFmpegOutputs(tags, index, flac_dir='.'):
+    outputs = list()
+    for profile in OUTPUT_PROFILES:
+        outputs += getFFmpegOutputFlags(tags, index, profile)
+        outputs.append(
+            os.path.join(flac_dir, getTrackTempName(tags, index, profile)))
+    return outputs
+
+# function to get the ISRC and BARCODE tags of a track, if 
+# WRITE_DISC_CODE_TAGS is on
+# @param tags   - AlbumData class that holds the tags we will write
+# @param index  - the index of this track in tags (track number - 1)
+# @returns list of (ffmpeg tag flag, value) tuples
+def getDiscCodeTags(tags, index):
+    if not WRITE_DISC_CODE_TAGS:
+        return list()
+    code_tags = list()
+    if tags.tracks[index].isrc is not None:
+        code_tags.append((CMD_FFMPEG_FLAG_ISRC, tags.tracks[index].isrc))
+    if tags.mcn is not None:
+        code_tags.append((CMD_FFMPEG_FLAG_BARCODE, tags.mcn))
+    return code_tags
+
+# function to get the pool to run encoders in. A shared pool is used as 
+# is (and left running when the with block ends), otherwise a new pool 
+# is started
+# @param workers    - max number of encoders, if a new pool is started
+# @param pool       - the shared pool, or None
+# @returns context manager of a concurrent.futures.Executor
+def openEncoderPool(workers, pool=None):
+    if pool is not None:
+        return contextlib.nullcontext(pool)
+    return concurrent.futures.ThreadPoolExecutor(workers)
+
+# function that opens a flac file for writing with soundfile and sets its
+# tags (they have to be set before any audio is written)
+# ASSUMES soundfile is installed
+# @param flac_track     - path of the flac file to write
+# @param title          - track title tag
+# @param artist         - track artist tag
+# @param album          - album title tag
+# @param track_number   - track number tag
+# @param samplerate     - sample rate of the audio
+# @param channels       - number of channels of the audio
+# @param subtype        - soundfile subtype (sample format) of the audio
+# @returns the opened soundfile.SoundFile
+def openFlacNative(flac_track, title, artist, album, track_number, 
+        samplerate=CD_SAMPLE_RATE, channels=CD_CHANNELS, 
+        subtype=NATIVE_FLAC_SUBTYPE):
+    flac = importOptional('soundfile').SoundFile(
+        flac_track, 
+        'w', 
+        samplerate=samplerate, 
+        channels=channels, 
+        subtype=subtype,
+        format=NATIVE_FLAC_FORMAT
+    )
+    flac.title = title
+    flac.artist = artist
+    flac.album = album
+    flac.tracknumber = str(track_number)
+    return flac
+
+# function to check if a track can be encoded inside this process with 
+# soundfile, which needs USE_NATIVE_FLAC on, soundfile installed, flac 
+# as the only output profile, and no tags soundfile cannot write
+# @param tags   - AlbumData class that holds the tags we will write
+# @param index  - the index of this track in tags (track number - 1)
+# @returns true to encode with soundfile, false to use ffmpeg
+def useNativeFlac(tags, index):
+    return (
+        USE_NATIVE_FLAC 
+        and importOptional('soundfile') is not None 
+        and OUTPUT_PROFILES == [PROFILE_FLAC]
+        and not getDiscCodeTags(tags, index))
+
+# function to remove what the encoder wrote of a track that failed, for
+# every output profile
+# @param tags       - AlbumData class that holds the tags we will write
+# @param index      - the index of this track in tags (track number - 1)
+# @param flac_dir   - the directory the tracks were written to
+def removeTrackOutputs(tags, index, flac_dir='.'):
+    for profile in OUTPUT_PROFILES:
+        track_temp = os.path.join(
+            flac_dir, getTrackTempName(tags, index, profile))
+        if os.path.exists(track_temp):
+            os.remove(track_temp)
+
+# function to get the track number from the name cdparanoia gives a wav
+# file, which looks like:
+#   track##.cdda.wav
+# @param wav_track  - name of the wav file
+# @returns the track number, or None if the name is not cdparanoia's
+def parseWavTrackNumber(wav_track):
+    prefix, separator, suffix = CDPARA_TRACK_WAV.partition(NUMBER_FORMAT)
+    number = wav_track[len(prefix):len(wav_track)-len(suffix)]
+    if wav_track.startswith(prefix) and wav_track.endswith(suffix) and \
+            number.isdigit():
+        return int(number)
+    return None
+
+# function to get the exit code of a track's convert from the encoder 
+# pool. A convert that raised (ffmpeg missing, the flac could not be 
+# written, ...) is reported and counted as failed, so it does not stop 
+# the other tracks from being collected
+# @param track_number   - the track's number
+# @param future         - the done future of convertTrack()
+# @returns the encoder's exit code, or FFMPEG_EXCEPTION_EXIT_CODE
+def getConvertExitCode(track_number, future):
+    try:
+        return future.result()
+    except Exception as error:
+        print(FFMPEG_TRACK_EXCEPTION.format(track_number, str(error)))
+        return FFMPEG_EXCEPTION_EXIT_CODE
+
+# function to print an error for every track that failed to convert
+# @param exit_codes - dict of ffmpeg's exit code for each track number
+# @returns the number of tracks that failed
+def reportFailedTracks(exit_codes):
+    failed = 0
+    for track_number in sorted(exit_codes):
+        if exit_codes[track_number] != 0:
+            print(FFMPEG_TRACK_ERROR.format(
+                track_number, 
+                exit_codes[track_number]
+            ))
+            failed += 1
+    return failed
+
+#*** pipelined cdparanoia/ffmpeg MAIN function:
+# function that rips tracks one at a time and converts each one in a
+# separate thread as soon as it is ripped, so the drive and the encoder
+# are both busy at the same time.
+# EXIT NOTE: this function will exit if the tracks on the disc do not
+#   match the number of tracks in tags and the user does not want to 
+#   continue
+# @param tags           - AlbumData class that holds the tags we will write
+# @param toc            - TableOfContents of the disc (or None to use 
+#   the number of tracks in tags)
+# @param wav_dir        - the directory to store the ripped tracks
+# @param workers        - max number of ffmpeg processes to run at once
+# @param device         - the drive to rip from, or None for the default
+# @param flac_dir       - the directory to write the flacs to
+# @param pool           - encoder pool shared with other drives, or None
+#   to start one with the given number of workers
+# @param progress       - RipProgress to follow the rip with, or None to
+#   make one
+# @param journal        - RipJournal of the disc, or None. Tracks an 
+#   earlier run already ripped or encoded are picked up from there
+# @returns dict of ffmpeg's exit code for each track number
+def ripAndConvertTracks(
+        tags, 
+        toc=None, 
+        wav_dir=TEST_DIR, 
+        workers=FFMPEG_WORKERS,
+        device=None,
+        flac_dir='.',
+        pool=None,
+        progress=None,
+        journal=None):
+    # quit if numbers of tracks do not match up
+    confirmTrackCount(tags, getAudioTrackCount(tags, toc), toc)
+
+    wav_queue = queue.Queue(PIPELINE_QUEUE_SIZE)
+    exit_codes = dict()
+    converter = threading.Thread(
+        target=convertTrackQueue, 
+        args=(tags, wav_queue, exit_codes, workers, flac_dir, pool, 
+            journal)
+    )
+    converter.start()
+
+    if progress is None:
+        progress = makeRipProgress(device, toc)
+    try:
+        for track_number, index in getRipSchedule(
+                getTrackIndexes(tags, toc), progress):
+            stage = getResumedStage(journal, track_number)
+            if stage in (JOB_STAGE_ENCODED, JOB_STAGE_MOVED):
+                exit_codes[track_number] = 0
+                continue
+            if stage == JOB_STAGE_RIPPED:
+                wav_track = os.path.join(
+                    wav_dir, CDPARA_TRACK_WAV.format(track_number))
+            else:
+                wav_track = ripTrack(
+                    track_number, wav_dir, device, toc, progress)
+                journalRippedTrack(journal, track_number, wav_track, 
+                    progress)
+            if wav_track is None:
+                print(CDPARA_TRACK_ERROR.format(track_number))
+                continue
+            checksum = None
+            if progress is not None:
+                checksum = progress.checksums.get(track_number)
+            wav_queue.put((track_number, index, wav_track, checksum))
+    finally:
+        # let the converter finish whatever is queued
+        wav_queue.put(None)
+        converter.join()
+
+    reportFailedTracks(exit_codes)
+    return exit_codes
+
+#*** streamed cdparanoia/ffmpeg MAIN function:
+# function that rips tracks one at a time with cdparanoia writing raw pcm
+# to stdout, which is fed straight into the encoder. Only the flac files
+# are ever written to disk.
+# EXIT NOTE: this function will exit if the tracks on the disc do not
+#   match the number of tracks in tags and the user does not want to 
+#   continue
+# @param tags           - AlbumData class that holds the tags we will write
+# @param toc            - TableOfContents of the disc (or None to use 
+#   the number of tracks in tags)
+# @param device         - the drive to rip from, or None for the default
+# @param flac_dir       - the directory to write the flacs to
+# @param progress       - RipProgress to follow the rip with, or None to
+#   make one
+# @param journal        - RipJournal of the disc, or None. Tracks an 
+#   earlier run already encoded are not ripped again
+# @returns dict of the encoder's exit code for each track number
+def ripAndConvertTracksStreamed(tags, toc=None, device=None, flac_dir='.',
+        progress=None, journal=None):
+    # quit if numbers of tracks do not match up
+    confirmTrackCount(tags, getAudioTrackCount(tags, toc), toc)
+
+    exit_codes = dict()
+    if progress is None:
+        progress = makeRipProgress(device, toc)
+    for track_number, index in getRipSchedule(
+            getTrackIndexes(tags, toc), progress):
+        if getResumedStage(journal, track_number) in (
+                JOB_STAGE_ENCODED, JOB_STAGE_MOVED):
+            exit_codes[track_number] = 0
+            continue
+        exit_codes[track_number] = ripAndConvertTrackStreamed(
+            tags, 
+            index,
+            track_number,
+            device,
+            flac_dir,
+            toc,
+            progress
+        )
+        if exit_codes[track_number] == 0:
+            journalRippedTrack(journal, track_number, None, progress)
+            journalEncodedTrack(journal, tags, index, track_number, 
+                flac_dir, 0)
+
+    reportFailedTracks(exit_codes)
+    return exit_codes
+
+# function that rips a single track with cdparanoia writing raw pcm to
+# stdout and encodes it to flac as it arrives, in-process if possible,
+# otherwise by piping it into ffmpeg. The flac is removed if the rip 
+# fails so a partial track is never left behind.
+# @param tags           - AlbumData class that holds the tags we will write
+# @param index          - the index of this track in tags
+# @param track_number   - the track to rip
+# @param device         - the drive to rip from, or None for the default
+# @param flac_dir       - the directory to write the flac to
+# @param toc            - TableOfContents of the disc, or None. Used to
+#   follow the rip's progress and report the track's size in the metrics
+# @param progress       - RipProgress to follow the rip with, or None
+# @returns the encoder's exit code, or cdparanoia's if the rip failed
+def ripAndConvertTrackStreamed(tags, index, track_number, device=None, 
+        flac_dir='.', toc=None, progress=None):
+    fast = canRipFast(track_number, toc, progress)
+    exit_code, rerip = ripAndConvertTrackStreamedPass(
+        tags, index, track_number, device, flac_dir, toc, progress, fast)
+    if rerip:
+        # the flac from the fast pass is overwritten
+        exit_code, _ = ripAndConvertTrackStreamedPass(
+            tags, index, track_number, device, flac_dir, toc, progress)
+    return exit_code
+
+# function that does one cdparanoia rip and encode of a track for 
+# ripAndConvertTrackStreamed()
+# @param tags           - AlbumData class that holds the tags we will write
+# @param index          - the index of this track in tags
+# @param track_number   - the track to rip
+# @param device         - the drive to rip from, or None for the default
+# @param flac_dir       - the directory to write the flac to
+# @param toc            - TableOfContents of the disc, or None
+# @param progress       - RipProgress to follow the rip with, or None
+# @param fast           - True for the fast pass of ADAPTIVE_RIP
+# @returns (the encoder's exit code or cdparanoia's if the rip failed, 
+#   True if the track should be ripped again with full paranoia)
+def ripAndConvertTrackStreamedPass(tags, index, track_number, device=None,
+        flac_dir='.', toc=None, progress=None, fast=False):
+    start = time.monotonic()
+    flac_track = os.path.join(flac_dir, getTrackTempName(tags, index))
+    checksum = makeTrackChecksum(track_number, toc)
+    ripper, watcher = startCDParaTrack(
+        track_number, device, toc, progress, fast)
+
+    if useNativeFlac(tags, index):
+        try:
+            encodeFlacNativeStream(
+                ripper.stdout,
+                flac_track,
+                tags.tracks[index].title,
+                tags.tracks[index].artist,
+                tags.album_title,
+                index+1,
+                checksum
+            )
+            exit_code = 0
+        except RuntimeError as error:
+            # pcm already read from cdparanoia is gone, so there is 
+            # nothing to fall back to
+            print(NATIVE_FLAC_STREAM_ERROR.format(flac_track, str(error)))
+            exit_code = 1
+        ripper.stdout.close()
+    else:
+        # this command reads raw pcm from stdin, it looks like:
+        # ffmpeg -f s16le -ar 44100 -ac 2 -i pipe:0 <flac flags> <output>
+        encoder = subprocess.Popen(
+            [
+                CMD_FFMPEG,
+                CMD_FFMPEG_FLAG_FORMAT,
+                CMD_FFMPEG_PCM_FORMAT,
+                CMD_FFMPEG_FLAG_RATE,
+                str(CD_SAMPLE_RATE),
+                CMD_FFMPEG_FLAG_CHANNELS,
+                str(CD_CHANNELS),
+                CMD_FFMPEG_FLAG_INPUT,
+                CMD_FFMPEG_STDIN
+            ] + getFFmpegOutputs(tags, index, flac_dir),
+            stdin=ripper.stdout if checksum is None else subprocess.PIPE
+        )
+
+        # without checksums, only ffmpeg should hold the read end of the 
+        # pipe, so cdparanoia gets a broken pipe if ffmpeg dies. With 
+        # them, the pcm passes through here on its way to ffmpeg
+        if checksum is not None:
+            pipeTrackPCM(ripper.stdout, encoder.stdin, checksum)
+        ripper.stdout.close()
+        exit_code = encoder.wait()
+
+    if exit_code != 0:
+        # encoder failed, no point in letting cdparanoia keep reading
+        ripper.kill()
+        ripper.wait()
+    elif ripper.wait() != 0:
+        print(CDPARA_TRACK_ERROR.format(track_number))
+        exit_code = ripper.returncode
+    rerip = finishCDParaTrack(watcher, progress, exit_code == 0, fast)
+    keepTrackChecksum(progress, checksum, exit_code == 0 and not rerip)
+
+    if exit_code != 0:
+        removeTrackOutputs(tags, index, flac_dir)
+
+    track_size = None
+    if toc is not None and toc.getTrack(track_number) is not None:
+        track_size = toc.getTrack(track_number).getSize()
+    recordMetric(STAGE_RIP_ENCODE, start, track_size, True, device, 
+        track_number, exit_code == 0, 
+        getChecksumDetails(checksum, exit_code == 0))
+    return exit_code, rerip
+
+#*** disc MAIN function:
+# function that rips the disc in a drive, converts it to flac and moves 
+# the flacs into their album folder. Every path is made absolute and 
+# passed down, nothing depends on the current directory, so discs can be
+# ripped from several threads at once. Since we are using a context
+# manager to handle our temp dirs, this context continues into flac 
+# conversion and tag writing. A disc already in the archive can be 
+# skipped (see SKIP_ARCHIVED_DISCS), and one an earlier run failed
+# part way through is picked up where it stopped (see RESUME_RIPS).
+# EXIT NOTE: this function will exit the program if a required program 
+#   is missing
+# EXIT NOTE: this function calls generateTags(), which may exit the 
+#   program, when no tags are given
+# @param device     - the drive to rip from, or None for the default
+# @param out_dir    - the directory to make the album folder in, or 
+#   None for OUTPUT_DIR
+# @param tags       - AlbumData class that holds the tags we will write,
+#   or None to generate them from cd-info's output
+# @param cd_info    - CDInfoReport of cd-info's output, or None to call 
+#   cd-info
+# @param pool       - encoder pool shared with other drives, or None to
+#   start one
+# @param flac_dir   - the directory to write the flacs to before they are
+#   moved, or None to write them straight to the album folder
+# @returns path of the album folder, or None if no track converted
+def ripDisc(device=None, out_dir=None, tags=None, cd_info=None, 
+        pool=None, flac_dir=None):
+    if not SKIP_PROGRAM_TEST:
+        checkOutputProfiles()
+
+    if out_dir is None:
+        out_dir = OUTPUT_DIR
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    if cd_info is None and not SKIP_CD_INFO:
+        cd_info = parseCDInfo(readCDInfo(device))
+    if tags is None and cd_info is not None:
+        with PROMPT_LOCK:
+            tags = generateTags(cd_info)
+
+    toc = None
+    disc_size = None
+    if cd_info is not None:
+        toc = parseTOC(cd_info)
+    if toc is not None:
+        disc_size = getDiscSize(toc)
+
+    if SKIP_ARCHIVED_DISCS:
+        archived_dir = findArchivedDisc(toc, tags)
+        if archived_dir is not None:
+            print(ARCHIVE_DISC_SKIPPED.format(
+                getAccurateRipId(toc), archived_dir))
+            if BATCH_MODE:
+                logBatchDecision(ARCHIVE_DISC_SKIPPED.format(
+                    getAccurateRipId(toc), archived_dir).strip())
+            return archived_dir
+
+    # encoders write straight to the album folder, under temporary names
+    album_dir = getAlbumDir(tags, out_dir, OUTPUT_PROFILES[0])
+    os.makedirs(album_dir, exist_ok=True)
+    if flac_dir is not None:
+        flac_dir = os.path.abspath(flac_dir)
+        os.makedirs(flac_dir, exist_ok=True)
+    encode_dir = album_dir if flac_dir is None else flac_dir
+
+    exit_codes = dict()
+    progress = makeRipProgress(device, toc)
+    checksums = dict() if progress is None else progress.checksums
+    scratch_dir = os.path.abspath(getScratchDir(disc_size, out_dir))
+    with openRipJob(toc, scratch_dir) as (journal, wav_dir):
+        resumeRipJournal(journal, tags, toc, encode_dir, out_dir, progress)
+        if STREAM_RIP_CONVERT and not SKIP_CD_PARA and not SKIP_FFMPEG:
+            print('Ripping and converting tracks to flac...'+HEADER_BAR)
+            exit_codes = ripAndConvertTracksStreamed(
+                tags, toc, device, encode_dir, progress, journal)
+        elif PIPELINE_RIP_CONVERT and not SKIP_CD_PARA and not SKIP_FFMPEG:
+            print('Ripping and converting tracks to flac...'+HEADER_BAR)
+            exit_codes = ripAndConvertTracks(tags, toc, wav_dir, 
+                device=device, flac_dir=encode_dir, pool=pool, 
+                progress=progress, journal=journal)
+        else:
+            if SKIP_CD_PARA:
+                print('Skipping ripping tracks'+HEADER_BAR)
+            else:
+                print('Ripping tracks from disc...'+HEADER_BAR)
+                ripTracks(wav_dir, device, toc, progress, journal)
+                
+            if SKIP_FFMPEG:
+                print('Skipping converting tracks')
+            else:
+                print('Converting tracks to flac...'+HEADER_BAR)
+                exit_codes = convertTracks(tags,wav_dir,toc=toc,
+                    flac_dir=encode_dir,pool=pool,
+                    checksums=checksums,journal=journal)
+        album_dir = moveFlacsToFolder(
+            tags, exit_codes, toc, flac_dir, out_dir)
+        finishRipJournal(journal, tags, toc, exit_codes, encode_dir)
+
+    if album_dir is not None:
+        writeChecksums(album_dir, tags, toc, checksums, exit_codes)
+        recordArchivedAlbum(tags, toc, checksums, exit_codes, out_dir)
+    return album_dir
+
+#*** drive MAIN function:
+# function that rips the disc in a drive and, in batch mode, every disc 
+# put in after it. A disc that fails in batch mode is logged and skipped,
+# so one bad disc does not stop the rest of the queue
+# @param device     - the drive to rip from, or None for the default
+# @param cd_info    - CDInfoReport of the disc in the drive
+# @param tags       - AlbumData class that holds the tags we will write
+# @param out_dir    - the directory to make the album folders in, or 
+#   None for OUTPUT_DIR
+# @param flac_dir   - the directory to write the flacs to before they are
+#   moved, or None to write them straight to the album folder
+# @param pool       - encoder pool shared with other drives, or None to
+#   start one per disc
+def ripDrive(device, cd_info, tags, out_dir=None, flac_dir=None, 
+        pool=None):
+    while True:
+        try:
+            ripDisc(device, out_dir, tags, cd_info, pool, flac_dir)
+        except (OSError, subprocess.SubprocessError) as error:
+            if not BATCH_MODE:
+                raise
+            logBatchDecision(BATCH_DISC_ERROR.format(
+                str(getDiscId(cd_info)), str(error)))
+
+        if not BATCH_MODE:
+            return
+        ejectDisc(device)
+        print(BATCH_WAITING)
+        cd_info = waitForNextDisc(device)
+        with PROMPT_LOCK:
+            tags = generateTags(cd_info)
+
+#*** multi-drive MAIN function:
+# function that rips from several drives at once, each in its own 
+# thread. Every drive's tracks are converted in 
+# one shared pool of FFMPEG_WORKERS encoders, which takes tracks in the
+# order they were ripped, so the cores are split between the discs.
+# (Streamed rips encode in each drive's own thread instead.)
+# @param devices    - list of drives (like /dev/sr0)
+# @param out_dir    - the directory to make the album folders in, or 
+#   None for OUTPUT_DIR
+def ripDrives(devices, out_dir=None):
+    with concurrent.futures.ThreadPoolExecutor(FFMPEG_WORKERS) as pool:
+        drives = list()
+        for device in devices:
+            drive = threading.Thread(
+                target=startDrive, 
+                args=(device, out_dir, pool), 
+                name=device
+            )
+            drive.start()
+            drives.append(drive)
+        for drive in drives:
+            drive.join()
+
+# function that waits for a disc in the given drive, picks its tags and
+# then rips it with ripDrive(). Meant to run in its own thread
+# @param device     - the drive to rip from
+# @param out_dir    - the directory to make the album folders in
+# @param pool       - encoder pool shared with other drives
+def startDrive(device, out_dir, pool):
+    cd_info = waitForNextDisc(device, False)
+    with PROMPT_LOCK:
+        print(DRIVE_HEADER.format(device))
+        tags = generateTags(cd_info)
+    ripDrive(device, cd_info, tags, out_dir, pool=pool)
+
+# function that calls cdparanoia to rip a single track. cdparanoia 
+# writes raw pcm to stdout, which is written to the wav file by 
+# writeWavTrack(), so the file can be preallocated from the TOC
+# @param track_number   - the track to rip
+# @param wav_dir        - the directory to store the ripped track
+# @param device         - the drive to rip from, or None for the default
+# @param toc            - TableOfContents of the disc, or None if the 
+#   track's size is unknown
+# @param progress       - RipProgress to follow the rip with, or None
+# @returns path to the ripped wav file, or None if cdparanoia failed
+def ripTrack(track_number, wav_dir=TEST_DIR, device=None, toc=None, 
+        progress=None):
+    fast = canRipFast(track_number, toc, progress)
+    wav_track, rerip = ripTrackPass(
+        track_number, wav_dir, device, toc, progress, fast)
+    if rerip:
+        wav_track, _ = ripTrackPass(
+            track_number, wav_dir, device, toc, progress)
+    return wav_track
+
+# function that does one cdparanoia rip of a track for ripTrack()
+# @param track_number   - the track to rip
+# @param wav_dir        - the directory to store the ripped track
+# @param device         - the drive to rip from, or None for the default
+# @param toc            - TableOfContents of the disc, or None
+# @param progress       - RipProgress to follow the rip with, or None
+# @param fast           - True for the fast pass of ADAPTIVE_RIP
+# @returns (path to the ripped wav file or None if cdparanoia failed, 
+#   True if the track should be ripped again with full paranoia)
+def ripTrackPass(track_number, wav_dir=TEST_DIR, device=None, toc=None, 
+        progress=None, fast=False):
+    start = time.monotonic()
+    wav_track = os.path.join(wav_dir, CDPARA_TRACK_WAV.format(track_number))
+    data_size = None
+    if toc is not None and toc.getTrack(track_number) is not None:
+        data_size = toc.getTrack(track_number).getSize()
+
+    checksum = makeTrackChecksum(track_number, toc)
+    ripper, watcher = startCDParaTrack(
+        track_number, device, toc, progress, fast)
+    try:
+        written = writeWavTrack(
+            ripper.stdout, wav_track, data_size, checksum)
+    except OSError:
+        ripper.kill()
+        ripper.wait()
+        if os.path.exists(wav_track):
+            os.remove(wav_track)
+        raise
+    finally:
+        ripper.stdout.close()
+
+    ok = ripper.wait() == 0
+    rerip = finishCDParaTrack(watcher, progress, ok, fast)
+    keepTrackChecksum(progress, checksum, ok and not rerip)
+    recordMetric(STAGE_RIP, start, written, True, device, track_number, ok,
+        getChecksumDetails(checksum, ok))
+    if not ok:
+        os.remove(wav_track)
+        return None, rerip
+    return wav_track, rerip
+
+#*** cdparanoia MAIN function:
+# function that calls cdparanoia and rips tracks. With a TOC, the audio
+# tracks are ripped one at a time by ripTrack() so each wav file can be
+# preallocated, otherwise cdparanoia rips (and writes) the whole disc.
+# @param wav_dir    - the directory to store the ripped tracks
+# @param device     - the drive to rip from, or None for the default
+# @param toc        - TableOfContents of the disc, or None
+# @param progress   - RipProgress to follow the rip with, or None to make
+#   one
+# @param journal    - RipJournal of the disc, or None. Tracks an earlier
+#   run already got through are not ripped again
+def ripTracks(wav_dir=TEST_DIR, device=None, toc=None, progress=None, 
+        journal=None):
+    if toc is not None and PREALLOCATE_WAV:
+        if progress is None:
+            progress = makeRipProgress(device, toc)
+        track_indexes = [
+            (track.number, None) for track in toc.getAudioTracks()]
+        for track_number, _ in getRipSchedule(track_indexes, progress):
+            if getResumedStage(journal, track_number) is not None:
+                continue
+            wav_track = ripTrack(track_number, wav_dir, device, toc, progress)
+            if wav_track is None:
+                print(CDPARA_TRACK_ERROR.format(track_number))
+            journalRippedTrack(journal, track_number, wav_track, progress)
+        return
+
+    # rip inside wav_dir. wav_dir is not always a subdirectory of the 
+    # current directory, so we cant chdir there and back with '..'
+    start = time.monotonic()
+    completed = subprocess.run(
+        [
+            CMD_CDPARA
+        ] + getCDParaDeviceFlags(device) + [
+            CMD_CDPARA_FLAG_BATCH,
+            CMD_CDPARA_FLAG_SELECT_ALL
+        ],
+        cwd=wav_dir
+    )
+
+    # the whole disc is one stage here, sized by the wavs it left behind
+    ripped_bytes = 0
+    for file_name in os.listdir(wav_dir):
+        if file_name.endswith(CDPARA_WAV_EXT):
+            ripped_bytes += os.path.getsize(
+                os.path.join(wav_dir, file_name))-WAV_HEADER_SIZE
+    recordMetric(STAGE_RIP, start, ripped_bytes, True, device, 
+        ok=completed.returncode == 0)
+
+# function that writes raw cd pcm read from the given stream to a wav
+# file. When the size of the pcm is known, the file is preallocated to 
+# its final size first (if the filesystem supports it) so it is not 
+# fragmented by the other files being written at the same time. The pcm
+# is written WAV_WRITE_BLOCK_SIZE at a time, with the first block cut 
+# short by the header size so every write after it starts on a block
+# boundary. The header is rewritten at the end if the size was not 
+# known, or turned out different.
+# @param pcm_stream - binary file object of 16-bit little endian stereo 
+#   pcm (like cdparanoia's raw output)
+# @param wav_track  - path of the wav file to write
+# @param data_size  - expected size of the pcm in bytes, or None
+# @param checksum   - TrackChecksum to add the pcm to, or None
+# @returns size of the pcm written in bytes
+def writeWavTrack(pcm_stream, wav_track, data_size=None, checksum=None):
+    with open(wav_track, 'wb') as wav:
+        if data_size is not None and PREALLOCATE_WAV and \
+                hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(
+                    wav.fileno(), 0, WAV_HEADER_SIZE+data_size)
+            except OSError:
+                # not supported here, the file is just not preallocated
+                pass
+
+        wav.write(makeWavHeader(data_size or 0))
+        written = 0
+        block_size = WAV_WRITE_BLOCK_SIZE-WAV_HEADER_SIZE
+        while True:
+            block = pcm_stream.read(block_size)
+            if not block:
+                break
+            if checksum is not None:
+                checksum.update(block)
+            wav.write(block)
+            written += len(block)
+            block_size = WAV_WRITE_BLOCK_SIZE
+
+        # drop whatever was preallocated but not written
+        wav.truncate(WAV_HEADER_SIZE+written)
+        if written != data_size:
+            wav.seek(0)
+            wav.write(makeWavHeader(written))
+
+    return written
+
+# function that builds the 44 byte header of a cd audio wav file
+# @param data_size  - size of the pcm in bytes
+# @returns the header
+def makeWavHeader(data_size):
+    return struct.pack(
+        WAV_HEADER_FORMAT,
+        b'RIFF', 
+        WAV_HEADER_SIZE-8+data_size, 
+        b'WAVE',
+        b'fmt ', 
+        16,                 # fmt chunk size
+        1,                  # pcm
+        CD_CHANNELS, 
+        CD_SAMPLE_RATE, 
+        CD_SAMPLE_RATE*CD_BYTES_PER_FRAME, 
+        CD_BYTES_PER_FRAME, 
+        WAV_BITS_PER_SAMPLE,
+        b'data', 
+        data_size
+    )
+
+### cdparanoia/ffmpeg flow  ============================================
+
+# function that runs the cdparanoia/ffmpeg part of the program
+# @param cd_info    - CDInfoReport of cd-info's output, or None
+# @param tags       - AlbumData class that holds the tags we will write
+def runRip(cd_info, tags):
+    if DRIVES:
+        ripDrives(DRIVES, OUTPUT_DIR)
+    else:
+        ripDrive(None, cd_info, tags, OUTPUT_DIR)
+
+########################################################################
+### program flow #######################################################
+########################################################################
+
+#*** program MAIN function:
+# function that runs the whole program: checks the required programs, 
+# reads the tags and rips the disc. Nothing runs when this file is only
+# imported.
+def main():
+    runProgramTest()
+    cd_info, tags = runCDInfo()
+    runRip(cd_info, tags)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+tests for the archive index: recording a ripped album and finding the
+disc again, only while its tags, codec flags and files are unchanged.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cd_rip_conv_tag import core
+from cd_rip_conv_tag.core import (
+    OUTPUT_PROFILES,
+    TrackChecksum,
+    findArchivedDisc,
+    getAlbumDir,
+    getArchivedDiscTags,
+    getTrackFileName,
+    getTrackIndexes,
+    parseCDDB,
+    parseCDInfo,
+    parseTOC,
+    readArchiveEntry,
+    recordArchivedAlbum
+)
+
+### constants   ========================================================
+
+SAMPLE_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'cd-info-sample-output')
+
+########################################################################
+### tests ##############################################################
+########################################################################
+
+class ArchiveIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.out_dir = os.path.join(temp_dir.name, 'music')
+        self.index_path = os.path.join(temp_dir.name, 'archive')
+        self.addCleanup(self.closeIndex)
+
+        with open(SAMPLE_OUTPUT) as sample:
+            cd_info = parseCDInfo(sample.read())
+        self.toc = parseTOC(cd_info)
+        self.tags = parseCDDB(cd_info)
+
+        # every track ripped, with a different checksum each, and its
+        # files in the album folder
+        self.checksums = dict()
+        self.exit_codes = dict()
+        for track_number, index in getTrackIndexes(self.tags, self.toc):
+            checksum = TrackChecksum(track_number, 0, False, False)
+            checksum.samples = track_number
+            checksum.crc32 = track_number
+            self.checksums[track_number] = checksum
+            self.exit_codes[track_number] = 0
+            for profile in OUTPUT_PROFILES:
+                album_dir = getAlbumDir(self.tags, self.out_dir, profile)
+                os.makedirs(album_dir, exist_ok=True)
+                with open(os.path.join(album_dir,
+                        getTrackFileName(self.tags, index, profile)), 'w'):
+                    pass
+
+    # function to close the archive index the test opened
+    def closeIndex(self):
+        archive = core.ARCHIVE_INDEX_HANDLES.pop(self.index_path, None)
+        if archive is not None:
+            archive.close()
+
+    # function to record the album in the test's archive index
+    def recordAlbum(self):
+        recordArchivedAlbum(self.tags, self.toc, self.checksums,
+            self.exit_codes, self.out_dir, self.index_path)
+
+    def testFindArchivedDisc(self):
+        self.recordAlbum()
+        self.assertEqual(
+            findArchivedDisc(self.toc, self.tags, self.index_path),
+            getAlbumDir(self.tags, self.out_dir, OUTPUT_PROFILES[0]))
+
+    def testArchivedDiscTags(self):
+        self.recordAlbum()
+        tags = getArchivedDiscTags(self.toc, self.index_path)
+        self.assertEqual(tags.album_title, self.tags.album_title)
+        self.assertEqual(
+            [track.title for track in tags.tracks],
+            [track.title for track in self.tags.tracks])
+
+    def testOtherTags(self):
+        self.recordAlbum()
+        self.tags.tracks[2].title = 'Another Title'
+        self.assertIsNone(
+            findArchivedDisc(self.toc, self.tags, self.index_path))
+
+    def testOtherAlbumArtist(self):
+        self.recordAlbum()
+        self.tags.album_artist = 'Another Artist'
+        self.assertIsNone(
+            findArchivedDisc(self.toc, self.tags, self.index_path))
+
+    def testMissingFile(self):
+        self.recordAlbum()
+        os.remove(os.path.join(
+            getAlbumDir(self.tags, self.out_dir, OUTPUT_PROFILES[0]),
+            getTrackFileName(self.tags, 0, OUTPUT_PROFILES[0])))
+        self.assertIsNone(
+            findArchivedDisc(self.toc, self.tags, self.index_path))
+        self.assertIsNone(getArchivedDiscTags(self.toc, self.index_path))
+
+    def testFailedTrack(self):
+        # a disc is only recorded once every track was ripped, but the
+        # tracks that were are
+        self.exit_codes[3] = 1
+        self.recordAlbum()
+        self.assertIsNone(
+            findArchivedDisc(self.toc, self.tags, self.index_path))
+        self.assertIsNotNone(readArchiveEntry(
+            core.getArchiveTrackKey(self.checksums[1]), self.index_path))
+
+    def testIndexOff(self):
+        with mock.patch.object(core, 'ARCHIVE_INDEX', None):
+            recordArchivedAlbum(self.tags, self.toc, self.checksums,
+                self.exit_codes, self.out_dir)
+            self.assertIsNone(findArchivedDisc(self.toc, self.tags))
+        self.assertFalse(os.path.exists(self.index_path+'.dat'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+tests for parsing cd-info's output, and the table of contents and disc
+IDs worked out from it, against cd-info-sample-output.
+
+The disc IDs were worked out by hand from the sample's track list (LSNs
+0, 16015, ... 149772 and the leadout at 171099), the CDDB one matches
+what cd-info printed for the disc.
+"""
+
+import os
+import unittest
+
+from cd_rip_conv_tag.core import (
+    NAME_CDDB,
+    NAME_CD_TEXT,
+    addDiscDetails,
+    getAccurateRipId,
+    parseCDDB,
+    parseCDInfo,
+    parseCDTEXT,
+    parseTOC
+)
+
+### constants   ========================================================
+
+SAMPLE_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'cd-info-sample-output')
+SAMPLE_TRACKS = 11
+SAMPLE_LEADOUT_LSN = 171099
+SAMPLE_CDDB_ID = '9c08e90b'
+SAMPLE_ACCURATERIP_ID = '011-000f587a-00854833-9c08e90b'
+
+########################################################################
+### functions ##########################################################
+########################################################################
+
+# function that parses cd-info-sample-output
+# @returns CDInfoReport of the sample
+def parseSample():
+    with open(SAMPLE_OUTPUT) as sample:
+        return parseCDInfo(sample.read())
+
+########################################################################
+### tests ##############################################################
+########################################################################
+
+class ParseCDInfoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cd_info = parseSample()
+
+    def testReport(self):
+        self.assertTrue(self.cd_info.has_analysis_report)
+        self.assertEqual(self.cd_info.cddb_matches, 1)
+        self.assertEqual(self.cd_info.first_track, 1)
+        self.assertEqual(self.cd_info.last_track, SAMPLE_TRACKS)
+        self.assertEqual(self.cd_info.leadout_lsn, SAMPLE_LEADOUT_LSN)
+        self.assertEqual(len(self.cd_info.track_list), SAMPLE_TRACKS)
+        self.assertEqual(len(self.cd_info.cddb_tracks), SAMPLE_TRACKS)
+        self.assertEqual(len(self.cd_info.cd_text_tracks), SAMPLE_TRACKS)
+
+    def testDiscCodes(self):
+        self.assertEqual(self.cd_info.mcn, '0093624980605')
+        self.assertEqual(self.cd_info.isrcs[1], 'USWB10901115')
+        self.assertEqual(self.cd_info.isrcs[2], 'USWB10901087')
+
+    def testCDDB(self):
+        album = parseCDDB(self.cd_info)
+        self.assertEqual(album.tag_source, NAME_CDDB)
+        self.assertEqual(album.album_artist, 'Taking Back Sunday')
+        self.assertEqual(album.album_title, 'New Again')
+        self.assertEqual(album.number_of_tracks, SAMPLE_TRACKS)
+        self.assertEqual(album.tracks[0].title, 'New Again')
+        self.assertEqual(album.tracks[1].title, 'Sink Into Me')
+        self.assertEqual(album.tracks[1].artist, 'Taking Back Sunday')
+        self.assertFalse(album.has_multiple_artists)
+
+    def testCDTEXT(self):
+        album = parseCDTEXT(self.cd_info)
+        self.assertEqual(album.tag_source, NAME_CD_TEXT)
+        self.assertEqual(album.album_artist, 'TAKING BACK SUNDAY')
+        self.assertEqual(album.album_title, 'NEW AGAIN')
+        self.assertEqual(album.number_of_tracks, SAMPLE_TRACKS)
+        self.assertEqual(
+            album.tracks[0].title, 'NEW AGAIN - TAKING BACK SUNDAY')
+
+    def testQuotedCDTEXT(self):
+        with open(SAMPLE_OUTPUT) as sample:
+            text = sample.read().replace(
+                '\tTITLE: NEW AGAIN\n', "\tTITLE: 'NEW AGAIN'\n")
+        self.assertEqual(
+            parseCDTEXT(parseCDInfo(text)).album_title, 'NEW AGAIN')
+
+    def testAddDiscDetails(self):
+        album = addDiscDetails(parseCDDB(self.cd_info), self.cd_info)
+        self.assertEqual(album.mcn, '0093624980605')
+        self.assertEqual(album.tracks[0].isrc, 'USWB10901115')
+        self.assertEqual(album.tracks[1].start_lsn, 16015)
+
+    def testNoAnalysisReport(self):
+        cd_info = parseCDInfo('cd-info version 2.1.0\n')
+        self.assertFalse(cd_info.has_analysis_report)
+        self.assertIsNone(parseTOC(cd_info))
+
+class TableOfContentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.toc = parseTOC(parseSample())
+
+    def testTracks(self):
+        self.assertEqual(len(self.toc.tracks), SAMPLE_TRACKS)
+        self.assertEqual(self.toc.tracks[0].start_lsn, 0)
+        self.assertEqual(self.toc.tracks[0].length, 16015)
+        self.assertEqual(self.toc.tracks[1].length, 29815-16015)
+        self.assertEqual(
+            self.toc.tracks[-1].length, SAMPLE_LEADOUT_LSN-149772)
+        self.assertTrue(all(track.isAudio() for track in self.toc.tracks))
+
+    def testFrameOffsets(self):
+        offsets = self.toc.getFrameOffsets()
+        self.assertEqual(offsets[0], 150)
+        self.assertEqual(offsets[1], 16165)
+
+    def testCDDBDiscId(self):
+        self.assertEqual(self.toc.getCDDBDiscId(), SAMPLE_CDDB_ID)
+
+    def testAccurateRipIds(self):
+        self.assertEqual(
+            self.toc.getAccurateRipIds(),
+            (SAMPLE_TRACKS, 0x000f587a, 0x00854833))
+        self.assertEqual(getAccurateRipId(self.toc), SAMPLE_ACCURATERIP_ID)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+tests for the CRC32 and AccurateRip checksums worked out while ripping.
+
+The AccurateRip vectors are worked out by hand from the algorithm: 
+samples are counted from 1 and each 32-bit sample is multiplied by its 
+position, the first track leaves out its first 2939 samples (so it 
+starts at sample 2940) and the last track its last 2940.
+"""
+
+import unittest
+import zlib
+
+from cd_rip_conv_tag.core import TrackChecksum
+
+### constants   ========================================================
+
+TRACK_SAMPLES = 3000
+SAMPLE_ONE = b'\x01\x00\x00\x00' # 32-bit sample of 1
+SAMPLE_MAX = b'\xff\xff\xff\xff' # 32-bit sample of 0xffffffff
+BLOCK_SIZE = 1001 # not a whole number of samples
+
+########################################################################
+### functions ##########################################################
+########################################################################
+
+# function that works out the checksums of a track, fed to TrackChecksum
+# BLOCK_SIZE bytes at a time
+# @param pcm        - the track's pcm
+# @param is_first   - True if this is the first audio track
+# @param is_last    - True if this is the last audio track
+# @returns the TrackChecksum
+def checksumTrack(pcm, is_first, is_last):
+    checksum = TrackChecksum(
+        1, len(pcm)//len(SAMPLE_ONE), is_first, is_last)
+    for start in range(0, len(pcm), BLOCK_SIZE):
+        checksum.update(pcm[start:start+BLOCK_SIZE])
+    return checksum
+
+########################################################################
+### tests ##############################################################
+########################################################################
+
+class TrackChecksumTest(unittest.TestCase):
+
+    def testFirstTrack(self):
+        # sum of 2940..3000
+        checksum = checksumTrack(SAMPLE_ONE*TRACK_SAMPLES, True, False)
+        self.assertEqual(checksum.accuraterip_v1, 181170)
+        self.assertEqual(checksum.accuraterip_v2, 181170)
+
+    def testMiddleTrack(self):
+        # sum of 1..3000
+        checksum = checksumTrack(SAMPLE_ONE*TRACK_SAMPLES, False, False)
+        self.assertEqual(checksum.accuraterip_v1, 4501500)
+        self.assertEqual(checksum.accuraterip_v2, 4501500)
+
+    def testLastTrack(self):
+        # sum of 1..60
+        checksum = checksumTrack(SAMPLE_ONE*TRACK_SAMPLES, False, True)
+        self.assertEqual(checksum.accuraterip_v1, 1830)
+        self.assertEqual(checksum.accuraterip_v2, 1830)
+
+    def testSingleTrackDisc(self):
+        # sum of 2940..3060
+        checksum = checksumTrack(SAMPLE_ONE*6000, True, True)
+        self.assertEqual(checksum.accuraterip_v1, 363000)
+        self.assertEqual(checksum.accuraterip_v2, 363000)
+
+    def testFirstTrackHighBits(self):
+        # each product m*0xffffffff has low 32 bits 2**32-m and high 32
+        # bits m-1, so v1 is -(sum of 2940..3000) and v2 is -(61 samples)
+        checksum = checksumTrack(SAMPLE_MAX*TRACK_SAMPLES, True, False)
+        self.assertEqual(checksum.accuraterip_v1, 0xfffd3c4e)
+        self.assertEqual(checksum.accuraterip_v2, 0xffffffc3)
+
+    def testMiddleTrackHighBits(self):
+        checksum = checksumTrack(SAMPLE_MAX*TRACK_SAMPLES, False, False)
+        self.assertEqual(checksum.accuraterip_v1, 0xffbb5004)
+        self.assertEqual(checksum.accuraterip_v2, 0xfffff448)
+
+    def testCRC32(self):
+        pcm = bytes(range(256))*47
+        checksum = checksumTrack(pcm, True, True)
+        self.assertEqual(checksum.crc32, zlib.crc32(pcm))
+        self.assertEqual(checksum.samples, len(pcm)//len(SAMPLE_ONE))
+
+    def testToDict(self):
+        checksum = checksumTrack(SAMPLE_ONE*TRACK_SAMPLES, True, False)
+        self.assertEqual(
+            checksum.toDict()['accuraterip_v1'], '{:08x}'.format(181170))
+
+if __name__ == '__main__':
+    unittest.main()
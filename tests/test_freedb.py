@@ -0,0 +1,124 @@
+"""
+tests for looking discs up in a local freedb dump, through its index.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cd_rip_conv_tag.core import (
+    NAME_FREEDB,
+    lookupFreedb,
+    parseCDInfo,
+    parseFreedbRecord,
+    parseTOC
+)
+
+### constants   ========================================================
+
+SAMPLE_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'cd-info-sample-output')
+SAMPLE_CDDB_ID = '9c08e90b'
+
+########################################################################
+### functions ##########################################################
+########################################################################
+
+# function that builds a freedb record
+# @param disc_ids       - the record's DISCID line
+# @param frame_offsets  - list of the track frame offsets
+# @param disc_title     - the record's DTITLE
+# @param titles         - list of the track titles
+# @returns the record text
+def makeRecord(disc_ids, frame_offsets, disc_title, titles):
+    lines = ['# xmcd', '#', '# Track frame offsets:']
+    lines += ['#\t{:d}'.format(offset) for offset in frame_offsets]
+    lines += ['#', '# Disc length: 2283 seconds', '#']
+    lines += ['DISCID='+disc_ids, 'DTITLE='+disc_title]
+    lines += [
+        'TTITLE{:d}={:s}'.format(index, title)
+        for index, title in enumerate(titles)
+    ]
+    return '\n'.join(lines)+'\n'
+
+########################################################################
+### tests ##############################################################
+########################################################################
+
+class FreedbTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(SAMPLE_OUTPUT) as sample:
+            self.toc = parseTOC(parseCDInfo(sample.read()))
+        self.frame_offsets = self.toc.getFrameOffsets()
+        self.titles = [
+            'Track {:d}'.format(track_number)
+            for track_number in range(1, len(self.frame_offsets)+1)
+        ]
+
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dump_path = os.path.join(temp_dir.name, 'freedb')
+
+    # function to write the test's freedb dump
+    # @param records    - list of record texts
+    def writeDump(self, records):
+        with open(self.dump_path, 'w') as dump:
+            dump.write(''.join(records))
+
+    def testParseRecord(self):
+        frame_offsets, album = parseFreedbRecord(makeRecord(
+            SAMPLE_CDDB_ID, self.frame_offsets,
+            'Taking Back Sunday / New Again', self.titles))
+        self.assertEqual(frame_offsets, self.frame_offsets)
+        self.assertEqual(album.tag_source, NAME_FREEDB)
+        self.assertEqual(album.album_artist, 'Taking Back Sunday')
+        self.assertEqual(album.album_title, 'New Again')
+        self.assertEqual(album.tracks[0].title, 'Track 1')
+        self.assertEqual(album.tracks[0].artist, 'Taking Back Sunday')
+
+    def testVariousArtists(self):
+        titles = ['Artist {:d} / Title'.format(track_number)
+            for track_number in range(1, len(self.frame_offsets)+1)]
+        frame_offsets, album = parseFreedbRecord(makeRecord(
+            SAMPLE_CDDB_ID, self.frame_offsets, 'Various / Hits', titles))
+        self.assertEqual(album.tracks[1].artist, 'Artist 2')
+        self.assertEqual(album.tracks[1].title, 'Title')
+        self.assertTrue(album.has_multiple_artists)
+
+    def testLookupClosestRecord(self):
+        # the same disc ID twice, the second one with the disc's offsets,
+        # and disc IDs that do not fit in the index
+        far_offsets = [offset+600 for offset in self.frame_offsets]
+        self.writeDump([
+            makeRecord('00000001,'+SAMPLE_CDDB_ID, far_offsets,
+                'Wrong / Album', self.titles),
+            makeRecord('1ffffffff,zz', self.frame_offsets,
+                'Bad / Ids', self.titles),
+            makeRecord(SAMPLE_CDDB_ID, self.frame_offsets,
+                'Taking Back Sunday / New Again', self.titles)
+        ])
+        with mock.patch('builtins.print'):
+            album = lookupFreedb(SAMPLE_CDDB_ID, self.toc, self.dump_path)
+        self.assertEqual(album.album_title, 'New Again')
+        self.assertTrue(os.path.exists(self.dump_path+'.idx'))
+
+        # the index is used as is the second time
+        album = lookupFreedb(SAMPLE_CDDB_ID, self.toc, self.dump_path)
+        self.assertEqual(album.album_title, 'New Again')
+
+    def testLookupMissingDisc(self):
+        self.writeDump([makeRecord('00000001', self.frame_offsets,
+            'Other / Album', self.titles)])
+        with mock.patch('builtins.print'):
+            self.assertIsNone(
+                lookupFreedb(SAMPLE_CDDB_ID, self.toc, self.dump_path))
+
+    def testNoDump(self):
+        with mock.patch('cd_rip_conv_tag.core.FREEDB_DUMP', None):
+            self.assertIsNone(lookupFreedb(SAMPLE_CDDB_ID, self.toc))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+tests for the rip journal: saving and loading it back, checking the wav
+folders it names, and removing the oldest journals.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cd_rip_conv_tag import core
+from cd_rip_conv_tag.core import (
+    JOB_STAGE_CHECKSUM,
+    JOB_STAGE_RIPPED,
+    JOB_WAV_DIR,
+    JOURNAL_FILE,
+    RipJournal,
+    evictRipJournals,
+    isJobWavDir,
+    loadRipJournal,
+    parseCDInfo,
+    parseTOC
+)
+
+### constants   ========================================================
+
+SAMPLE_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'cd-info-sample-output')
+SAMPLE_ACCURATERIP_ID = '011-000f587a-00854833-9c08e90b'
+CHECKSUM_ENTRY = {
+    'crc32': '0000abcd',
+    'accuraterip_v1': '00000001',
+    'accuraterip_v2': '00000002',
+    'samples': 588
+}
+
+########################################################################
+### tests ##############################################################
+########################################################################
+
+class RipJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.journal_dir = os.path.join(temp_dir.name, 'jobs')
+        self.scratch_dir = os.path.join(temp_dir.name, 'scratch')
+        os.makedirs(self.scratch_dir)
+
+        for name, value in (
+                ('JOURNAL_DIR', self.journal_dir),
+                ('SCRATCH_DIR', self.scratch_dir),
+                ('RESUME_RIPS', True)):
+            patcher = mock.patch.object(core, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        with open(SAMPLE_OUTPUT) as sample:
+            self.toc = parseTOC(parseCDInfo(sample.read()))
+
+    # function to load the sample disc's journal, and close it again
+    # @returns the RipJournal
+    def loadJournal(self):
+        journal = loadRipJournal(self.toc, self.scratch_dir)
+        core.RIP_JOURNALS_OPEN.discard(journal.path)
+        return journal
+
+    # function to write a journal for a disc, made older the lower its
+    # age is
+    # @param disc_id    - the disc's AccurateRip ID
+    # @param age        - modification time of the journal
+    # @returns path of the disc's wav folder, which is made too
+    def writeJournal(self, disc_id, age):
+        wav_dir = os.path.join(self.scratch_dir, JOB_WAV_DIR.format(disc_id))
+        os.makedirs(wav_dir)
+        journal = RipJournal(
+            os.path.join(self.journal_dir, JOURNAL_FILE.format(disc_id)),
+            disc_id,
+            wav_dir)
+        journal.save()
+        os.utime(journal.path, (age, age))
+        return wav_dir
+
+    def testRoundTrip(self):
+        journal = self.loadJournal()
+        self.assertEqual(journal.disc_id, SAMPLE_ACCURATERIP_ID)
+        self.assertEqual(
+            journal.wav_dir,
+            os.path.join(
+                self.scratch_dir, JOB_WAV_DIR.format(SAMPLE_ACCURATERIP_ID)))
+        journal.markStage(1, JOB_STAGE_RIPPED, 1234)
+        journal.markStage(1, JOB_STAGE_CHECKSUM, CHECKSUM_ENTRY)
+
+        loaded = self.loadJournal()
+        self.assertEqual(loaded.getStage(1, JOB_STAGE_RIPPED), 1234)
+        self.assertEqual(loaded.getStage(1, JOB_STAGE_CHECKSUM), CHECKSUM_ENTRY)
+        self.assertIsNone(loaded.getStage(2, JOB_STAGE_RIPPED))
+        self.assertEqual(loaded.wav_dir, journal.wav_dir)
+
+    def testDamagedJournal(self):
+        os.makedirs(self.journal_dir)
+        journal_path = os.path.join(
+            self.journal_dir, JOURNAL_FILE.format(SAMPLE_ACCURATERIP_ID))
+        with open(journal_path, 'w') as journal_file:
+            journal_file.write('{"tracks": ')
+        with mock.patch('builtins.print'):
+            journal = self.loadJournal()
+        self.assertEqual(journal.tracks, dict())
+
+    def testForeignWavDir(self):
+        # a journal naming some other folder starts a folder of its own
+        os.makedirs(self.journal_dir)
+        journal_path = os.path.join(
+            self.journal_dir, JOURNAL_FILE.format(SAMPLE_ACCURATERIP_ID))
+        with open(journal_path, 'w') as journal_file:
+            json.dump({'wav_dir': self.scratch_dir, 'tracks': {}},
+                journal_file)
+        journal = self.loadJournal()
+        self.assertEqual(
+            os.path.basename(journal.wav_dir),
+            JOB_WAV_DIR.format(SAMPLE_ACCURATERIP_ID))
+
+    def testSaveLeavesNoTempFile(self):
+        journal = self.loadJournal()
+        with self.assertRaises(TypeError):
+            journal.markStage(1, JOB_STAGE_RIPPED, object())
+        self.assertEqual(
+            [entry for entry in os.listdir(self.journal_dir)
+                if not entry.endswith(JOURNAL_FILE.format(''))],
+            list())
+
+    def testIsJobWavDir(self):
+        wav_dir = os.path.join(self.scratch_dir, JOB_WAV_DIR.format('1'))
+        self.assertTrue(isJobWavDir(wav_dir, '1'))
+        self.assertFalse(isJobWavDir(wav_dir, '2'))
+        self.assertFalse(isJobWavDir(self.scratch_dir, '1'))
+        self.assertFalse(isJobWavDir(
+            os.path.join(self.scratch_dir, 'other', JOB_WAV_DIR.format('1')),
+            '1'))
+        self.assertFalse(isJobWavDir(None, '1'))
+
+    def testEviction(self):
+        wav_dirs = [
+            self.writeJournal(str(disc), disc+1) for disc in range(4)
+        ]
+        with mock.patch.object(core, 'JOURNAL_MAX_ENTRIES', 2):
+            evictRipJournals()
+        self.assertEqual(
+            sorted(os.listdir(self.journal_dir)),
+            [JOURNAL_FILE.format('2'), JOURNAL_FILE.format('3')])
+        self.assertEqual(
+            [os.path.isdir(wav_dir) for wav_dir in wav_dirs],
+            [False, False, True, True])
+
+    def testEvictionKeepsOpenJournals(self):
+        wav_dirs = [
+            self.writeJournal(str(disc), disc+1) for disc in range(3)
+        ]
+        open_path = os.path.join(self.journal_dir, JOURNAL_FILE.format('0'))
+        with mock.patch.object(core, 'JOURNAL_MAX_ENTRIES', 1), \
+                mock.patch.object(core, 'RIP_JOURNALS_OPEN', {open_path}):
+            evictRipJournals()
+        self.assertTrue(os.path.exists(open_path))
+        self.assertTrue(os.path.isdir(wav_dirs[0]))
+        self.assertFalse(os.path.isdir(wav_dirs[1]))
+
+    def testEvictionKeepsForeignFolders(self):
+        # a journal naming a folder that is not ours only loses the
+        # journal
+        os.makedirs(self.journal_dir)
+        foreign_dir = os.path.join(self.scratch_dir, 'music')
+        os.makedirs(foreign_dir)
+        with open(os.path.join(self.journal_dir, JOURNAL_FILE.format('0')),
+                'w') as journal_file:
+            json.dump({'wav_dir': foreign_dir, 'tracks': {}}, journal_file)
+        os.utime(journal_file.name, (1, 1))
+        self.writeJournal('1', 2)
+        with mock.patch.object(core, 'JOURNAL_MAX_ENTRIES', 1):
+            evictRipJournals()
+        self.assertTrue(os.path.isdir(foreign_dir))
+        self.assertEqual(
+            os.listdir(self.journal_dir), [JOURNAL_FILE.format('1')])
+
+if __name__ == '__main__':
+    unittest.main()